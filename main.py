@@ -1,17 +1,30 @@
 import os
+import json
+import asyncio
 from fastapi import FastAPI, HTTPException
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List, Literal
 
 # Core Imports
 from src.core.context.engine import ContextEngine
 from src.core.orchestrator import Orchestrator
-from src.agents.ingestion.dispatcher import auto_ingest
-from src.core.tools.llm_wrapper import llm_wrapper
+from src.agents.ingestion.dispatcher import auto_ingest, auto_ingest_async
+from src.agents.ingestion.arxiv import ARXIV_ID_RE, resolve_arxiv_async, get_arxiv_cache
+from src.agents.ingestion.stream import ingest_streamed
+from src.core.tools.llm_wrapper import llm_wrapper, get_llm_cache
+from src.core.tools.review_cache import get_review_cache
+from src.core.tools.fetch_cache import get_fetch_cache
 from src.core.secrets.manager import get_runtime_secrets
+from src.core.tools.model_registry import get_model_registry
+from src.core.tools.embedding_cache import get_embedding_cache
+from src.core.config import is_eager_embedding_load, BATCH_PARALLELISM, BATCH_MAX_ITEMS, STREAM_INGEST
+from src.core.tools.http_client import close_async_http_client, http_stats
+from src.core.jobs.store import create_job_store
+from src.core.jobs.worker import ReviewWorkerPool
 from src.utils.verification import run_structural_verification
+from src.core.logger import debug
 
 app = FastAPI(title="Hypothesi v2.0", description="Autonomous Scientific Review System")
 
@@ -24,6 +37,74 @@ class ReviewRequest(BaseModel):
     source_type: Optional[str] = None  # Optional: Auto-detected if missing
     use_llm: bool = False
     llm_model: str = "gemini-2.0-flash"
+    classify_mode: Literal["pair", "claim", "document"] = "pair"  # LLM evidence batching
+    use_llm_cache: bool = True  # False bypasses the LLM response cache for this review
+    force_refresh: bool = False  # True recomputes the review instead of serving a cached one
+    arxiv_full_text: Optional[bool] = None  # arXiv IDs: review the PDF body (default HYPOTHESI_ARXIV_FULL_TEXT)
+    stream: Optional[bool] = None  # Index the whole document incrementally, no 200k cap (default HYPOTHESI_STREAM_INGEST)
+
+class BatchReviewRequest(BaseModel):
+    sources: List[str]
+    use_llm: bool = False
+    llm_model: str = "gemini-2.0-flash"
+    classify_mode: Literal["pair", "claim", "document"] = "pair"
+    use_llm_cache: bool = True
+    force_refresh: bool = False
+    arxiv_full_text: Optional[bool] = None
+    stream: Optional[bool] = None
+    parallelism: Optional[int] = None  # Defaults to HYPOTHESI_BATCH_PARALLELISM
+
+def _streamed(req):
+    return STREAM_INGEST if req.stream is None else req.stream
+
+async def _ingest(context_engine, source, req):
+    """(text to review, extra run kwargs); ingestion errors come back as the text."""
+    if _streamed(req):
+        return await asyncio.to_thread(ingest_streamed, context_engine, source, arxiv_full_text=req.arxiv_full_text)
+    return await auto_ingest_async(source, arxiv_full_text=req.arxiv_full_text), {}
+
+def _run_review_job(payload: dict):
+    """Synchronous review executed by the background worker pool."""
+    req = ReviewRequest(**payload)
+    context_engine = ContextEngine(user_id="job-user")
+    orchestrator = Orchestrator(context_engine)
+
+    llm_callable = None
+    if req.use_llm:
+        get_runtime_secrets().require("GEMINI_API_KEY")
+        llm_callable = llm_wrapper(model_id=req.llm_model, use_cache=req.use_llm_cache)
+
+    streamed = {}
+    if _streamed(req):
+        cleaned_text, streamed = ingest_streamed(context_engine, req.source, arxiv_full_text=req.arxiv_full_text)
+    else:
+        cleaned_text = auto_ingest(req.source, arxiv_full_text=req.arxiv_full_text)
+    if isinstance(cleaned_text, dict) and cleaned_text.get("error"):
+        return cleaned_text
+
+    return orchestrator.run(
+        raw_text=cleaned_text,
+        use_llm=req.use_llm,
+        llm_callable=llm_callable,
+        classify_mode=req.classify_mode,
+        force_refresh=req.force_refresh,
+        **streamed
+    )
+
+# Background review jobs (HYPOTHESI_JOB_BACKEND=memory|sqlite, HYPOTHESI_JOB_WORKERS)
+job_pool = ReviewWorkerPool(create_job_store(), _run_review_job)
+
+@app.on_event("startup")
+def startup():
+    # Load shared models at startup when HYPOTHESI_EMBEDDING_LOAD=eager
+    if is_eager_embedding_load():
+        get_model_registry().preload()
+    job_pool.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    job_pool.stop()
+    await close_async_http_client()
 
 # 2. Serve the UI at the root path
 @app.get("/")
@@ -35,13 +116,32 @@ def health_check():
     status = run_structural_verification()
     if not status["ok"]:
         return {"status": "unhealthy", "errors": status["errors"]}
-    return {"status": "ok", "system": "Hypothesi v2.0", "mode": status["runtime_mode"]}
+    return {"status": "ok", "system": "Hypothesi v2.0", "mode": status["runtime_mode"],
+            "models": get_model_registry().stats(), "embedding_cache": get_embedding_cache().stats(),
+            "llm_cache": get_llm_cache().stats(), "review_cache": get_review_cache().stats(),
+            "http_cache": get_fetch_cache().stats(), "http_hosts": http_stats(),
+            "arxiv_cache": get_arxiv_cache().stats()}
+
+async def _review_source(orchestrator, source, req, llm_callable):
+    """Auto-ingests one source and reviews it (ingestion errors are returned as-is)."""
+    cleaned_text, streamed = await _ingest(orchestrator.context_engine, source, req)
+    if isinstance(cleaned_text, dict) and cleaned_text.get("error"):
+        return cleaned_text
+
+    return await orchestrator.run_async(
+        raw_text=cleaned_text,
+        use_llm=req.use_llm,
+        llm_callable=llm_callable,
+        classify_mode=req.classify_mode,
+        force_refresh=req.force_refresh,
+        **streamed
+    )
 
 @app.post("/review")
-def run_review(req: ReviewRequest):
+async def run_review(req: ReviewRequest):
     try:
-        # Setup
-        context_engine = ContextEngine(user_id="web-user")
+        # Setup (may load the shared embedding model on first use, so off the event loop)
+        context_engine = await asyncio.to_thread(ContextEngine, "web-user")
         orchestrator = Orchestrator(context_engine)
 
         llm_callable = None
@@ -49,28 +149,116 @@ def run_review(req: ReviewRequest):
             try:
                 get_runtime_secrets().require("GEMINI_API_KEY")
                 # Pass the requested model to the wrapper
-                llm_callable = llm_wrapper(model_id=req.llm_model)
+                llm_callable = llm_wrapper(model_id=req.llm_model, use_cache=req.use_llm_cache)
             except Exception as e:
                 return {"error": "LLM requested but configuration failed", "details": str(e)}
 
-        # Auto-Ingest
         # We ignore req.source_type if provided, relying on auto-detection for robustness
-        cleaned_text = auto_ingest(req.source)
-        
-        if isinstance(cleaned_text, dict) and cleaned_text.get("error"):
-             return cleaned_text
-
-        # Run
-        result = orchestrator.run(
-            raw_text=cleaned_text,
-            use_llm=req.use_llm,
-            llm_callable=llm_callable
-        )
-        return result
+        return await _review_source(orchestrator, req.source, req, llm_callable)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@app.post("/review/stream")
+async def run_review_stream(req: ReviewRequest):
+    """
+    Same review as /review, streamed as server-sent events: structure, claims,
+    evidence (one per claim), reliability and finally review (or error).
+    """
+    async def events():
+        try:
+            context_engine = await asyncio.to_thread(ContextEngine, "web-user")
+            orchestrator = Orchestrator(context_engine)
+
+            llm_callable = None
+            if req.use_llm:
+                get_runtime_secrets().require("GEMINI_API_KEY")
+                llm_callable = llm_wrapper(model_id=req.llm_model, use_cache=req.use_llm_cache)
+
+            cleaned_text, streamed = await _ingest(context_engine, req.source, req)
+            if isinstance(cleaned_text, dict) and cleaned_text.get("error"):
+                yield _sse("error", cleaned_text)
+                return
+
+            async for event, data in orchestrator.run_stream(
+                raw_text=cleaned_text,
+                use_llm=req.use_llm,
+                llm_callable=llm_callable,
+                classify_mode=req.classify_mode,
+                force_refresh=req.force_refresh,
+                **streamed
+            ):
+                yield _sse(event, data)
+        except Exception as e:
+            yield _sse("error", {"error": str(e)})
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/review/batch")
+async def run_review_batch(req: BatchReviewRequest):
+    """
+    Reviews many sources in one call. Duplicate sources are reviewed once;
+    items share the embedding model, the HTTP client and the LLM wrapper,
+    each with its own lightweight engine. Returns per-item results or errors
+    in input order.
+    """
+    if len(req.sources) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_ITEMS} sources per batch")
+
+    llm_callable = None
+    if req.use_llm:
+        try:
+            get_runtime_secrets().require("GEMINI_API_KEY")
+            llm_callable = llm_wrapper(model_id=req.llm_model, use_cache=req.use_llm_cache)
+        except Exception as e:
+            return {"error": "LLM requested but configuration failed", "details": str(e)}
+
+    unique = list(dict.fromkeys(s.strip() for s in req.sources))
+    slots = asyncio.Semaphore(max(1, req.parallelism or BATCH_PARALLELISM))
+
+    # All arXiv IDs in one id_list call (and their PDFs concurrently); items then hit the cache
+    arxiv_ids = [s for s in unique if ARXIV_ID_RE.match(s)]
+    if len(arxiv_ids) > 1:
+        try:
+            await resolve_arxiv_async(arxiv_ids, req.arxiv_full_text)
+        except Exception as e:
+            debug(f"arXiv prefetch failed ({e}); resolving per item", tag="batch")
+
+    async def one(source):
+        async with slots:
+            try:
+                orchestrator = Orchestrator(await asyncio.to_thread(ContextEngine, "web-user"))
+                return await _review_source(orchestrator, source, req, llm_callable)
+            except Exception as e:
+                return {"error": True, "message": str(e)}
+
+    results = dict(zip(unique, await asyncio.gather(*[one(s) for s in unique])))
+
+    items = []
+    for source in req.sources:
+        res = results[source.strip()]
+        if isinstance(res, dict) and res.get("error"):
+            items.append({"source": source, "error": res.get("message") or str(res["error"])})
+        else:
+            items.append({"source": source, "result": res})
+    return {"items": items, "unique_sources": len(unique)}
+
+@app.post("/reviews", status_code=202)
+def submit_review_job(req: ReviewRequest):
+    job_id = job_pool.submit(req.model_dump())
+    return {"job_id": job_id, "status": "queued"}
+
+@app.get("/reviews/{job_id}")
+def get_review_job(job_id: str):
+    job = job_pool.store.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.environ.get("PORT", 8080))
@@ -1,14 +1,28 @@
 import json
 import re
+import asyncio
 from src.core.observability.helpers import agent_start, agent_end
 from src.core.observability.error_reporter import capture_and_log_exception
 from src.core.tools.sanitizer import sanitizer
 from src.core.tools.text_prep import text_preprocessor
+from src.core.tools.normalize import NormalizedText, normalized_part
+from src.core.tools.llm_wrapper import acall_llm
+from src.core.context.compactor import ContextCompactor
+from src.core.config import CLAIMS_PROMPT_TOKENS
+
+# Sentence boundaries and keywords that imply a finding
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[\.\?\!])\s+')
+_FINDING_RE = re.compile(r'(?i)\b(show|suggest|found|observ|demonstrat|increas|decreas|significan|result|conclud)\b')
+_FINDING_QUERY = "show shows suggest suggests found observed demonstrate increased decreased significant significantly results conclude"
 
 def ClaimExtractionAgentFactory(context_engine, llm_callable=None, **kwargs):
+    compactor = ContextCompactor(CLAIMS_PROMPT_TOKENS)
+
     class ClaimAgent:
         def __init__(self):
             self.agent_name = "ClaimExtractionAgent"
+            # Set once the LLM failed (or gave no claims) and the heuristic scan was used
+            self.degraded = False
 
         def _heuristic_scan(self, text):
             """Scans raw text for claim-like sentences."""
@@ -17,20 +31,43 @@ def ClaimExtractionAgentFactory(context_engine, llm_callable=None, **kwargs):
             # Clean and split
             clean = text_preprocessor(sanitizer(text, max_lines=1000))
             # Split by punctuation
-            sentences = re.split(r'(?<=[\.\?\!])\s+', clean)
-            
-            # Keywords that imply a finding
-            keywords = re.compile(r'(?i)\b(show|suggest|found|observ|demonstrat|increas|decreas|significan|result|conclud)\b')
+            sentences = _SENTENCE_SPLIT_RE.split(clean)
             
             claims = []
             for s in sentences:
                 s = s.strip()
                 # Filter for reasonable length and keywords
-                if 20 < len(s) < 500 and keywords.search(s):
-                    claims.append(s)
+                if 20 < len(s) < 500 and _FINDING_RE.search(s):
+                    claims.append(normalized_part(s) if isinstance(clean, NormalizedText) else s)
             
             return list(set(claims))[:10]
 
+        def _llm_prompt(self, struct):
+            data = {k: v for k, v in struct.items() if k != 'full_text'}
+            # Sections share the token budget, finding-like passages first
+            data.update(compactor.compact_fields({k: v for k, v in data.items() if isinstance(v, str)}, _FINDING_QUERY))
+            return (
+                "Extract 3-5 core scientific claims from this data. "
+                "Return STRICT JSON: {\"claims\": [\"string\"]}\n"
+                f"Data: {json.dumps(data)}"
+            )
+
+        def _parse_llm(self, res):
+            clean = res.replace("```json", "").replace("```", "").strip()
+            return json.loads(clean).get("claims", [])
+
+        def _fallback(self, struct):
+            # 2. Heuristic Fallback (Targeted Sections)
+            # Try specific sections first
+            priority_text = (struct.get("results", "") + " " + struct.get("conclusion", "") + " " + struct.get("abstract", ""))
+            claims = self._heuristic_scan(priority_text)
+
+            # 3. "Nuclear" Fallback (Scan Full Text)
+            if not claims and struct.get("full_text"):
+                # If structure failed, scan the raw text
+                claims = self._heuristic_scan(struct["full_text"])
+            return claims
+
         def extract(self, struct, session_id=None):
             agent_start(session_id, self.agent_name)
             
@@ -39,31 +76,38 @@ def ClaimExtractionAgentFactory(context_engine, llm_callable=None, **kwargs):
             # 1. Try LLM
             if llm_callable:
                 try:
-                    prompt = (
-                        "Extract 3-5 core scientific claims from this data. "
-                        "Return STRICT JSON: {\"claims\": [\"string\"]}\n"
-                        f"Data: {json.dumps({k:v for k,v in struct.items() if k != 'full_text'})}"
-                    )
-                    res = llm_callable(prompt, agent_name="Claims")
-                    clean = res.replace("```json", "").replace("```", "").strip()
-                    claims = json.loads(clean).get("claims", [])
+                    res = llm_callable(self._llm_prompt(struct), agent_name="Claims")
+                    claims = self._parse_llm(res)
                 except Exception as e:
                     capture_and_log_exception({"where": "Claim_LLM", "error": str(e)})
 
-            # 2. Heuristic Fallback (Targeted Sections)
             if not claims:
-                # Try specific sections first
-                priority_text = (struct.get("results", "") + " " + struct.get("conclusion", "") + " " + struct.get("abstract", ""))
-                claims = self._heuristic_scan(priority_text)
-
-            # 3. "Nuclear" Fallback (Scan Full Text)
-            if not claims and struct.get("full_text"):
-                # If structure failed, scan the raw text
-                claims = self._heuristic_scan(struct["full_text"])
+                self.degraded = bool(llm_callable)
+                claims = self._fallback(struct)
 
             agent_end(session_id, self.agent_name)
             
             # Ensure we never return None
             return {"claims": claims if claims else []}
 
+        async def extract_async(self, struct, session_id=None):
+            agent_start(session_id, self.agent_name)
+
+            claims = []
+            if llm_callable:
+                try:
+                    prompt = await asyncio.to_thread(self._llm_prompt, struct)
+                    res = await acall_llm(llm_callable, prompt, agent_name="Claims")
+                    claims = self._parse_llm(res)
+                except Exception as e:
+                    capture_and_log_exception({"where": "Claim_LLM", "error": str(e)})
+
+            if not claims:
+                self.degraded = bool(llm_callable)
+                # The fallback may scan the full text
+                claims = await asyncio.to_thread(self._fallback, struct)
+
+            agent_end(session_id, self.agent_name)
+            return {"claims": claims if claims else []}
+
     return ClaimAgent()
\ No newline at end of file
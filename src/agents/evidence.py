@@ -1,14 +1,27 @@
 import time
 import re
+import json
+import asyncio
 from typing import List, Dict, Any
 from src.core.observability.helpers import agent_start, agent_end
 from src.core.observability.error_reporter import capture_and_log_exception
 from src.core.tools.sanitizer import sanitizer
 from src.core.tools.text_prep import text_preprocessor
 from src.core.tools.rag_wrapper import rag_retriever_wrapper
+from src.core.tools.heuristics import ChunkFeatureIndex
+from src.core.tools.executor import get_agent_executor
+from src.core.tools.llm_wrapper import acall_llm
+from src.core.config import LLM_CONCURRENCY
 from src.core.deps.checker import check_agent_dependencies
 
-def EvidenceLinkingAgentFactory(context_engine, retriever_callable=None, llm_callable=None, embedder=None, retrieval_k=5):
+def EvidenceLinkingAgentFactory(context_engine, retriever_callable=None, llm_callable=None, embedder=None, retrieval_k=5, batch_retrieval=True, llm_concurrency=None,
+                                classify_mode="pair", pairs_per_prompt=25):
+    """
+    classify_mode controls how LLM classification is batched:
+      "pair"     - one prompt per (claim, chunk) pair
+      "claim"    - one prompt per claim covering all its retrieved chunks
+      "document" - all pairs in prompts of up to pairs_per_prompt items
+    """
     
     if not retriever_callable:
         retriever_callable = rag_retriever_wrapper(context_engine)
@@ -17,6 +30,14 @@ def EvidenceLinkingAgentFactory(context_engine, retriever_callable=None, llm_cal
         def __init__(self):
             self.agent_name = "EvidenceLinkingAgent"
             self.retrieval_k = retrieval_k
+            self.batch_retrieval = batch_retrieval
+            self.llm_concurrency = llm_concurrency
+            self.classify_mode = classify_mode
+            self.pairs_per_prompt = max(1, pairs_per_prompt)
+            # Set once any pair got a heuristic label because the LLM gave none, or linking failed
+            self.degraded = False
+            # Chunk features precomputed when the document was ingested
+            self.features = getattr(context_engine, "features", None) or ChunkFeatureIndex()
             
             # Dependency check (non-fatal)
             try: check_agent_dependencies(self.agent_name, ["sentence_transformers"])
@@ -27,91 +48,274 @@ def EvidenceLinkingAgentFactory(context_engine, retriever_callable=None, llm_cal
             Restored Logic from Block 7.3:
             Keyword-based support/contradiction detection.
             """
-            try:
-                c = (chunk or "").lower()
-                
-                # Logic from Kaggle Block 7.3
-                support_pattern = re.compile(
-                    r"\b(significant|support|consistent|increase|decrease|improve|improves|benefit|better|show|reduction|reduced|associate|associated|suggest)\b",
-                    re.I
-                )
-                contradict_pattern = re.compile(
-                    r"\b(no evidence|not significant|contradict|did not|failed to|no effect|inconsistent|reversed|null effect|no difference)\b",
-                    re.I
-                )
-
-                if contradict_pattern.search(c):
-                    return "contradicts"
-                if support_pattern.search(c):
-                    return "supports"
+            return self.features.classify([(claim, chunk)])[0]
 
-                # Token overlap fallback (3+ matching big words)
-                claim_tokens = set(re.findall(r"\b\w{4,}\b", (claim or "").lower()))
-                chunk_tokens = set(re.findall(r"\b\w{4,}\b", c))
-                if claim_tokens and len(claim_tokens & chunk_tokens) >= 3:
-                    return "supports"
+        def _pair_prompt(self, claim, chunk):
+            return (
+                "Classify if the Evidence supports, contradicts, or is insufficient for the Claim.\n"
+                "Return ONE word: supports / contradicts / insufficient.\n\n"
+                f"Claim: {claim}\nEvidence: {chunk}"
+            )
 
-                return "insufficient"
+        def _llm_classify(self, claim, chunk, session_id):
+            try:
+                resp = llm_callable(self._pair_prompt(claim, chunk), session_id=session_id, agent_name=self.agent_name)
+                return self._label(resp)
             except:
-                return "insufficient"
+                return None
 
-        def _llm_classify(self, claim, chunk, session_id):
+        async def _llm_classify_async(self, claim, chunk, session_id):
             try:
-                prompt = (
-                    "Classify if the Evidence supports, contradicts, or is insufficient for the Claim.\n"
-                    "Return ONE word: supports / contradicts / insufficient.\n\n"
-                    f"Claim: {claim}\nEvidence: {chunk}"
-                )
-                resp = llm_callable(prompt, session_id=session_id, agent_name=self.agent_name)
-                text = resp.lower().strip()
-                if "contrad" in text: return "contradicts"
-                if "support" in text: return "supports"
-                return "insufficient"
+                resp = await acall_llm(llm_callable, self._pair_prompt(claim, chunk), session_id=session_id, agent_name=self.agent_name)
+                return self._label(resp)
             except:
                 return None
 
+        def _label(self, text):
+            text = str(text).lower().strip()
+            if "contrad" in text: return "contradicts"
+            if "support" in text: return "supports"
+            return "insufficient"
+
+        def _batch_prompt(self, pairs):
+            if len({c for c, _ in pairs}) == 1:
+                items = f"Claim: {pairs[0][0]}\n\n" + "\n".join(
+                    f"[{i}] Evidence: {ch}" for i, (_, ch) in enumerate(pairs))
+            else:
+                items = "\n\n".join(
+                    f"[{i}] Claim: {c}\nEvidence: {ch}" for i, (c, ch) in enumerate(pairs))
+            return (
+                "For each numbered item, classify if the Evidence supports, contradicts, or is insufficient for the Claim.\n"
+                "Return STRICT JSON ONLY: [{\"i\": NUMBER, \"label\": \"supports|contradicts|insufficient\"}]\n"
+                "Do not use Markdown formatting.\n\n"
+                f"{items}"
+            )
+
+        def _parse_batch(self, resp, n):
+            """Indexed verdicts -> labels; items missing from a partial/garbled response are None."""
+            labels = [None] * n
+            clean = resp.replace("```json", "").replace("```", "").strip()
+            try:
+                verdicts = json.loads(clean)
+                if isinstance(verdicts, dict): verdicts = verdicts.get("verdicts", [])
+            except ValueError:
+                # Truncated/invalid array: salvage every complete object
+                verdicts = []
+                for frag in re.findall(r"\{[^{}]*\}", clean):
+                    try: verdicts.append(json.loads(frag))
+                    except ValueError: continue
+
+            for v in verdicts:
+                try:
+                    i = int(v.get("i"))
+                    if 0 <= i < n and v.get("label"):
+                        labels[i] = self._label(v["label"])
+                except (AttributeError, TypeError, ValueError):
+                    continue
+            return labels
+
+        def _llm_classify_batch(self, pairs, session_id):
+            """Classifies many pairs in one structured prompt (labels aligned with pairs)."""
+            try:
+                resp = llm_callable(self._batch_prompt(pairs), session_id=session_id, agent_name=self.agent_name)
+                return self._parse_batch(resp, len(pairs))
+            except Exception as e:
+                capture_and_log_exception({"where": "EvidenceLinking_batch", "error": str(e)})
+                return [None] * len(pairs)
+
+        async def _llm_classify_batch_async(self, pairs, session_id):
+            try:
+                resp = await acall_llm(llm_callable, self._batch_prompt(pairs), session_id=session_id, agent_name=self.agent_name)
+                return self._parse_batch(resp, len(pairs))
+            except Exception as e:
+                capture_and_log_exception({"where": "EvidenceLinking_batch", "error": str(e)})
+                return [None] * len(pairs)
+
+        def _groups(self, pairs):
+            """Pair indices per prompt: by claim, or fixed-size slices of the document."""
+            if self.classify_mode == "claim":
+                groups, current = [], []
+                for idx, pair in enumerate(pairs):
+                    if current and pairs[current[-1]][0] != pair[0]:
+                        groups.append(current); current = []
+                    current.append(idx)
+                if current: groups.append(current)
+                return groups
+            n = self.pairs_per_prompt
+            return [list(range(i, min(i + n, len(pairs)))) for i in range(0, len(pairs), n)]
+
+        def _scatter(self, n, groups, batches):
+            labels = [None] * n
+            for group, batch in zip(groups, batches):
+                for i, label in zip(group, batch):
+                    labels[i] = label
+            return labels
+
+        def _llm_labels(self, pairs, sid):
+            """LLM labels for pairs according to classify_mode (None where unavailable)."""
+            if self.classify_mode == "pair":
+                return get_agent_executor().map(
+                    lambda p: self._llm_classify(p[0], p[1], sid), pairs, limit=self.llm_concurrency
+                )
+            groups = self._groups(pairs)
+            batches = get_agent_executor().map(
+                lambda g: self._llm_classify_batch([pairs[i] for i in g], sid), groups, limit=self.llm_concurrency
+            )
+            return self._scatter(len(pairs), groups, batches)
+
+        async def _llm_labels_async(self, pairs, sid, slots=None):
+            slots = slots or asyncio.Semaphore(self.llm_concurrency or LLM_CONCURRENCY)
+            async def bounded(coro):
+                async with slots:
+                    return await coro
+
+            if self.classify_mode == "pair":
+                return await asyncio.gather(*[bounded(self._llm_classify_async(c, ch, sid)) for c, ch in pairs])
+            groups = self._groups(pairs)
+            batches = await asyncio.gather(*[
+                bounded(self._llm_classify_batch_async([pairs[i] for i in g], sid)) for g in groups
+            ])
+            return self._scatter(len(pairs), groups, batches)
+
+        def _retrieve_all(self, safe_claims):
+            """One batched retrieval for every claim when the retriever supports it."""
+            batch = getattr(retriever_callable, "batch", None)
+            if self.batch_retrieval and batch:
+                return batch(safe_claims, k=self.retrieval_k)
+            return [retriever_callable(c, k=self.retrieval_k) for c in safe_claims]
+
+        def _classify_pairs(self, pairs, sid):
+            """
+            Labels (claim, chunk) pairs in order. LLM calls fan out on the shared
+            agent executor; any pair the LLM fails on falls back to the heuristic.
+            """
+            labels = [None] * len(pairs)
+            if llm_callable and pairs:
+                labels = self._llm_labels(pairs, sid)
+            return self._with_fallback(pairs, labels)
+
+        def _with_fallback(self, pairs, labels):
+            # Every pair without an LLM label is scored in one batched heuristic pass
+            if llm_callable and not all(labels):
+                self.degraded = True
+            heuristic = iter(self.features.classify([pair for pair, label in zip(pairs, labels) if not label]))
+            return [label or next(heuristic) for label in labels]
+
+        def _prepare(self, claims):
+            """Sanitizes claims, retrieves their chunks and builds the (claim, chunk) pairs."""
+            # Sanitize claims before retrieval
+            safe_claims = [text_preprocessor(sanitizer(claim)) for claim in claims]
+            
+            # Retrieve
+            retrieved = self._retrieve_all(safe_claims)
+
+            safe_chunks = [[text_preprocessor(sanitizer(chunk)) for chunk in chunks] for chunks, _ in retrieved]
+            pairs = [(sc, ch) for sc, chunks in zip(safe_claims, safe_chunks) for ch in chunks]
+            return retrieved, safe_chunks, pairs
+
+        def _assemble(self, claims, retrieved, safe_chunks, labels):
+            results = []
+            labels = iter(labels)
+            for claim, chunks, (_, prov) in zip(claims, safe_chunks, retrieved):
+                evidence_entries = []
+
+                for i, safe_chunk in enumerate(chunks):
+                    evidence_entries.append({
+                        "chunk": safe_chunk,
+                        "classification": next(labels),
+                        "provenance": prov[i] if i < len(prov) else {"source": "retrieval"}
+                    })
+
+                results.append({
+                    "claim": claim,
+                    "evidence": evidence_entries
+                })
+            return results
+
         def link_evidence(self, claims, session_id=None):
             sid = session_id or "unknown-session"
             agent_start(sid, self.agent_name)
 
-            results = []
             try:
-                for claim in claims:
-                    # Sanitize claim before retrieval
-                    safe_claim = text_preprocessor(sanitizer(claim))
-                    
-                    # Retrieve
-                    chunks, prov = retriever_callable(safe_claim, k=self.retrieval_k)
-                    evidence_entries = []
-
-                    for i, chunk in enumerate(chunks):
-                        safe_chunk = text_preprocessor(sanitizer(chunk))
-                        classification = None
-
-                        # 1. Try LLM
-                        if llm_callable:
-                            classification = self._llm_classify(safe_claim, safe_chunk, sid)
-                        
-                        # 2. Fallback Heuristic
-                        if not classification:
-                            classification = self._heuristic_classify(safe_claim, safe_chunk)
-
-                        evidence_entries.append({
-                            "chunk": safe_chunk,
-                            "classification": classification,
-                            "provenance": prov[i] if i < len(prov) else {"source": "retrieval"}
-                        })
-
-                    results.append({
-                        "claim": claim,
-                        "evidence": evidence_entries
-                    })
+                retrieved, safe_chunks, pairs = self._prepare(claims)
+
+                # Classify every (claim, chunk) pair
+                results = self._assemble(claims, retrieved, safe_chunks, self._classify_pairs(pairs, sid))
                 
                 agent_end(sid, self.agent_name)
                 return {"links": results}
 
             except Exception as e:
                 capture_and_log_exception({"where": "EvidenceLinking", "error": str(e)})
+                self.degraded = True
                 return {"links": [], "error": str(e)}
 
-    return EvidenceLinkingAgent()
\ No newline at end of file
+        async def link_evidence_async(self, claims, session_id=None):
+            sid = session_id or "unknown-session"
+            agent_start(sid, self.agent_name)
+
+            try:
+                # Retrieval encodes queries (CPU-bound): keep it off the event loop
+                retrieved, safe_chunks, pairs = await asyncio.to_thread(self._prepare, claims)
+
+                labels = [None] * len(pairs)
+                if llm_callable and pairs:
+                    labels = await self._llm_labels_async(pairs, sid)
+                results = await asyncio.to_thread(
+                    lambda: self._assemble(claims, retrieved, safe_chunks, self._with_fallback(pairs, labels)))
+
+                agent_end(sid, self.agent_name)
+                return {"links": results}
+
+            except Exception as e:
+                capture_and_log_exception({"where": "EvidenceLinking", "error": str(e)})
+                self.degraded = True
+                return {"links": [], "error": str(e)}
+
+        async def link_evidence_stream(self, claims, session_id=None):
+            """
+            Async generator of (claim_index, link) pairs, each yielded as soon as
+            that claim's evidence is classified (completion order, not claim order).
+            A failure is logged and re-raised, so the caller's stream can end
+            with an error instead of silently missing links.
+            """
+            sid = session_id or "unknown-session"
+            agent_start(sid, self.agent_name)
+
+            try:
+                retrieved, safe_chunks, pairs = await asyncio.to_thread(self._prepare, claims)
+
+                bounds, start = [], 0
+                for chunks in safe_chunks:
+                    bounds.append((start, start + len(chunks)))
+                    start += len(chunks)
+
+                # "document" mode batches across claims, so classify everything up front
+                shared = None
+                if llm_callable and pairs and self.classify_mode == "document":
+                    shared = await self._llm_labels_async(pairs, sid)
+                slots = asyncio.Semaphore(self.llm_concurrency or LLM_CONCURRENCY)
+
+                async def one(i):
+                    lo, hi = bounds[i]
+                    sub = pairs[lo:hi]
+                    if shared is not None:
+                        labels = shared[lo:hi]
+                    elif llm_callable and sub:
+                        labels = await self._llm_labels_async(sub, sid, slots)
+                    else:
+                        labels = [None] * len(sub)
+                    link = self._assemble([claims[i]], [retrieved[i]], [safe_chunks[i]], self._with_fallback(sub, labels))
+                    return i, link[0]
+
+                for done in asyncio.as_completed([one(i) for i in range(len(claims))]):
+                    yield await done
+
+                agent_end(sid, self.agent_name)
+
+            except Exception as e:
+                capture_and_log_exception({"where": "EvidenceLinking_stream", "error": str(e)})
+                agent_end(sid, self.agent_name, {"error": str(e)})
+                raise
+
+    return EvidenceLinkingAgent()
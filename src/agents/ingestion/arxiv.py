@@ -1,20 +1,185 @@
 import re
+import asyncio
 import xml.etree.ElementTree as ET
-import unicodedata
-from src.core.tools.sanitizer import sanitizer
-from src.core.tools.text_prep import text_preprocessor
-
-def ArxivIngestionTool(id_val, max_results=1):
-    import requests
-    url = f"http://export.arxiv.org/api/query?search_query=id:{id_val}&max_results={max_results}"
-    resp = requests.get(url)
-    root = ET.fromstring(resp.content)
-    ns = {"atom": "http://www.w3.org/2005/Atom"}
-    
-    texts = []
-    for entry in root.findall("atom:entry", ns):
-        summary = entry.find("atom:summary", ns).text
-        texts.append(summary)
-    
-    raw = unicodedata.normalize("NFKC", "\n\n".join(texts))
-    return text_preprocessor(sanitizer(raw))
\ No newline at end of file
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+from src.core.tools.normalize import NormalizedText, normalize_text
+from src.core.tools.cache import TieredCache
+from src.core.tools.fetch_cache import get_fetch_cache
+from src.core.tools.http_client import http_get, fetch_bytes_async
+from src.agents.ingestion.pdf import load_pdf_bytes
+from src.core.logger import debug
+from src.core.observability.error_reporter import capture_and_log_exception
+from src.core.config import (
+    ARXIV_BATCH_SIZE, ARXIV_FULL_TEXT, ARXIV_PDF_WORKERS, ARXIV_CACHE_DB, HTTP_CACHE_FRESH_S
+)
+
+ARXIV_ID_RE = re.compile(r"^\d{4}\.\d{4,5}(v\d+)?$")
+_VERSION_RE = re.compile(r"v(\d+)$")
+_API_URL = "http://export.arxiv.org/api/query"
+_NS = {"atom": "http://www.w3.org/2005/Atom"}
+
+# A versioned arXiv ID never changes, so its record (abstract, and full text
+# once fetched) is kept without expiry. Unversioned IDs resolve to the latest
+# version, which is only trusted for as long as an HTTP cache entry.
+_records = TieredCache("arxiv", max_items=1024, db_path=ARXIV_CACHE_DB, max_rows=20000)
+_latest = TieredCache("arxiv_latest", max_items=4096, ttl_s=HTTP_CACHE_FRESH_S)
+
+def get_arxiv_cache() -> TieredCache:
+    return _records
+
+def _split_version(arxiv_id):
+    """("2310.06825", 2) for "2310.06825v2"; version is None when absent."""
+    m = _VERSION_RE.search(arxiv_id)
+    return (arxiv_id[:m.start()], int(m.group(1))) if m else (arxiv_id, None)
+
+def _clean(text):
+    return normalize_text(text or "", max_lines=300)
+
+def _parse_entries(content):
+    """Feed entries as records: {"id" (versioned), "abstract", "pdf_url"}."""
+    root = ET.fromstring(content)
+    records = []
+    for entry in root.findall("atom:entry", _NS):
+        abs_url = (entry.findtext("atom:id", "", _NS) or "").strip()
+        vid = abs_url.rsplit("/abs/", 1)[-1]
+        if not ARXIV_ID_RE.match(vid):  # error entries for malformed IDs
+            continue
+        pdf = next((l.get("href") for l in entry.findall("atom:link", _NS) if l.get("title") == "pdf"), None)
+        records.append({
+            "id": vid,
+            "abstract": _clean(entry.findtext("atom:summary", "", _NS)),
+            "pdf_url": pdf or f"https://arxiv.org/pdf/{vid}",
+        })
+    return records
+
+# ------------------------------------------------------
+# Resolution: cache lookups, then one id_list call per ARXIV_BATCH_SIZE IDs
+# ------------------------------------------------------
+def _cached(ids):
+    found, missing = {}, []
+    for aid in ids:
+        vid = aid if _split_version(aid)[1] else _latest.get(aid, tag="latest")
+        rec = _records.get(vid, tag="record") if vid else None
+        if rec:
+            found[aid] = rec
+        else:
+            missing.append(aid)
+    return found, missing
+
+def _batches(ids):
+    for i in range(0, len(ids), ARXIV_BATCH_SIZE):
+        part = ids[i:i + ARXIV_BATCH_SIZE]
+        yield part, f"{_API_URL}?{urlencode({'id_list': ','.join(part), 'max_results': len(part)})}"
+
+def _match(part, content):
+    """Maps requested IDs to parsed records (unversioned IDs take the latest version)."""
+    by_id, latest = {}, {}
+    for rec in _parse_entries(content):
+        by_id[rec["id"]] = rec
+        base, version = _split_version(rec["id"])
+        if base not in latest or version > _split_version(latest[base]["id"])[1]:
+            latest[base] = rec
+
+    found = {}
+    for aid in part:
+        rec = by_id.get(aid) if _split_version(aid)[1] else latest.get(aid)
+        if rec is None:
+            continue
+        prev = _records.get(rec["id"], tag="record")
+        if prev and prev.get("full_text"):
+            rec = dict(rec, full_text=prev["full_text"])
+        else:
+            _records.set(rec["id"], rec)
+        if rec["id"] != aid:
+            _latest.set(aid, rec["id"])
+        found[aid] = rec
+    return found
+
+def _with_full_text(rec, text):
+    if text:
+        rec = dict(rec, full_text=text)
+        _records.set(rec["id"], rec)
+    return rec
+
+def _fetch_full_text(rec, session=None, timeout=15):
+    cache = get_fetch_cache()
+    try:
+        resp = cache.get(rec["pdf_url"], session=session, timeout=timeout)
+        if resp["status"] == 200:
+            return _with_full_text(rec, cache.text(resp, "pdf", load_pdf_bytes, NormalizedText))
+    except Exception as e:
+        capture_and_log_exception({"where": "arxiv.full_text", "id": rec["id"], "error": str(e)})
+    return rec
+
+async def _fetch_full_text_async(rec, timeout=15):
+    cache = get_fetch_cache()
+    try:
+        resp = await cache.get_async(rec["pdf_url"], timeout=timeout)
+        if resp["status"] == 200:
+            return _with_full_text(rec, await asyncio.to_thread(cache.text, resp, "pdf", load_pdf_bytes, NormalizedText))
+    except Exception as e:
+        capture_and_log_exception({"where": "arxiv.full_text_async", "id": rec["id"], "error": str(e)})
+    return rec
+
+def resolve_arxiv(ids, full_text=None, session=None, timeout=15):
+    """
+    Resolves many arXiv IDs with one id_list API call per ARXIV_BATCH_SIZE IDs
+    (cached IDs cost nothing). With full_text, PDFs missing from the cache are
+    downloaded and extracted concurrently. Returns {requested id: record};
+    unknown IDs are absent. A failed PDF leaves the record abstract-only.
+    full_text=None uses HYPOTHESI_ARXIV_FULL_TEXT.
+    """
+    full_text = ARXIV_FULL_TEXT if full_text is None else full_text
+    ids = list(dict.fromkeys(i.strip() for i in ids))
+    found, missing = _cached(ids)
+    for part, url in _batches(missing):
+        resp = http_get(url, session=session, timeout=timeout)
+        if resp.status_code != 200:
+            raise RuntimeError(f"arXiv API returned {resp.status_code}")
+        found.update(_match(part, resp.content))
+
+    pending = [aid for aid in ids if full_text and aid in found and not found[aid].get("full_text")]
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, min(ARXIV_PDF_WORKERS, len(pending))), thread_name_prefix="hypothesi-arxiv") as pool:
+            for aid, rec in zip(pending, pool.map(lambda a: _fetch_full_text(found[a], session, timeout), pending)):
+                found[aid] = rec
+
+    debug(f"arXiv: {len(ids)} IDs, {len(missing)} fetched in {-(-len(missing) // ARXIV_BATCH_SIZE)} calls, "
+          f"{len(pending)} PDFs", tag="arxiv")
+    return found
+
+async def resolve_arxiv_async(ids, full_text=None, timeout=15):
+    """Non-blocking resolve_arxiv(); PDFs are fetched concurrently on the event loop."""
+    full_text = ARXIV_FULL_TEXT if full_text is None else full_text
+    ids = list(dict.fromkeys(i.strip() for i in ids))
+    found, missing = await asyncio.to_thread(_cached, ids)
+    for part, url in _batches(missing):
+        status, _, body = await fetch_bytes_async(url, timeout=timeout)
+        if status != 200:
+            raise RuntimeError(f"arXiv API returned {status}")
+        found.update(await asyncio.to_thread(_match, part, body))
+
+    pending = [aid for aid in ids if full_text and aid in found and not found[aid].get("full_text")]
+    slots = asyncio.Semaphore(max(1, ARXIV_PDF_WORKERS))
+
+    async def one(aid):
+        async with slots:
+            found[aid] = await _fetch_full_text_async(found[aid], timeout)
+
+    await asyncio.gather(*[one(aid) for aid in pending])
+    return found
+
+def _text(rec, full_text):
+    if rec is None:
+        return ""
+    full_text = ARXIV_FULL_TEXT if full_text is None else full_text
+    # Both were produced by normalize_text (records come back from JSON as str)
+    return NormalizedText(rec.get("full_text") if full_text and rec.get("full_text") else rec["abstract"])
+
+def ArxivIngestionTool(id_val, session=None, timeout=15, full_text=None):
+    """Abstract (or full text) of one arXiv ID; a batch resolve_arxiv() makes this a cache hit."""
+    return _text(resolve_arxiv([id_val], full_text, session, timeout).get(id_val.strip()), full_text)
+
+async def ArxivIngestionToolAsync(id_val, timeout=15, full_text=None):
+    return _text((await resolve_arxiv_async([id_val], full_text, timeout)).get(id_val.strip()), full_text)
@@ -1,34 +1,27 @@
-import re
 import os
-import requests
-import tempfile
+import asyncio
 from urllib.parse import urlparse
 import unicodedata
 
 # Import Tools
-from src.agents.ingestion.pdf import PdfIngestionTool
-from src.agents.ingestion.url import UrlIngestionTool
-from src.agents.ingestion.arxiv import ArxivIngestionTool
-from src.core.tools.sanitizer import sanitizer
-from src.core.tools.text_prep import text_preprocessor
+from src.agents.ingestion.pdf import PdfIngestionTool, load_pdf_bytes
+from src.agents.ingestion.url import UrlIngestionTool, UrlIngestionToolAsync
+from src.agents.ingestion.arxiv import ARXIV_ID_RE, ArxivIngestionTool, ArxivIngestionToolAsync
+from src.core.tools.fetch_cache import get_fetch_cache
+from src.core.tools.normalize import NormalizedText, normalize_text
 from src.core.logger import debug
 from src.core.observability.error_reporter import capture_and_log_exception
 
-def _download_temp_pdf(url):
+def _download_pdf(url, session=None):
     """
-    Helper: Downloads a remote PDF to a temporary file.
-    Returns the path to the temp file.
+    Helper: Fetches a remote PDF through the HTTP cache.
+    Returns the fetch result, or None on failure.
     """
     debug(f"Downloading remote PDF: {url}", tag="ingest")
     try:
-        response = requests.get(url, timeout=15, stream=True)
-        if response.status_code == 200:
-            # Create a temp file that closes but doesn't delete immediately
-            # so the PDF tool can open it by name
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-                for chunk in response.iter_content(chunk_size=8192):
-                    tmp.write(chunk)
-                return tmp.name
+        resp = get_fetch_cache().get(url, session=session, timeout=15)
+        if resp["status"] == 200:
+            return resp
     except Exception as e:
         capture_and_log_exception({"where": "download_pdf", "url": url, "error": str(e)})
     return None
@@ -36,7 +29,10 @@ def _download_temp_pdf(url):
 def auto_ingest(source, **kwargs):
     """
     Smart dispatch logic.
+    Pass session (a requests.Session) to reuse connections across calls and
+    arxiv_full_text to override HYPOTHESI_ARXIV_FULL_TEXT for arXiv IDs.
     """
+    session = kwargs.get("session")
     try:
         raw_text = ""
 
@@ -55,9 +51,9 @@ def auto_ingest(source, **kwargs):
             parsed = urlparse(clean_source)
 
             # A. ArXiv ID Detection (e.g., 2310.06825)
-            if re.match(r"^\d{4}\.\d{4,5}(v\d+)?$", clean_source):
+            if ARXIV_ID_RE.match(clean_source):
                 debug("Ingesting ArXiv ID", tag="ingest")
-                return ArxivIngestionTool(clean_source)
+                return ArxivIngestionTool(clean_source, session=session, full_text=kwargs.get("arxiv_full_text"))
 
             # B. Web URLs
             if parsed.scheme in ("http", "https"):
@@ -65,31 +61,61 @@ def auto_ingest(source, **kwargs):
                 # CASE: Remote PDF URL
                 if clean_source.lower().endswith(".pdf"):
                     debug("Ingesting Remote PDF URL", tag="ingest")
-                    temp_path = _download_temp_pdf(clean_source)
-                    if temp_path:
-                        try:
-                            # Use the PDF Tool on the downloaded file
-                            raw_text = PdfIngestionTool().load_pdf(temp_path)
-                        finally:
-                            # Cleanup temp file
-                            if os.path.exists(temp_path):
-                                os.remove(temp_path)
-                        return raw_text
+                    resp = _download_pdf(clean_source, session=session)
+                    if resp:
+                        # Extracted text is cached alongside the PDF
+                        return get_fetch_cache().text(resp, "pdf", load_pdf_bytes, NormalizedText)
                     else:
                         raise RuntimeError("Failed to download remote PDF.")
 
                 # CASE: Standard Webpage
                 debug("Ingesting Webpage", tag="ingest")
-                return UrlIngestionTool(clean_source)
+                return UrlIngestionTool(clean_source, session=session)
 
         # --------------------------------------
         # 3. Fallback: Raw Text
         # --------------------------------------
         debug("Ingesting Raw Text", tag="ingest")
         # Sanitize and prep
-        safe = sanitizer(str(source), max_lines=kwargs.get("max_lines", 5000))
-        return text_preprocessor(safe, normalize_whitespace=True, max_length=200000)
+        return normalize_text(str(source), max_lines=kwargs.get("max_lines", 5000), max_length=200000)
 
     except Exception as e:
         capture_and_log_exception({"where": "auto_ingest", "error": str(e)})
-        return {"error": True, "message": f"Ingestion failed: {str(e)}"}
\ No newline at end of file
+        return {"error": True, "message": f"Ingestion failed: {str(e)}"}
+
+async def auto_ingest_async(source, **kwargs):
+    """
+    Non-blocking auto_ingest(): remote sources are fetched with the async
+    HTTP client and parsed in a worker thread; local files and raw text
+    are handled by auto_ingest() in a worker thread.
+    """
+    try:
+        if isinstance(source, str):
+            clean_source = source.strip()
+            parsed = urlparse(clean_source)
+
+            if ARXIV_ID_RE.match(clean_source):
+                debug("Ingesting ArXiv ID (async)", tag="ingest")
+                return await ArxivIngestionToolAsync(clean_source, full_text=kwargs.get("arxiv_full_text"))
+
+            if parsed.scheme in ("http", "https"):
+                if clean_source.lower().endswith(".pdf"):
+                    debug("Ingesting Remote PDF URL (async)", tag="ingest")
+                    cache = get_fetch_cache()
+                    try:
+                        resp = await cache.get_async(clean_source, timeout=15)
+                    except Exception as e:
+                        capture_and_log_exception({"where": "download_pdf_async", "url": clean_source, "error": str(e)})
+                        resp = None
+                    if not resp or resp["status"] != 200:
+                        raise RuntimeError("Failed to download remote PDF.")
+                    return await asyncio.to_thread(cache.text, resp, "pdf", load_pdf_bytes, NormalizedText)
+
+                debug("Ingesting Webpage (async)", tag="ingest")
+                return await UrlIngestionToolAsync(clean_source)
+
+        return await asyncio.to_thread(auto_ingest, source, **kwargs)
+
+    except Exception as e:
+        capture_and_log_exception({"where": "auto_ingest_async", "error": str(e)})
+        return {"error": True, "message": f"Ingestion failed: {str(e)}"}
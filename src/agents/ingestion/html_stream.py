@@ -0,0 +1,133 @@
+import html
+import codecs
+from html.parser import HTMLParser
+from src.core.tools.text_budget import TextBudget
+
+try:
+    from lxml import etree
+    HAVE_LXML = True
+except ImportError:
+    HAVE_LXML = False
+
+# Elements that never have content (closed as soon as they open, as in BeautifulSoup)
+_VOID_TAGS = frozenset({
+    "area", "base", "basefont", "bgsound", "br", "col", "command", "embed", "frame", "hr",
+    "image", "img", "input", "isindex", "keygen", "link", "menuitem", "meta", "nextid",
+    "param", "source", "spacer", "track", "wbr",
+})
+_PRESERVE_WS_TAGS = frozenset({"pre", "textarea"})
+_ASCII_SPACES = str.maketrans("", "", "\x20\x0a\x09\x0c\x0d")
+
+class _TextCollector:
+    """
+    Parser-agnostic event sink: keeps text runs outside noise tags and feeds
+    them to a TextBudget. It tracks open elements the way BeautifulSoup's
+    tree builder does (an end tag closes everything opened after its match),
+    and merges adjacent data callbacks (split by the parser or by chunk
+    boundaries), so runs match the strings soup.get_text() would produce.
+    """
+    def __init__(self, noise_tags, budget):
+        self.noise = frozenset(noise_tags)
+        self.budget = budget
+        self.stack = []
+        self.noise_depth = 0  # open noise elements on the stack
+        self.run = []
+        self.done = False
+
+    def flush(self):
+        if self.run:
+            text = "".join(self.run)
+            self.run = []
+            # BeautifulSoup collapses whitespace-only strings (outside <pre>/<textarea>)
+            if not text.translate(_ASCII_SPACES) and not _PRESERVE_WS_TAGS.intersection(self.stack):
+                text = "\n" if "\n" in text else " "
+            if self.budget.add(text):
+                self.done = True
+
+    def start(self, tag):
+        self.flush()
+        if tag in _VOID_TAGS:
+            return
+        self.stack.append(tag)
+        if tag in self.noise:
+            self.noise_depth += 1
+
+    def end(self, tag):
+        self.flush()
+        if tag not in self.stack:
+            return
+        idx = len(self.stack) - 1 - self.stack[::-1].index(tag)
+        self.noise_depth -= sum(1 for t in self.stack[idx:] if t in self.noise)
+        del self.stack[idx:]
+
+    def data(self, text):
+        if not self.noise_depth and text:
+            self.run.append(text)
+
+class _StdlibParser(HTMLParser):
+    def __init__(self, sink):
+        super().__init__(convert_charrefs=True)
+        self.sink = sink
+
+    def handle_starttag(self, tag, attrs): self.sink.start(tag)
+    def handle_endtag(self, tag): self.sink.end(tag)
+    def handle_startendtag(self, tag, attrs): self.sink.flush()
+    def handle_data(self, data): self.sink.data(data)
+    def handle_comment(self, data): self.sink.flush()
+    def handle_decl(self, decl): self.sink.flush()
+    def handle_pi(self, data): self.sink.flush()
+    def unknown_decl(self, data):
+        self.sink.flush()
+        if data.startswith("CDATA["):
+            self.sink.data(data[6:])
+            self.sink.flush()
+
+class _LxmlTarget:
+    def __init__(self, sink):
+        self.sink = sink
+
+    def start(self, tag, attrib): self.sink.start(tag.lower() if isinstance(tag, str) else tag)
+    def end(self, tag): self.sink.end(tag.lower() if isinstance(tag, str) else tag)
+    def data(self, data): self.sink.data(data)
+    def comment(self, text): self.sink.flush()
+    def pi(self, target, data=None): self.sink.flush()
+    def close(self): return None
+
+def extract_html_text(chunks, noise_tags, max_length=200000, max_lines=5000, backend="stream"):
+    """
+    Incrementally parses an iterable of byte chunks (e.g. a response body or
+    network stream) and returns the raw text joined with newlines, skipping
+    noise_tags subtrees as they are parsed. Stops reading as soon as the
+    max_length/max_lines budget of the final text is met.
+    backend: "stream" (stdlib html.parser) or "lxml" (libxml2, if installed).
+    """
+    sink = _TextCollector(noise_tags, TextBudget(max_length, max_lines, prepare=html.unescape))
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+
+    if backend == "lxml" and HAVE_LXML:
+        parser = etree.HTMLParser(target=_LxmlTarget(sink), recover=True)
+        feed = parser.feed
+    else:
+        parser = _StdlibParser(sink)
+        feed = parser.feed
+
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            feed(text)
+        if sink.done:
+            break
+    else:
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            feed(tail)
+        parser.close()
+        sink.flush()
+
+    return sink.budget.text
+
+def iter_chunks(body, size=65536):
+    """Fixed-size memoryview slices of an in-memory body (no copies)."""
+    view = memoryview(body)
+    for i in range(0, len(view), size):
+        yield view[i:i + size]
@@ -1,28 +1,206 @@
+import io
 import os
-import unicodedata
-from src.core.tools.sanitizer import sanitizer
-from src.core.tools.text_prep import text_preprocessor
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing.shared_memory import SharedMemory
+from src.core.tools.normalize import normalize_text
+from src.core.tools.text_budget import TextBudget
+from src.core.config import PDF_PARALLEL_MIN_PAGES, PDF_WORKERS, PDF_PAGE_BATCH
+from src.core.logger import debug
 
 try: import fitz; HAVE_PYMUPDF=True
 except: HAVE_PYMUPDF=False
 try: import PyPDF2; HAVE_PYPDF2=True
 except: HAVE_PYPDF2=False
 
+_MAX_LINES = 5000
+
+# ------------------------------------------------------
+# Process-pool workers (large-PDF mode): the pool outlives documents, so
+# each batch opens its document and closes it before returning; idle
+# workers hold no document or its in-memory copy
+# ------------------------------------------------------
+def _open_in_worker(path, shm_name, size):
+    if path:
+        return fitz.open(path)
+    shm = SharedMemory(name=shm_name)
+    try:
+        return fitz.open(stream=bytes(shm.buf[:size]), filetype="pdf")
+    finally:
+        shm.close()
+
+def _extract_range(path, shm_name, size, start, end):
+    doc = _open_in_worker(path, shm_name, size)
+    try:
+        return [doc[i].get_text() for i in range(start, end)]
+    finally:
+        doc.close()
+
+def _mp_context():
+    # Workers are forked from a clean server process, never from a threaded caller
+    try:
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload([__name__])
+        return ctx
+    except ValueError:
+        return multiprocessing.get_context("spawn")
+
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+def get_pdf_pool(reset=False) -> ProcessPoolExecutor:
+    """
+    Shared worker processes for large PDFs, started on first use (starting
+    them costs more than extracting a mid-sized PDF serially). reset=True
+    replaces a pool that broke, e.g. after a worker crashed.
+    """
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if reset and _pdf_pool is not None:
+            _pdf_pool.shutdown(wait=False, cancel_futures=True)
+            _pdf_pool = None
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(max_workers=max(1, PDF_WORKERS), mp_context=_mp_context())
+        return _pdf_pool
+
+def _read_source(source):
+    """(path, data) for a filesystem path, bytes-like object or binary stream."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return None, bytes(source)
+    if hasattr(source, "read"):
+        return None, source.read()
+    path = os.fspath(source)
+    if not os.path.exists(path): raise FileNotFoundError(path)
+    return path, None
+
 class PdfIngestionTool:
-    def load_pdf(self, path, max_length=200000):
-        if not os.path.exists(path): raise FileNotFoundError(path)
+    def load_pdf(self, source, max_length=200000, parallel=None):
+        """
+        source may be a path, bytes or a binary stream (nothing is written to
+        disk). Pages are extracted in order and extraction stops as soon as
+        the max_length/line budget is met. parallel=None extracts the first
+        page batch here and moves the rest to the process pool only when the
+        budget still needs PDF_PARALLEL_MIN_PAGES+ more pages at that rate.
+        """
+        path, data = _read_source(source)
         raw = ""
         if HAVE_PYMUPDF:
             try:
-                doc = fitz.open(path)
-                raw = "\n".join([page.get_text() for page in doc])
+                raw = self._extract_fitz(path, data, max_length, parallel)
             except: pass
         if not raw and HAVE_PYPDF2:
             try:
-                reader = PyPDF2.PdfReader(path)
-                raw = "\n".join([p.extract_text() for p in reader.pages])
+                reader = PyPDF2.PdfReader(path or io.BytesIO(data))
+                budget = TextBudget(max_length, _MAX_LINES)
+                for p in reader.pages:
+                    if budget.add(p.extract_text()): break
+                raw = budget.text
             except: pass
-        
+
         if not raw: raise RuntimeError("PDF read failed")
-        raw = unicodedata.normalize("NFKC", raw)
-        return text_preprocessor(sanitizer(raw, max_lines=5000), max_length=max_length)
\ No newline at end of file
+        return normalize_text(raw, max_lines=_MAX_LINES, max_length=max_length)
+
+    def _extract_fitz(self, path, data, max_length, parallel):
+        budget = TextBudget(max_length, _MAX_LINES)
+        doc = fitz.open(path) if path else fitz.open(stream=data, filetype="pdf")
+        try:
+            n = doc.page_count
+            start = 0
+            if parallel is None:
+                parallel = n >= PDF_PARALLEL_MIN_PAGES and PDF_WORKERS > 1
+                if parallel:
+                    start = min(PDF_PAGE_BATCH, n)
+                    for i in range(start):
+                        if budget.add(doc[i].get_text()):
+                            debug(f"PDF: budget met after {i + 1}/{n} pages", tag="pdf")
+                            return budget.text
+                    parallel = self._pages_needed(budget, start, max_length) >= PDF_PARALLEL_MIN_PAGES
+            if parallel:
+                try:
+                    self._extract_parallel(path, data, start, n, budget)
+                    return budget.text
+                except Exception as e:
+                    debug(f"Parallel PDF extraction failed ({e}); extracting serially", tag="pdf")
+                    get_pdf_pool(reset=True)
+                    budget, start = TextBudget(max_length, _MAX_LINES), 0
+
+            for i in range(start, n):
+                if budget.add(doc[i].get_text()): break
+            debug(f"PDF: extracted {len(budget.parts)}/{n} pages", tag="pdf")
+            return budget.text
+        finally:
+            doc.close()
+
+    @staticmethod
+    def _pages_needed(budget, pages, max_length):
+        """Further pages the budget needs, extrapolated from the first pages' chars and lines."""
+        needed = float("inf")
+        chars = budget.token_chars + max(0, budget.tokens - 1)
+        if max_length and chars:
+            needed = (max_length - chars) * pages / chars
+        if budget.lines:
+            needed = min(needed, (budget.max_lines - budget.lines) * pages / budget.lines)
+        return needed
+
+    def _extract_parallel(self, path, data, first, n, budget):
+        """
+        Page batches from first on run across the shared pool; results are
+        consumed in page order. In-memory PDFs are handed to the workers
+        through one shared-memory block rather than pickled per batch.
+        """
+        workers = max(1, PDF_WORKERS)
+        pool = get_pdf_pool()
+        ranges = iter([(i, min(i + PDF_PAGE_BATCH, n)) for i in range(first, n, PDF_PAGE_BATCH)])
+        shm = None
+        if path:
+            source = (path, None, 0)
+        else:
+            shm = SharedMemory(create=True, size=max(1, len(data)))
+            shm.buf[:len(data)] = data
+            source = (None, shm.name, len(data))
+        inflight = deque()
+        try:
+            # Keep a bounded window in flight so an early stop wastes little work
+            inflight.extend(pool.submit(_extract_range, *source, *r) for _, r in zip(range(workers * 2), ranges))
+            while inflight:
+                pages = inflight.popleft().result()
+                nxt = next(ranges, None)
+                if nxt: inflight.append(pool.submit(_extract_range, *source, *nxt))
+                for text in pages:
+                    if budget.add(text):
+                        debug(f"PDF: budget met after {len(budget.parts)}/{n} pages", tag="pdf")
+                        return
+        finally:
+            running = [fut for fut in inflight if not fut.cancel()]
+            if shm is not None:
+                # Each batch attaches to the block itself; let running ones finish
+                # so their resource-tracker registration lands before the unlink
+                wait(running)
+                shm.close()
+                shm.unlink()
+
+def iter_pdf_pages(source):
+    """
+    Raw text of every page in order, one page at a time, with no length
+    budget (streaming ingestion). source is anything load_pdf() accepts.
+    """
+    path, data = _read_source(source)
+    doc = None
+    if HAVE_PYMUPDF:
+        try: doc = fitz.open(path) if path else fitz.open(stream=data, filetype="pdf")
+        except: doc = None
+    if doc is not None:
+        try:
+            for page in doc:
+                yield page.get_text()
+        finally:
+            doc.close()
+        return
+    if not HAVE_PYPDF2: raise RuntimeError("PDF read failed")
+    for p in PyPDF2.PdfReader(path or io.BytesIO(data)).pages:
+        yield p.extract_text()
+
+def load_pdf_bytes(body: bytes, max_length=200000):
+    """Extracts text from an in-memory PDF."""
+    return PdfIngestionTool().load_pdf(body, max_length=max_length)
@@ -0,0 +1,124 @@
+import os
+import html
+import hashlib
+from urllib.parse import urlparse
+from src.agents.ingestion.pdf import iter_pdf_pages
+from src.agents.ingestion.url import _NOISE_TAGS, _bs4_text
+from src.agents.ingestion.arxiv import ARXIV_ID_RE, resolve_arxiv
+from src.agents.ingestion.html_stream import extract_html_text, iter_chunks
+from src.core.tools.fetch_cache import get_fetch_cache
+from src.core.tools.normalize import NormalizedText, iter_normalized, truncate
+from src.core.logger import debug
+from src.core.observability.error_reporter import capture_and_log_exception
+from src.core.config import ARXIV_FULL_TEXT, HTML_PARSER, STREAM_HEAD_CHARS, STREAM_MAX_CHARS
+
+def _fetch(url, session=None):
+    resp = get_fetch_cache().get(url, session=session, timeout=15)
+    if resp["status"] >= 400:
+        raise RuntimeError(f"HTTP {resp['status']}")
+    return resp
+
+def _html_segments(content):
+    if HTML_PARSER == "bs4":
+        yield html.unescape(_bs4_text(content))
+        return
+    # No output budget: the whole page is kept
+    yield html.unescape(extract_html_text(iter_chunks(content), _NOISE_TAGS, max_length=None,
+                                          max_lines=float("inf"), backend=HTML_PARSER))
+
+def iter_source_segments(source, **kwargs):
+    """
+    auto_ingest() without the 200k-char budget: yields the raw text of source
+    a segment at a time (a page for PDFs). arXiv IDs stream the PDF when full
+    text is requested (arxiv_full_text, default HYPOTHESI_ARXIV_FULL_TEXT).
+    """
+    session = kwargs.get("session")
+    if hasattr(source, "read") or (isinstance(source, str) and os.path.exists(source) and source.lower().endswith(".pdf")):
+        debug("Streaming Local PDF", tag="ingest")
+        yield from iter_pdf_pages(source)
+        return
+
+    if isinstance(source, str):
+        clean_source = source.strip()
+        if ARXIV_ID_RE.match(clean_source):
+            debug("Streaming ArXiv ID", tag="ingest")
+            rec = resolve_arxiv([clean_source], full_text=False, session=session).get(clean_source)
+            if rec is None:
+                return
+            full_text = kwargs.get("arxiv_full_text")
+            if ARXIV_FULL_TEXT if full_text is None else full_text:
+                yield from iter_pdf_pages(_fetch(rec["pdf_url"], session)["body"])
+            else:
+                yield rec["abstract"]
+            return
+
+        if urlparse(clean_source).scheme in ("http", "https"):
+            debug("Streaming URL", tag="ingest")
+            resp = _fetch(clean_source, session)
+            if clean_source.lower().endswith(".pdf") or "application/pdf" in resp["content_type"]:
+                yield from iter_pdf_pages(resp["body"])
+            else:
+                yield from _html_segments(resp["body"])
+            return
+
+    debug("Streaming Raw Text", tag="ingest")
+    yield str(source)
+
+class DocumentStream:
+    """
+    Normalized pieces of a document (see iter_normalized), read from its raw
+    segments once. While it is iterated, head collects the first head_chars
+    chars, which is what the non-streaming path would review, and digest
+    hashes the full text. Text past max_chars is dropped (and logged).
+    """
+    def __init__(self, segments, head_chars=STREAM_HEAD_CHARS, max_chars=STREAM_MAX_CHARS):
+        self.segments = segments
+        self.head_chars = head_chars
+        self.max_chars = max_chars
+        self.chars = 0
+        self.truncated = False
+        self._head = []
+        self._head_chars = 0
+        self._hash = hashlib.sha256()
+
+    def __iter__(self):
+        for piece in iter_normalized(self.segments):
+            sep = 1 if self.chars else 0
+            room = self.max_chars - self.chars - sep
+            if room <= 0 or len(piece) > room:
+                self.truncated = True
+                piece = NormalizedText(piece[:max(0, room)].rstrip())
+            if piece:
+                self.chars += sep + len(piece)
+                self._hash.update(((" " if sep else "") + piece).encode("utf-8"))
+                if self._head_chars < self.head_chars:
+                    self._head.append(piece)
+                    self._head_chars += sep + len(piece)
+                yield piece
+            if self.truncated:
+                debug(f"Stream: stopped at HYPOTHESI_STREAM_MAX_CHARS ({self.max_chars} chars)", tag="ingest")
+                return
+
+    @property
+    def head(self):
+        return truncate(" ".join(self._head), self.head_chars)
+
+    @property
+    def digest(self):
+        return self._hash.hexdigest()
+
+def ingest_streamed(context_engine, source, **kwargs):
+    """
+    Streams source into context_engine's index (ContextEngine.ingest_stream).
+    Returns (text, run_kwargs): text is the document head the structure and
+    claim stages review, run_kwargs point Orchestrator.run() at the indexed
+    document. A failure is returned as text, like auto_ingest() does.
+    """
+    try:
+        doc = DocumentStream(iter_source_segments(source, **kwargs))
+        doc_id = context_engine.ingest_stream(doc, doc_id=kwargs.get("doc_id"))
+        debug(f"Stream: indexed {doc.chars} chars as {doc_id}", tag="ingest")
+        return doc.head, {"indexed_doc_id": doc_id, "content_digest": doc.digest}
+    except Exception as e:
+        capture_and_log_exception({"where": "ingest_streamed", "error": str(e)})
+        return {"error": True, "message": f"Ingestion failed: {str(e)}"}, {}
@@ -1,18 +1,43 @@
 import re
-import os
+import asyncio
 import html
-import tempfile
-import unicodedata
 from urllib.parse import urlparse
 from src.core.logger import debug
 from src.core.observability.error_reporter import capture_and_log_exception
-from src.core.tools.sanitizer import sanitizer
-from src.core.tools.text_prep import text_preprocessor
+from src.core.tools.normalize import NormalizedText, normalize_text
 
 # Import PDF Tool for fallback
-from src.agents.ingestion.pdf import PdfIngestionTool
+from src.agents.ingestion.pdf import PdfIngestionTool, load_pdf_bytes
+from src.core.tools.fetch_cache import get_fetch_cache
+from src.agents.ingestion.html_stream import extract_html_text, iter_chunks
+from src.core.config import HTML_PARSER
 
-def UrlIngestionTool(url, timeout=15, max_bytes=10*1024*1024, allowlist=None):
+_NOISE_TAGS = ["script", "style", "nav", "footer", "header", "aside", "form", "svg"]
+
+def _bs4_text(content: bytes):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(content.decode(errors="ignore"), "html.parser")
+    
+    # Remove noise
+    for t in soup(_NOISE_TAGS):
+        t.decompose()
+    
+    # Extract text
+    return soup.get_text("\n")
+
+def _html_to_text(content: bytes, parser=None, max_length=200000):
+    parser = parser or HTML_PARSER
+    if parser == "bs4":
+        raw = _bs4_text(content)
+    else:
+        # Single pass: noise subtrees are skipped while parsing and parsing
+        # stops once the output budget is met
+        raw = extract_html_text(iter_chunks(content), _NOISE_TAGS, max_length=max_length, max_lines=5000, backend=parser)
+    
+    # Post-process (NFKC, line cap and whitespace in one pass)
+    return normalize_text(html.unescape(raw), max_lines=5000, max_length=max_length)
+
+def UrlIngestionTool(url, timeout=15, max_bytes=10*1024*1024, allowlist=None, session=None):
     try:
         import requests
         from bs4 import BeautifulSoup
@@ -22,64 +47,41 @@ def UrlIngestionTool(url, timeout=15, max_bytes=10*1024*1024, allowlist=None):
     try:
         debug(f"Fetching URL: {url}", tag="url")
         
-        # 1. Initial Request (Stream=True to check headers first)
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        resp = requests.get(url, headers=headers, timeout=timeout, stream=True)
+        # 1. Fetch (served from / revalidated against the local HTTP cache)
+        cache = get_fetch_cache()
+        resp = cache.get(url, session=session, timeout=timeout, max_bytes=max_bytes)
         
-        if resp.status_code >= 400:
-            raise RuntimeError(f"HTTP {resp.status_code}")
+        if resp["status"] >= 400:
+            raise RuntimeError(f"HTTP {resp['status']}")
 
         # 2. Check Content-Type (The Critical Fix)
-        content_type = resp.headers.get("Content-Type", "").lower()
-        
         # --- CASE A: It's actually a PDF ---
-        if "application/pdf" in content_type:
+        if "application/pdf" in resp["content_type"]:
             debug("Detected PDF Content-Type. Switching to PDF Tool.", tag="url")
-            
-            # Save stream to temp file
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-                downloaded_bytes = 0
-                for chunk in resp.iter_content(chunk_size=8192):
-                    tmp.write(chunk)
-                    downloaded_bytes += len(chunk)
-                    if downloaded_bytes > max_bytes:
-                        tmp.close()
-                        os.remove(tmp.name)
-                        raise RuntimeError("PDF too large")
-                temp_path = tmp.name
-            
-            try:
-                # Delegate to the PDF logic
-                pdf_loader = PdfIngestionTool()
-                return pdf_loader.load_pdf(temp_path)
-            finally:
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
+            return cache.text(resp, "pdf", load_pdf_bytes, NormalizedText)
 
         # --- CASE B: Standard HTML ---
-        # Verify size limit for HTML
-        content = b""
-        for chunk in resp.iter_content(8192):
-            content += chunk
-            if len(content) > max_bytes: raise RuntimeError("HTML too large")
-        
-        soup = BeautifulSoup(content.decode(errors="ignore"), "html.parser")
-        
-        # Remove noise
-        for t in soup(["script", "style", "nav", "footer", "header", "aside", "form", "svg"]):
-            t.decompose()
-        
-        # Extract text
-        raw = soup.get_text("\n")
-        raw = unicodedata.normalize("NFKC", html.unescape(raw))
-        
-        # Post-process
-        safe = sanitizer(raw, max_lines=5000)
-        return text_preprocessor(safe, max_length=200000)
+        return cache.text(resp, "html", _html_to_text, NormalizedText)
 
     except Exception as e:
         capture_and_log_exception({"where": "url_ingest", "url": url, "error": str(e)})
         # Return clean error string rather than crashing, so pipeline can handle it
-        return ""
\ No newline at end of file
+        return ""
+
+async def UrlIngestionToolAsync(url, timeout=15, max_bytes=10*1024*1024):
+    """Non-blocking UrlIngestionTool: async fetch, parsing offloaded to a worker thread."""
+    try:
+        debug(f"Fetching URL (async): {url}", tag="url")
+        cache = get_fetch_cache()
+        resp = await cache.get_async(url, timeout=timeout, max_bytes=max_bytes)
+        if resp["status"] >= 400:
+            raise RuntimeError(f"HTTP {resp['status']}")
+
+        if "application/pdf" in resp["content_type"]:
+            debug("Detected PDF Content-Type. Switching to PDF Tool.", tag="url")
+            return await asyncio.to_thread(cache.text, resp, "pdf", load_pdf_bytes, NormalizedText)
+        return await asyncio.to_thread(cache.text, resp, "html", _html_to_text, NormalizedText)
+
+    except Exception as e:
+        capture_and_log_exception({"where": "url_ingest_async", "url": url, "error": str(e)})
+        return ""
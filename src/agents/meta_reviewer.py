@@ -1,14 +1,16 @@
 import json
 from src.core.observability.helpers import agent_start, agent_end
 from src.core.observability.error_reporter import capture_and_log_exception
+from src.core.tools.llm_wrapper import acall_llm
 
 def MetaReviewerAgentFactory(context_engine, llm_callable=None):
     class MetaAgent:
-        def review(self, struct, claims, evidence, reliability, session_id=None):
-            agent_start(session_id, "MetaReviewer")
-            
-            # Defaults
-            final = {
+        agent_name = "MetaReviewer"
+        # Set once the LLM failed and the default summary was kept
+        degraded = False
+
+        def _default(self, struct, claims, evidence, reliability):
+            return {
                 "executive_summary": "Automated Review: Analysis complete.",
                 "structured_data": struct,
                 "claims": claims,
@@ -20,24 +22,51 @@ def MetaReviewerAgentFactory(context_engine, llm_callable=None):
                 "recommendation": "Review manually."
             }
 
+        def _llm_prompt(self, claims, reliability):
+            return (
+                "Generate a scientific meta-review JSON.\n"
+                "Fields: executive_summary, limitations, recommendation.\n"
+                "No Markdown.\n\n"
+                f"Score: {reliability.get('score')}\n"
+                f"Claims: {json.dumps(claims[:5])}\n"
+            )
+
+        def _apply_llm(self, final, response):
+            clean_json = response.replace("```json", "").replace("```", "").strip()
+            parsed = json.loads(clean_json)
+            
+            final["executive_summary"] = parsed.get("executive_summary", final["executive_summary"])
+            final["limitations"] = parsed.get("limitations", final["limitations"])
+            final["recommendation"] = parsed.get("recommendation", final["recommendation"])
+
+        def review(self, struct, claims, evidence, reliability, session_id=None):
+            agent_start(session_id, "MetaReviewer")
+            
+            # Defaults
+            final = self._default(struct, claims, evidence, reliability)
+
+            if llm_callable:
+                try:
+                    response = llm_callable(self._llm_prompt(claims, reliability), agent_name="MetaReviewer")
+                    self._apply_llm(final, response)
+                except Exception as e:
+                    capture_and_log_exception({"where": "MetaReviewer_LLM", "error": str(e)})
+                    self.degraded = True
+
+            agent_end(session_id, "MetaReviewer")
+            return final
+
+        async def review_async(self, struct, claims, evidence, reliability, session_id=None):
+            agent_start(session_id, "MetaReviewer")
+            final = self._default(struct, claims, evidence, reliability)
+
             if llm_callable:
                 try:
-                    prompt = (
-                        "Generate a scientific meta-review JSON.\n"
-                        "Fields: executive_summary, limitations, recommendation.\n"
-                        "No Markdown.\n\n"
-                        f"Score: {reliability.get('score')}\n"
-                        f"Claims: {json.dumps(claims[:5])}\n"
-                    )
-                    response = llm_callable(prompt, agent_name="MetaReviewer")
-                    clean_json = response.replace("```json", "").replace("```", "").strip()
-                    parsed = json.loads(clean_json)
-                    
-                    final["executive_summary"] = parsed.get("executive_summary", final["executive_summary"])
-                    final["limitations"] = parsed.get("limitations", final["limitations"])
-                    final["recommendation"] = parsed.get("recommendation", final["recommendation"])
+                    response = await acall_llm(llm_callable, self._llm_prompt(claims, reliability), agent_name="MetaReviewer")
+                    self._apply_llm(final, response)
                 except Exception as e:
                     capture_and_log_exception({"where": "MetaReviewer_LLM", "error": str(e)})
+                    self.degraded = True
 
             agent_end(session_id, "MetaReviewer")
             return final
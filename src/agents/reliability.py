@@ -4,11 +4,18 @@
 
 import time
 import json
+import asyncio
 from src.core.observability.helpers import agent_start, agent_end
 from src.core.observability.error_reporter import capture_and_log_exception
 from src.core.tools.sanitizer import sanitizer
 from src.core.tools.text_prep import text_preprocessor
+from src.core.tools.llm_wrapper import acall_llm
 from src.core.deps.checker import check_agent_dependencies
+from src.core.context.compactor import ContextCompactor
+from src.core.config import RELIABILITY_PROMPT_TOKENS
+
+# Passages that bear on reliability (design, sample, statistics, limitations)
+_RELIABILITY_QUERY = "method methods randomized controlled trial sample participants control replicated statistical significant confidence limitation limitations bias"
 
 def ReliabilityScoringAgentFactory(context_engine, llm_callable=None):
 
@@ -17,6 +24,9 @@ def ReliabilityScoringAgentFactory(context_engine, llm_callable=None):
             self.context_engine = context_engine
             self.llm = llm_callable
             self.agent_name = "ReliabilityScoringAgent"
+            self.compactor = ContextCompactor(RELIABILITY_PROMPT_TOKENS)
+            # Set once the heuristic score stood in for the LLM's, or scoring failed
+            self.degraded = False
             
             # Dependency checks (non-fatal)
             try:
@@ -86,60 +96,102 @@ def ReliabilityScoringAgentFactory(context_engine, llm_callable=None):
         # ------------------------------------------------------
         # LLM scoring (optional, safe)
         # ------------------------------------------------------
+        def _llm_prompt(self, structured, evidence_links):
+            # Compact inputs for prompt: sections share a token budget, most relevant passages first
+            short_struct = {"title": (structured.get("title") or "")[:300]}
+            short_struct.update(self.compactor.compact_fields({
+                "abstract": structured.get("abstract") or "",
+                "methods": structured.get("methods") or "",
+                "results": structured.get("results") or "",
+            }, _RELIABILITY_QUERY))
+
+            # Simplified evidence list
+            compressed_evidence = []
+            for entry in (evidence_links or []):
+                compressed_evidence.append({
+                    "claim": (entry.get("claim") or "")[:200],
+                    "evidence_count": len(entry.get("evidence", [])),
+                    "top_classification": entry.get("evidence", [{}])[0].get("classification", "none") if entry.get("evidence") else "none"
+                })
+
+            prompt_raw = (
+                "Evaluate the reliability of the scientific document. "
+                "Provide a score (0–100) and a short explanation. "
+                "Return STRICT JSON ONLY:\n\n"
+                "{\"score\": NUMBER, \"explanation\": \"text\"}\n\n"
+                "Do not use Markdown formatting.\n\n"
+                f"Structured summary: {json.dumps(short_struct)}\n"
+                f"Claims alignment data: {json.dumps(compressed_evidence)}\n"
+            )
+
+            return text_preprocessor(sanitizer(prompt_raw, max_lines=200))
+
+        def _parse_llm(self, out):
+            # Clean Gemini markdown if present
+            clean_json = out.replace("```json", "").replace("```", "").strip()
+            parsed = json.loads(clean_json)
+
+            val = int(parsed.get("score", 0))
+            val = max(0, min(100, val))
+
+            return val, parsed.get("explanation", "")
+
         def _llm_score(self, structured, claims, evidence_links):
             if not self.llm:
                 return None, None
 
             try:
-                # Compact inputs for prompt
-                short_struct = {
-                    "title": structured.get("title", "")[:300],
-                    "abstract": structured.get("abstract", "")[:800],
-                    "methods": structured.get("methods", "")[:800],
-                    "results": structured.get("results", "")[:800],
-                }
-
-                # Simplified evidence list
-                compressed_evidence = []
-                for entry in (evidence_links or []):
-                    compressed_evidence.append({
-                        "claim": (entry.get("claim") or "")[:200],
-                        "evidence_count": len(entry.get("evidence", [])),
-                        "top_classification": entry.get("evidence", [{}])[0].get("classification", "none") if entry.get("evidence") else "none"
-                    })
-
-                prompt_raw = (
-                    "Evaluate the reliability of the scientific document. "
-                    "Provide a score (0–100) and a short explanation. "
-                    "Return STRICT JSON ONLY:\n\n"
-                    "{\"score\": NUMBER, \"explanation\": \"text\"}\n\n"
-                    "Do not use Markdown formatting.\n\n"
-                    f"Structured summary: {json.dumps(short_struct)}\n"
-                    f"Claims alignment data: {json.dumps(compressed_evidence)}\n"
-                )
-
-                safe_prompt = text_preprocessor(sanitizer(prompt_raw, max_lines=200))
-
                 out = self.llm(
-                    safe_prompt,
+                    self._llm_prompt(structured, evidence_links),
                     agent_name=self.agent_name,
                     max_output_tokens=350,
                     temperature=0.0
                 )
-                
-                # Clean Gemini markdown if present
-                clean_json = out.replace("```json", "").replace("```", "").strip()
-                parsed = json.loads(clean_json)
+                return self._parse_llm(out)
+
+            except Exception as e:
+                capture_and_log_exception({"where": "7.4._llm_score", "error": str(e)})
+                return None, None
 
-                val = int(parsed.get("score", 0))
-                val = max(0, min(100, val))
+        async def _llm_score_async(self, structured, claims, evidence_links):
+            if not self.llm:
+                return None, None
 
-                return val, parsed.get("explanation", "")
+            try:
+                prompt = await asyncio.to_thread(self._llm_prompt, structured, evidence_links)
+                out = await acall_llm(
+                    self.llm,
+                    prompt,
+                    agent_name=self.agent_name,
+                    max_output_tokens=350,
+                    temperature=0.0
+                )
+                return self._parse_llm(out)
 
             except Exception as e:
                 capture_and_log_exception({"where": "7.4._llm_score", "error": str(e)})
                 return None, None
 
+        def _sanitize_struct(self, structured_doc):
+            return {
+                k: text_preprocessor(sanitizer(v), normalize_whitespace=True) if isinstance(v, str) else v
+                for k, v in (structured_doc or {}).items()
+            }
+
+        def _finish(self, sid, safe_struct, claims, evidence_links, score_val, explanation):
+            # Fallback heuristic (Use YOUR logic from Block 7.4)
+            if score_val is None:
+                self.degraded = bool(self.llm)
+                score_val, explanation = self._heuristic_score(safe_struct, claims, evidence_links)
+
+            result = {
+                "score": int(score_val),
+                "explanation": explanation
+            }
+
+            agent_end(sid, self.agent_name, {"score": result["score"]})
+            return result
+
         # ------------------------------------------------------
         # MAIN: score()
         # ------------------------------------------------------
@@ -149,30 +201,37 @@ def ReliabilityScoringAgentFactory(context_engine, llm_callable=None):
 
             try:
                 # sanitize fields
-                safe_struct = {
-                    k: text_preprocessor(sanitizer(v), normalize_whitespace=True) if isinstance(v, str) else v
-                    for k, v in (structured_doc or {}).items()
-                }
+                safe_struct = self._sanitize_struct(structured_doc)
 
                 # LLM attempt
                 score_val, explanation = None, None
                 if self.llm:
                     score_val, explanation = self._llm_score(safe_struct, claims, evidence_links)
 
-                # Fallback heuristic (Use YOUR logic from Block 7.4)
-                if score_val is None:
-                    score_val, explanation = self._heuristic_score(safe_struct, claims, evidence_links)
+                return self._finish(sid, safe_struct, claims, evidence_links, score_val, explanation)
+
+            except Exception as e:
+                err_id = capture_and_log_exception({"where": "7.4.score.top", "error": str(e)})
+                self.degraded = True
+                return {"score": 0, "explanation": f"Error: {str(e)}"}
 
-                result = {
-                    "score": int(score_val),
-                    "explanation": explanation
-                }
+        async def score_async(self, structured_doc, claims, evidence_links, session_id=None):
+            sid = session_id or "unknown-session"
+            agent_start(sid, self.agent_name, {"claims": len(claims or [])})
+
+            try:
+                # Sanitizing covers full_text (up to 200k chars): worker thread
+                safe_struct = await asyncio.to_thread(self._sanitize_struct, structured_doc)
+
+                score_val, explanation = None, None
+                if self.llm:
+                    score_val, explanation = await self._llm_score_async(safe_struct, claims, evidence_links)
 
-                agent_end(sid, self.agent_name, {"score": result["score"]})
-                return result
+                return self._finish(sid, safe_struct, claims, evidence_links, score_val, explanation)
 
             except Exception as e:
                 err_id = capture_and_log_exception({"where": "7.4.score.top", "error": str(e)})
+                self.degraded = True
                 return {"score": 0, "explanation": f"Error: {str(e)}"}
 
     return ReliabilityScoringAgent(context_engine, llm_callable)
\ No newline at end of file
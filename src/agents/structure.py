@@ -1,52 +1,58 @@
 import json
 import re
+import asyncio
 from src.core.observability.helpers import agent_start, agent_end
 from src.core.observability.error_reporter import capture_and_log_exception
 from src.core.tools.sanitizer import sanitizer
+from src.core.tools.llm_wrapper import acall_llm
+from src.core.context.compactor import ContextCompactor
+from src.core.config import STRUCTURE_PROMPT_TOKENS
+
+# What the structure prompt needs to see besides the opening (title, abstract)
+_SECTION_QUERY = "abstract introduction method methods materials participants design results findings discussion conclusion conclusions"
 
 def ScientificStructureExtractorFactory(context_engine, llm_callable=None, **kwargs):
+    compactor = ContextCompactor(STRUCTURE_PROMPT_TOKENS)
+
     class Extractor:
-        def extract(self, text, session_id=None):
-            agent_start(session_id, "StructureExtractor")
-            
-            # Default Output
-            out = {
+        agent_name = "StructureExtractor"
+        # Set once the LLM failed and the regex split was used instead
+        degraded = False
+
+        def _default(self, text):
+            return {
                 "title": "Unknown Title",
                 "abstract": "",
-                "methods": "", 
-                "results": "", 
+                "methods": "",
+                "results": "",
                 "conclusion": "",
                 # ADDED: Pass full text so downstream agents don't starve
-                "full_text": text or "" 
+                "full_text": text or ""
             }
 
-            # 1. Try LLM Extraction
-            if llm_callable:
-                try:
-                    prompt = (
-                        "Extract structure from this text. Return STRICT JSON.\n"
-                        "Keys: title, abstract, methods, results, conclusion.\n"
-                        "If a section is missing, leave it empty strings.\n\n"
-                        f"Text: {text[:15000]}"
-                    )
-                    response = llm_callable(prompt, agent_name="Structure")
-                    clean_json = response.replace("```json", "").replace("```", "").strip()
-                    data = json.loads(clean_json)
-                    out.update(data) # Merge LLM results
-                    out["full_text"] = text # Ensure full_text persists
-                    agent_end(session_id, "StructureExtractor")
-                    return out
-                except Exception as e:
-                    capture_and_log_exception({"where": "Structure_LLM", "error": str(e)})
+        def _llm_prompt(self, text):
+            return (
+                "Extract structure from this text. Return STRICT JSON.\n"
+                "Keys: title, abstract, methods, results, conclusion.\n"
+                "If a section is missing, leave it empty strings.\n\n"
+                f"Text: {compactor.compact_text(text or '', _SECTION_QUERY)}"
+            )
 
-            # 2. Heuristic Fallback
+        def _apply_llm(self, out, response, text):
+            clean_json = response.replace("```json", "").replace("```", "").strip()
+            data = json.loads(clean_json)
+            out.update(data) # Merge LLM results
+            out["full_text"] = text # Ensure full_text persists
+            return out
+
+        def _heuristic(self, out, text):
             safe = sanitizer(text)
             lines = safe.splitlines()
             if lines: out["title"] = lines[0][:200]
 
             # Regex splitting
             parts = re.split(r'(?mi)\n+(abstract|methods?|results?|conclusion|discussion)\b', "\n" + safe)
-            
+
             if len(parts) > 1:
                 it = iter(parts)
                 next(it)
@@ -58,9 +64,47 @@ def ScientificStructureExtractorFactory(context_engine, llm_callable=None, **kwa
                     elif "concl" in key or "discuss" in key: out["conclusion"] += content
             else:
                 # Fallback: If no headers found, put everything in abstract so it isn't lost
-                out["abstract"] = safe[:5000] 
+                out["abstract"] = safe[:5000]
+            return out
+
+        def extract(self, text, session_id=None):
+            agent_start(session_id, "StructureExtractor")
+            out = self._default(text)
+
+            # 1. Try LLM Extraction
+            if llm_callable:
+                try:
+                    response = llm_callable(self._llm_prompt(text), agent_name="Structure")
+                    out = self._apply_llm(out, response, text)
+                    agent_end(session_id, "StructureExtractor")
+                    return out
+                except Exception as e:
+                    capture_and_log_exception({"where": "Structure_LLM", "error": str(e)})
+                    self.degraded = True
+
+            # 2. Heuristic Fallback
+            out = self._heuristic(out, text)
+            agent_end(session_id, "StructureExtractor")
+            return out
+
+        async def extract_async(self, text, session_id=None):
+            agent_start(session_id, "StructureExtractor")
+            out = self._default(text)
+
+            if llm_callable:
+                try:
+                    # Compaction and the regex fallback scan up to the whole text: worker thread
+                    prompt = await asyncio.to_thread(self._llm_prompt, text)
+                    response = await acall_llm(llm_callable, prompt, agent_name="Structure")
+                    out = self._apply_llm(out, response, text)
+                    agent_end(session_id, "StructureExtractor")
+                    return out
+                except Exception as e:
+                    capture_and_log_exception({"where": "Structure_LLM", "error": str(e)})
+                    self.degraded = True
 
+            out = await asyncio.to_thread(self._heuristic, out, text)
             agent_end(session_id, "StructureExtractor")
             return out
 
-    return Extractor()
\ No newline at end of file
+    return Extractor()
@@ -10,4 +10,108 @@ def is_local_mode() -> bool:
     return RUNTIME_MODE == "local"
 
 def is_prod_mode() -> bool:
-    return RUNTIME_MODE == "prod"
\ No newline at end of file
+    return RUNTIME_MODE == "prod"
+
+# Embedding model loading: "lazy" loads on first use, "eager" loads at startup.
+EMBEDDING_LOAD_MODE = os.environ.get("HYPOTHESI_EMBEDDING_LOAD", "lazy").strip().lower()
+
+def is_eager_embedding_load() -> bool:
+    return EMBEDDING_LOAD_MODE == "eager"
+
+# A failed model load is retried after this many seconds (transient download errors)
+MODEL_RETRY_S = float(os.environ.get("HYPOTHESI_MODEL_RETRY_S", "300"))
+
+# Persistent embedding cache (memory-mapped .npy files with an LRU byte budget)
+EMBEDDING_CACHE_DIR = os.environ.get(
+    "HYPOTHESI_EMBEDDING_CACHE_DIR", os.path.join("/tmp", "hypothesi_cache", "embeddings")
+)
+EMBEDDING_CACHE_MAX_MB = int(os.environ.get("HYPOTHESI_EMBEDDING_CACHE_MB", "256"))
+
+# Shared agent thread pool (bounded LLM fan-out)
+AGENT_MAX_WORKERS = int(os.environ.get("HYPOTHESI_AGENT_WORKERS", "16"))
+LLM_CONCURRENCY = int(os.environ.get("HYPOTHESI_LLM_CONCURRENCY", "8"))
+
+# LLM response cache: in-memory LRU plus optional SQLite tier ("" disables disk)
+LLM_CACHE_ITEMS = int(os.environ.get("HYPOTHESI_LLM_CACHE_ITEMS", "1024"))
+LLM_CACHE_DB = os.environ.get("HYPOTHESI_LLM_CACHE_DB", os.path.join("/tmp", "hypothesi_cache", "llm.sqlite"))
+LLM_CACHE_TTL_S = int(os.environ.get("HYPOTHESI_LLM_CACHE_TTL_S", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ROWS = int(os.environ.get("HYPOTHESI_LLM_CACHE_MAX_ROWS", "20000"))
+
+# Heuristic features for chunks retrieved without being indexed (in-memory LRU)
+FEATURE_CACHE_ITEMS = int(os.environ.get("HYPOTHESI_FEATURE_CACHE_ITEMS", "4096"))
+
+# Background review jobs: "memory" or "sqlite" queue backend
+JOB_BACKEND = os.environ.get("HYPOTHESI_JOB_BACKEND", "memory").strip().lower()
+JOB_DB = os.environ.get("HYPOTHESI_JOB_DB", os.path.join("/tmp", "hypothesi_cache", "jobs.sqlite"))
+JOB_WORKERS = int(os.environ.get("HYPOTHESI_JOB_WORKERS", "2"))
+# A 'running' job whose worker has not renewed its lease (heartbeat, every third
+# of this) for this long is taken to belong to a dead worker and re-queued
+JOB_LEASE_S = float(os.environ.get("HYPOTHESI_JOB_LEASE_S", "900"))
+# In-memory store: finished jobs are kept this long, and at most this many
+JOB_RETAIN_S = float(os.environ.get("HYPOTHESI_JOB_RETAIN_S", "3600"))
+JOB_MAX_FINISHED = int(os.environ.get("HYPOTHESI_JOB_MAX_FINISHED", "1000"))
+
+# Batch reviews: items analysed concurrently and the maximum sources per request
+BATCH_PARALLELISM = int(os.environ.get("HYPOTHESI_BATCH_PARALLELISM", "4"))
+BATCH_MAX_ITEMS = int(os.environ.get("HYPOTHESI_BATCH_MAX_ITEMS", "50"))
+
+# Threads shared by synchronous pipeline stage graphs (independent stages overlap)
+PIPELINE_STAGE_WORKERS = int(os.environ.get("HYPOTHESI_STAGE_WORKERS", "8"))
+
+# Whole-review cache (same tiers as the LLM cache). Bump PIPELINE_VERSION when
+# agent logic changes so stale reviews stop matching.
+PIPELINE_VERSION = os.environ.get("HYPOTHESI_PIPELINE_VERSION", "1")
+REVIEW_CACHE_ITEMS = int(os.environ.get("HYPOTHESI_REVIEW_CACHE_ITEMS", "256"))
+REVIEW_CACHE_DB = os.environ.get("HYPOTHESI_REVIEW_CACHE_DB", os.path.join("/tmp", "hypothesi_cache", "reviews.sqlite"))
+REVIEW_CACHE_TTL_S = int(os.environ.get("HYPOTHESI_REVIEW_CACHE_TTL_S", str(7 * 24 * 3600)))
+REVIEW_CACHE_MAX_ROWS = int(os.environ.get("HYPOTHESI_REVIEW_CACHE_MAX_ROWS", "5000"))
+
+# HTTP fetch cache for ingestion ("" disables). Entries younger than
+# HTTP_CACHE_FRESH_S (or the response's Cache-Control max-age) are served
+# without revalidating; no-store responses are not cached.
+HTTP_CACHE_DIR = os.environ.get("HYPOTHESI_HTTP_CACHE_DIR", os.path.join("/tmp", "hypothesi_cache", "http"))
+HTTP_CACHE_FRESH_S = int(os.environ.get("HYPOTHESI_HTTP_CACHE_FRESH_S", "3600"))
+HTTP_CACHE_MAX_MB = int(os.environ.get("HYPOTHESI_HTTP_CACHE_MB", "512"))
+
+# Shared HTTP client: timeouts, retry policy for transient failures and pool sizes
+HTTP_CONNECT_TIMEOUT_S = float(os.environ.get("HYPOTHESI_HTTP_CONNECT_TIMEOUT_S", "5"))
+HTTP_READ_TIMEOUT_S = float(os.environ.get("HYPOTHESI_HTTP_READ_TIMEOUT_S", "15"))
+HTTP_RETRIES = int(os.environ.get("HYPOTHESI_HTTP_RETRIES", "3"))
+HTTP_BACKOFF_S = float(os.environ.get("HYPOTHESI_HTTP_BACKOFF_S", "0.5"))
+HTTP_BACKOFF_MAX_S = float(os.environ.get("HYPOTHESI_HTTP_BACKOFF_MAX_S", "8"))
+HTTP_POOL_PER_HOST = int(os.environ.get("HYPOTHESI_HTTP_POOL_PER_HOST", "10"))
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HYPOTHESI_HTTP_MAX_CONNECTIONS", "100"))
+
+# PDF extraction: when the output budget still needs PDF_PARALLEL_MIN_PAGES+
+# pages after the first batch, the rest is split into PDF_PAGE_BATCH-page
+# batches across a shared pool of PDF_WORKERS processes (1 disables)
+PDF_PARALLEL_MIN_PAGES = int(os.environ.get("HYPOTHESI_PDF_PARALLEL_MIN_PAGES", "64"))
+PDF_WORKERS = int(os.environ.get("HYPOTHESI_PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PAGE_BATCH = int(os.environ.get("HYPOTHESI_PDF_PAGE_BATCH", "8"))
+
+# HTML text extraction backend: "stream" (incremental html.parser), "lxml"
+# (incremental libxml2, when installed) or "bs4" (full BeautifulSoup parse)
+HTML_PARSER = os.environ.get("HYPOTHESI_HTML_PARSER", "stream").strip().lower()
+
+# arXiv ingestion: IDs resolved per id_list API call, whether full-text PDFs are
+# fetched by default (HYPOTHESI_ARXIV_FULL_TEXT=1) and concurrent PDF downloads.
+# Records are cached per versioned ID ("" keeps them in memory only).
+ARXIV_BATCH_SIZE = int(os.environ.get("HYPOTHESI_ARXIV_BATCH_SIZE", "100"))
+ARXIV_FULL_TEXT = os.environ.get("HYPOTHESI_ARXIV_FULL_TEXT", "0").strip().lower() in ("1", "true", "yes")
+ARXIV_PDF_WORKERS = int(os.environ.get("HYPOTHESI_ARXIV_PDF_WORKERS", "4"))
+ARXIV_CACHE_DB = os.environ.get("HYPOTHESI_ARXIV_CACHE_DB", os.path.join("/tmp", "hypothesi_cache", "arxiv.sqlite"))
+
+# Streaming ingestion (HYPOTHESI_STREAM_INGEST=1 or stream=True per review): the
+# whole document is chunked and indexed incrementally instead of being cut at
+# 200k chars. Structure and claims still read its first STREAM_HEAD_CHARS chars;
+# STREAM_MAX_CHARS is a hard safety limit on what is indexed.
+STREAM_INGEST = os.environ.get("HYPOTHESI_STREAM_INGEST", "0").strip().lower() in ("1", "true", "yes")
+STREAM_HEAD_CHARS = int(os.environ.get("HYPOTHESI_STREAM_HEAD_CHARS", "200000"))
+STREAM_MAX_CHARS = int(os.environ.get("HYPOTHESI_STREAM_MAX_CHARS", "50000000"))
+
+# LLM prompt token budgets (ContextCompactor): document text for structure
+# extraction, section data for claim extraction and the reliability summary.
+# Half of a budget is reserved for the opening of each section, split evenly.
+STRUCTURE_PROMPT_TOKENS = int(os.environ.get("HYPOTHESI_STRUCTURE_PROMPT_TOKENS", "3000"))
+CLAIMS_PROMPT_TOKENS = int(os.environ.get("HYPOTHESI_CLAIMS_PROMPT_TOKENS", "3000"))
+RELIABILITY_PROMPT_TOKENS = int(os.environ.get("HYPOTHESI_RELIABILITY_PROMPT_TOKENS", "400"))
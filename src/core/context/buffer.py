@@ -0,0 +1,56 @@
+from array import array
+from src.core.tools.normalize import NormalizedText, normalized_part
+
+class ChunkStore:
+    """
+    Chunks as (document, start, end) spans over document texts that are held
+    once; a chunk's string is only built when it is read. Indexes like the
+    list of chunk strings it replaces (chunk ids are positions).
+    """
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._docs = []  # document texts
+        self._normalized = []  # per document: are its chunks NormalizedText
+        self._doc = array("I")  # chunk id -> document index
+        self._start = array("Q")
+        self._end = array("Q")
+
+    def add_spans(self, text, spans, normalized=None):
+        """Appends chunks given as (start, end) offsets into text."""
+        self._docs.append(text)
+        self._normalized.append(isinstance(text, NormalizedText) if normalized is None else normalized)
+        d = len(self._docs) - 1
+        for start, end in spans:
+            self._doc.append(d)
+            self._start.append(start)
+            self._end.append(end)
+
+    def add_texts(self, chunks):
+        """Appends chunk strings (stored back to back in one buffer). Returns (buffer, spans)."""
+        chunks = list(chunks)
+        spans, pos = [], 0
+        for c in chunks:
+            spans.append((pos, pos + len(c)))
+            pos += len(c)
+        text = "".join(chunks)
+        self.add_spans(text, spans, normalized=bool(chunks) and all(isinstance(c, NormalizedText) for c in chunks))
+        return text, spans
+
+    def span(self, i):
+        """(document text, start, end) of chunk i."""
+        return self._docs[self._doc[i]], self._start[i], self._end[i]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        d = self._doc[i]
+        chunk = self._docs[d][self._start[i]:self._end[i]]
+        return normalized_part(chunk) if self._normalized[d] else chunk
+
+    def __len__(self):
+        return len(self._doc)
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
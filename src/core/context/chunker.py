@@ -1,12 +1,46 @@
-from typing import List
+from typing import Iterable, Iterator, List, Tuple
 from src.core.context.config import ContextConfig
+from src.core.tools.normalize import NormalizedText, normalized_part
 
-def chunk_text(text: str, config: ContextConfig) -> List[str]:
+def chunk_spans(text: str, config: ContextConfig) -> List[Tuple[int, int]]:
+    """(start, end) offsets of the stripped, overlapping windows chunk_text() returns."""
     if not text: return []
     size, overlap = config.chunk_size, config.chunk_overlap
-    chunks, i, n = [], 0, len(text)
+    spans, i, n = [], 0, len(text)
     while i < n:
         end = min(i + size, n)
-        chunks.append(text[i:end].strip())
+        window = text[i:end]
+        lead = len(window) - len(window.lstrip())
+        spans.append((i + lead, max(i + lead, i + len(window.rstrip()))))
         i += size - overlap
-    return chunks
\ No newline at end of file
+    return spans
+
+def chunk_text(text: str, config: ContextConfig) -> Iterator[str]:
+    # Chunks of normalized text stay normalized, so evidence linking skips re-cleaning them
+    normalized = isinstance(text, NormalizedText)
+    for start, end in chunk_spans(text, config):
+        yield normalized_part(text[start:end]) if normalized else text[start:end]
+
+def iter_chunks(pieces: Iterable[str], config: ContextConfig) -> Iterator[str]:
+    """
+    chunk_text() over " ".join(pieces) (e.g. from iter_normalized()) without
+    building the joined text: only the current window and one piece are held.
+    """
+    size, step = config.chunk_size, config.chunk_size - config.chunk_overlap
+    buf, base, i, sep = "", 0, 0, ""  # buf holds the text from offset base on; i is the next window start
+    normalized = True
+    mark = lambda c: normalized_part(c) if normalized else c
+    for piece in pieces:
+        if not piece: continue
+        normalized = normalized and isinstance(piece, NormalizedText)
+        buf += sep + piece
+        sep = " "
+        while base + len(buf) >= i + size:
+            yield mark(buf[i - base:i - base + size].strip())
+            i += step
+        # Drop what no later window can reach
+        if i > base:
+            buf, base = buf[i - base:], i
+    while i < base + len(buf):
+        yield mark(buf[i - base:].strip())
+        i += step
@@ -1,21 +1,176 @@
-from src.core.context.config import ContextConfig
+import re
+import math
+from src.core.context.lexical import BM25Index
 from src.core.logger import debug
 
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+_GAP = " [...] "
+
+# Model tokens per estimated token, learned from the prompt token counts the
+# LLM reports (calibrate_tokens); 1.0 until the first report
+_ratio = 1.0
+
+def _count(text):
+    return sum(1 + len(p) // 6 for p in _PIECE_RE.findall(text))
+
+def estimate_tokens(text: str) -> int:
+    """
+    Prompt tokens for text: one per word or punctuation mark plus one per 6
+    further chars of long words, scaled to the model's own tokenizer by
+    calibrate_tokens(). No local tokenizer matches Gemini's, so this stays
+    an estimate.
+    """
+    if not text:
+        return 0
+    return math.ceil(_count(text) * _ratio)
+
+def calibrate_tokens(text: str, model_tokens) -> None:
+    """Folds the model's prompt token count for text (usage metadata) into estimate_tokens()."""
+    global _ratio
+    raw = _count(text or "")
+    if raw < 50 or not model_tokens:
+        return
+    # Moving average, clamped so one odd report cannot swing the budgets
+    _ratio = min(2.0, max(0.5, 0.8 * _ratio + 0.2 * model_tokens / raw))
+
+def _fit(piece, tokens):
+    """Longest prefix of piece, cut at a space, within tokens (estimated)."""
+    if estimate_tokens(piece) <= tokens:
+        return piece
+    cuts = [m.start() for m in re.finditer(" ", piece)]
+    lo, hi = 0, len(cuts)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if estimate_tokens(piece[:cuts[mid - 1]]) <= tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return piece[:cuts[lo - 1]] if lo else piece[:max(1, tokens)]
+
+def split_text(text: str, size=600):
+    """Consecutive, non-overlapping pieces of at most ~size chars, cut at spaces."""
+    pieces, i, n = [], 0, len(text or "")
+    while i < n:
+        end = min(i + size, n)
+        if end < n:
+            cut = text.rfind(" ", i + 1, end + 1)
+            if cut > i:
+                end = cut
+        piece = text[i:end].strip()
+        if piece:
+            pieces.append(piece)
+        i = end
+    return pieces
+
 class ContextCompactor:
-    def __init__(self, max_tokens=None):
+    """
+    Packs chunks into a token budget for an LLM prompt. Each chunk's tokens
+    are estimated once; chunks are then taken greedily in order of relevance
+    (pinned chunks, then BM25 matches for the task query, then the rest) as
+    long as they fit, and returned in their original order. Without a query
+    the latest chunks are kept, as before.
+
+    compact_text()/compact_fields() pin the opening of the text (of every
+    field), cut so all pins together take at most half the budget: each
+    field always keeps its start, whatever the rest competes for.
+    """
+    def __init__(self, max_tokens=None, chunk_chars=600):
         self.max_tokens = max_tokens or 6000
+        self.chunk_chars = chunk_chars
 
     def _estimate_tokens(self, text: str):
-        # Rough heuristic: 1 token ~= 4 chars
-        return max(1, int(len(text) / 4))
-
-    def compact(self, chunks):
-        total = sum(self._estimate_tokens(c) for c in chunks)
-        if total <= self.max_tokens:
-            return chunks
-
-        debug("Compacting context to fit token budget...", tag="compactor")
-        out = chunks.copy()
-        while out and sum(self._estimate_tokens(c) for c in out) > self.max_tokens:
-            out.pop(0) # Remove oldest chunks
-        return out
\ No newline at end of file
+        return estimate_tokens(text)
+
+    def rank(self, chunks, query=None, pinned=()):
+        """Chunk positions, most relevant first."""
+        order = [i for i in pinned if 0 <= i < len(chunks)]
+        if query:
+            index = BM25Index()
+            index.add(chunks)
+            order += index.search(query, len(chunks))
+        order += range(len(chunks))
+        return list(dict.fromkeys(order))
+
+    def _select(self, chunks, query=None, pinned=()):
+        """Sorted positions of the chunks that go into the prompt."""
+        costs = [estimate_tokens(c) for c in chunks]
+        if sum(costs) <= self.max_tokens:
+            return list(range(len(chunks)))
+
+        debug(f"Compacting {len(chunks)} chunks to {self.max_tokens} tokens", tag="compactor")
+        budget = self.max_tokens
+        if query is None and not pinned:
+            # Longest suffix that fits
+            keep = len(chunks)
+            while keep and costs[keep - 1] <= budget:
+                keep -= 1
+                budget -= costs[keep]
+            return list(range(keep, len(chunks)))
+
+        keep = []
+        for i in self.rank(chunks, query, pinned):
+            if costs[i] <= budget:
+                keep.append(i)
+                budget -= costs[i]
+        return sorted(keep)
+
+    def compact(self, chunks, query=None, pinned=()):
+        chunks = list(chunks)
+        return [chunks[i] for i in self._select(chunks, query, pinned)]
+
+    def compact_text(self, text, query=None, pin_head=True):
+        """
+        text cut into chunk_chars pieces and compacted (the first piece, e.g.
+        the title, is kept when pin_head); gaps are marked with [...].
+        """
+        if not text or estimate_tokens(text) <= self.max_tokens:
+            return text or ""
+        pieces = self._pieces(text, self.max_tokens // 2 if pin_head else None)
+        return self._join(pieces, self._select(pieces, query, (0,) if pin_head else ()))
+
+    def compact_fields(self, fields, query=None):
+        """
+        compact_text() over several text fields ({name: text}) sharing one
+        budget: all pieces compete on relevance, each non-empty field keeps
+        its opening (an equal share of half the budget).
+        """
+        fields = {k: v if isinstance(v, str) else str(v or "") for k, v in fields.items()}
+        if estimate_tokens(" ".join(fields.values())) <= self.max_tokens:
+            return fields
+        named = [name for name, text in fields.items() if text.strip()]
+        share = self.max_tokens // (2 * max(1, len(named)))
+        pieces, owner, pinned = [], [], []
+        for name in named:
+            pinned.append(len(pieces))
+            for p in self._pieces(fields[name], share):
+                pieces.append(p)
+                owner.append(name)
+
+        chosen = {name: [] for name in fields}
+        for i in self._select(pieces, query, pinned):
+            chosen[owner[i]].append(i)
+        return {name: self._join(pieces, chosen[name]) for name in fields}
+
+    def _pieces(self, text, head_tokens=None):
+        """
+        split_text() pieces, no larger than a head_tokens share (small budgets
+        get finer pieces), with the first cut to fit head_tokens; what is cut
+        off follows as the next piece.
+        """
+        if not head_tokens:
+            return split_text(text, self.chunk_chars)
+        pieces = split_text(text, min(self.chunk_chars, max(80, 4 * head_tokens)))
+        if pieces:
+            head = _fit(pieces[0], head_tokens)
+            rest = pieces[0][len(head):].strip()
+            pieces[:1] = [head, rest] if rest else [head]
+        return pieces
+
+    @staticmethod
+    def _join(pieces, keep):
+        out = []
+        for j, i in enumerate(keep):
+            if j:
+                out.append(" " if i == keep[j - 1] + 1 else _GAP)
+            out.append(pieces[i])
+        return "".join(out)
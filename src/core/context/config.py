@@ -1,9 +1,20 @@
 from src.core.logger import debug
 
 class ContextConfig:
-    def __init__(self, chunk_size=800, chunk_overlap=100, retrieval_k=5):
+    # retrieval_mode: "auto" (dense when an embedding model is available, else BM25;
+    # documents over two_stage_min_chunks use two-stage), "dense", "lexical" (BM25 only,
+    # no embedding at ingest) or "two_stage" (BM25 prefilter of prefilter_k candidates,
+    # embedded lazily and re-ranked densely)
+    # embed_batch_size: chunks per model.encode call, and per index part of a streamed document
+    def __init__(self, chunk_size=800, chunk_overlap=100, retrieval_k=5, embedding_model="all-MiniLM-L6-v2",
+                 retrieval_mode="auto", prefilter_k=20, two_stage_min_chunks=200, embed_batch_size=256):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.retrieval_k = retrieval_k
+        self.embedding_model = embedding_model
+        self.retrieval_mode = retrieval_mode
+        self.prefilter_k = prefilter_k
+        self.two_stage_min_chunks = two_stage_min_chunks
+        self.embed_batch_size = embed_batch_size
     
 debug("ContextConfig loaded", tag="ctx")
\ No newline at end of file
@@ -1,9 +1,12 @@
+import uuid
+from itertools import islice
 from src.core.context.config import ContextConfig
 from src.core.context.session import Session
 from src.core.context.memory import ShortTermMemory
 from src.core.context.provenance import ProvenanceTracker
-from src.core.context.chunker import chunk_text
+from src.core.context.chunker import chunk_spans, iter_chunks
 from src.core.context.retrieval import RetrievalEngine
+from src.core.tools.heuristics import ChunkFeatureIndex
 
 class ContextEngine:
     def __init__(self, user_id="anon", config=None):
@@ -12,13 +15,44 @@ class ContextEngine:
         self.st_memory = ShortTermMemory()
         self.provenance = ProvenanceTracker()
         self.retriever = RetrievalEngine(self.config)
-        self.chunks = []
+        self.features = ChunkFeatureIndex()
 
-    def ingest_text(self, text: str):
-        chunks = chunk_text(text, self.config)
-        self.chunks.extend(chunks)
-        self.retriever.build_index(self.chunks)
-        self.provenance.add({"count": len(chunks)}, source="ingest")
+    def ingest_text(self, text: str, doc_id=None):
+        """Chunks and indexes text as its own document. Returns the doc_id."""
+        doc_id = doc_id or f"doc-{uuid.uuid4().hex[:12]}"
+        # Chunks are spans over text; the document is held once
+        spans = chunk_spans(text, self.config)
+        self.retriever.add_spans(doc_id, text, spans)
+        self.features.add_spans(text, spans)
+        self.provenance.add({"count": len(spans), "doc_id": doc_id}, source="ingest")
+        return doc_id
+
+    def ingest_stream(self, pieces, doc_id=None):
+        """
+        ingest_text() for a document arriving as text pieces (e.g. from
+        iter_normalized()): chunks are cut as pieces arrive and embedded and
+        indexed embed_batch_size at a time, so the whole text is never
+        materialized. Returns the doc_id.
+        """
+        doc_id = doc_id or f"doc-{uuid.uuid4().hex[:12]}"
+        chunks, n = iter_chunks(pieces, self.config), 0
+        for batch in iter(lambda: list(islice(chunks, max(1, self.config.embed_batch_size))), []):
+            text, spans = self.retriever.add_part(doc_id, batch, seen=n)
+            self.features.add_spans(text, spans)
+            n += len(batch)
+        self.provenance.add({"count": n, "doc_id": doc_id, "stream": True}, source="ingest")
+        return doc_id
+
+    @property
+    def chunks(self):
+        """Every indexed chunk, resolved on access."""
+        return self.retriever.chunks
     
-    def retrieve(self, query):
-        return self.retriever.search(query)
\ No newline at end of file
+    def retrieve(self, query, doc_id=None):
+        """Searches a single document, or every ingested document if doc_id is None."""
+        return self.retriever.search(query, doc_id=doc_id)
+
+
+    def retrieve_batch(self, queries, k=None, doc_id=None):
+        """Batched retrieve(): one result list per query."""
+        return self.retriever.search_batch(queries, k=k, doc_id=doc_id)
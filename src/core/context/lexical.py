@@ -0,0 +1,84 @@
+import re
+import math
+import bisect
+from array import array
+from collections import Counter, defaultdict
+
+_TOKEN_RE = re.compile(r"\w+")
+
+def tokenize(text: str):
+    return _TOKEN_RE.findall((text or "").lower())
+
+class BM25Index:
+    """
+    Append-only inverted index with Okapi BM25 scoring.
+    Chunks are identified by their position in the caller's chunk list;
+    postings stay sorted by that id, so a query restricted to a range of
+    ids only touches the matching slice of each posting list.
+    """
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.reset()
+
+    def reset(self):
+        # Packed arrays: a posting costs 8 bytes instead of two list slots and int objects
+        self.postings = defaultdict(lambda: (array("I"), array("I")))  # token -> (chunk_ids, term_freqs)
+        self.doc_lens = array("I")
+        self.total_len = 0
+        self._weights = {}
+        self._dirty = False
+
+    def __len__(self):
+        return len(self.doc_lens)
+
+    def add(self, chunks):
+        """Appends chunks; their ids continue from the current size."""
+        for text in chunks:
+            cid = len(self.doc_lens)
+            toks = tokenize(text)
+            self.doc_lens.append(len(toks))
+            self.total_len += len(toks)
+            for tok, tf in Counter(toks).items():
+                ids, tfs = self.postings[tok]
+                ids.append(cid)
+                tfs.append(tf)
+        self._dirty = True
+
+    def _finalize(self):
+        # BM25 weights depend on N and avgdl, so refresh them once per
+        # batch of additions rather than on every query.
+        n = len(self.doc_lens)
+        avgdl = (self.total_len / n) if n else 0.0
+        k1, b = self.k1, self.b
+        weights = {}
+        for tok, (ids, tfs) in self.postings.items():
+            df = len(ids)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            weights[tok] = array("d", (
+                idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * self.doc_lens[cid] / (avgdl or 1)))
+                for cid, tf in zip(ids, tfs)
+            ))
+        self._weights = weights
+        self._dirty = False
+
+    def search(self, query: str, k: int, ranges=None):
+        """
+        Top-k chunk ids for query, best first. ranges is an optional list
+        of (start, end) id ranges to restrict the search to.
+        """
+        if self._dirty:
+            self._finalize()
+        scores = defaultdict(float)
+        for tok in set(tokenize(query)):
+            if tok not in self.postings:
+                continue
+            ids, _ = self.postings[tok]
+            w = self._weights[tok]
+            spans = ranges or [(0, len(self.doc_lens))]
+            for start, end in spans:
+                lo, hi = bisect.bisect_left(ids, start), bisect.bisect_left(ids, end)
+                for j in range(lo, hi):
+                    scores[ids[j]] += w[j]
+        ranked = sorted(scores.items(), key=lambda x: (-x[1], x[0]))
+        return [cid for cid, _ in ranked[:k]]
@@ -1,45 +1,183 @@
-import re
+import threading
+import numpy as np
 from sklearn.neighbors import NearestNeighbors
 from src.core.logger import debug
 from src.core.context.config import ContextConfig
-
-try:
-    from sentence_transformers import SentenceTransformer
-    _HAS_ST = True
-except ImportError:
-    _HAS_ST = False
+from src.core.tools.model_registry import get_model_registry
+from src.core.tools.embedding_cache import get_embedding_cache
+from src.core.context.lexical import BM25Index
+from src.core.context.buffer import ChunkStore
+from src.core.tools.normalize import NormalizedText, normalized_part
 
 class RetrievalEngine:
+    """
+    Append-only retrieval index partitioned into document namespaces.
+    Each document owns one or more parts: a contiguous range of self.chunks
+    (spans over the document text, resolved on access) with its own k-NN
+    index, so adding a document never re-embeds earlier ones. Streamed
+    documents grow by one part per batch (add_part).
+    A BM25 inverted index over all chunks is maintained alongside for
+    lexical retrieval and for the two-stage prefilter, where large
+    documents are only embedded chunk-by-chunk as queries need them.
+    """
     def __init__(self, config: ContextConfig):
         self.config = config
-        self.chunks = []
-        self.index = None
-        self.model = None
-        if _HAS_ST:
-            try: self.model = SentenceTransformer("all-MiniLM-L6-v2")
-            except: pass
+        self.chunks = ChunkStore()
+        self.documents = {}  # doc_id -> [{"start", "end", "index", "lazy"}] (one per part)
+        # Shared, process-wide instance (loaded once per model name)
+        self.model = get_model_registry().get(config.embedding_model)
+        self.cache = get_embedding_cache()
+        self.lexical = BM25Index()
+        self._lazy_vecs = {}  # chunk id -> embedding, for two-stage documents
+        self._lock = threading.Lock()
 
-    def build_index(self, chunks):
-        self.chunks = chunks
-        if self.model and chunks:
+    def _encode(self, texts):
+        # Only cache misses reach the model
+        return self.cache.encode(self.model, self.config.embedding_model, texts, self.config.embed_batch_size)
+
+    def add_document(self, doc_id, chunks):
+        """Indexes chunks under doc_id. Re-adding an id replaces its namespace."""
+        chunks = list(chunks)
+        self._add(doc_id, len(chunks), lambda: iter(chunks), lambda: self.chunks.add_texts(chunks))
+
+    def add_spans(self, doc_id, text, spans):
+        """add_document() for chunks given as (start, end) offsets into text; only text is kept."""
+        normalized = isinstance(text, NormalizedText)
+        chunks = lambda: ((normalized_part(text[s:e]) if normalized else text[s:e]) for s, e in spans)
+        self._add(doc_id, len(spans), chunks, lambda: self.chunks.add_spans(text, spans))
+
+    def add_part(self, doc_id, chunks, seen=0):
+        """
+        Indexes one batch of a streamed document, seen chunks in so far
+        (seen=0 starts doc_id afresh). In auto mode the document switches to
+        two-stage once it reaches two_stage_min_chunks; parts indexed before
+        that keep their k-NN index. Returns (buffer, spans) the batch is stored as.
+        """
+        chunks = list(chunks)
+        return self._add(doc_id, len(chunks), lambda: iter(chunks), lambda: self.chunks.add_texts(chunks),
+                         seen + len(chunks), append=seen > 0)
+
+    def _add(self, doc_id, n, chunks, store, total=None, append=False):
+        # chunks() yields the chunk strings; they only live while being indexed
+        index = None
+        lazy = self._use_dense() and self._is_two_stage(n if total is None else total)
+        if self._use_dense() and not lazy and n:
             try:
-                embeddings = self.model.encode(chunks)
-                self.index = NearestNeighbors(n_neighbors=self.config.retrieval_k).fit(embeddings)
-            except: pass
+                index = NearestNeighbors(n_neighbors=self.config.retrieval_k).fit(self._encode(list(chunks())))
+            except Exception as e:
+                debug(f"Dense index failed for {doc_id}: {e}", tag="retrieval")
 
-    def search(self, query: str):
-        if not query.strip() or not self.chunks: return []
-        if self.index and self.model:
+        with self._lock:
+            start = len(self.chunks)
+            stored = store()
+            self.lexical.add(chunks())
+            part = {"start": start, "end": len(self.chunks), "index": index, "lazy": lazy}
+            self.documents[doc_id] = self.documents.get(doc_id, []) + [part] if append else [part]
+        return stored
+
+    def build_index(self, chunks):
+        """Legacy full rebuild: replaces everything with a single namespace."""
+        with self._lock:
+            self.chunks.clear()
+            self.documents = {}
+            self.lexical.reset()
+            self._lazy_vecs = {}
+        self.add_document("default", chunks)
+
+    def _use_dense(self):
+        return bool(self.model) and self.config.retrieval_mode != "lexical"
+
+    def _is_two_stage(self, n_chunks):
+        mode = self.config.retrieval_mode
+        return mode == "two_stage" or (mode == "auto" and n_chunks >= self.config.two_stage_min_chunks)
+
+    def _scope(self, doc_id=None):
+        """Parts of each document searched, grouped per document."""
+        if doc_id is None:
+            return [list(parts) for parts in self.documents.values()]
+        return [list(self.documents.get(doc_id, ()))]
+
+    def search(self, query: str, doc_id=None):
+        return self.search_batch([query], doc_id=doc_id)[0]
+
+    def search_batch(self, queries, k=None, doc_id=None):
+        """
+        Answers many queries at once: one encoder forward pass for all
+        queries and one kneighbors call per document. Returns a list of
+        chunk lists aligned with queries.
+        """
+        groups = self._scope(doc_id)
+        docs = [d for parts in groups for d in parts]
+        n_chunks = sum(d["end"] - d["start"] for d in docs)
+        k = k or self.config.retrieval_k
+        results = [[] for _ in queries]
+        live = [i for i, q in enumerate(queries) if q and q.strip()]
+        if not live or not n_chunks: return results
+
+        # Dense k-NN per document (exact, or prefiltered for lazy documents), merged by distance
+        if self._use_dense() and n_chunks >= k and all(d["index"] or d["lazy"] for d in docs):
             try:
-                vec = self.model.encode([query])
-                _, idx = self.index.kneighbors(vec)
-                return [self.chunks[i] for i in idx[0]]
+                live_q = [queries[i] for i in live]
+                vecs = self._encode(live_q)
+                hits = [[] for _ in live]
+                for parts in groups:
+                    # A streamed document's lazy parts share one prefilter, as if indexed whole
+                    lazy = [(d["start"], d["end"]) for d in parts if d["lazy"]]
+                    if lazy:
+                        self._rerank_lazy(lazy, live_q, vecs, hits, k)
+                for d in docs:
+                    if d["lazy"]:
+                        continue
+                    n = min(k, d["end"] - d["start"])
+                    dist, idx = d["index"].kneighbors(vecs, n_neighbors=n)
+                    for row in range(len(live)):
+                        hits[row].extend((float(dd), d["start"] + int(i)) for dd, i in zip(dist[row], idx[row]))
+                for row, qi in enumerate(live):
+                    ranked = sorted(hits[row], key=lambda h: h[0])[:k]
+                    results[qi] = [self.chunks[i] for _, i in ranked]
+                return results
             except: pass
         
-        # Fallback: lexical overlap
-        q_toks = set(re.findall(r"\w+", query.lower()))
-        scores = []
-        for c in self.chunks:
-            c_toks = set(re.findall(r"\w+", c.lower()))
-            scores.append((len(q_toks & c_toks), c))
-        return [s[1] for s in sorted(scores, key=lambda x: x[0], reverse=True)[:self.config.retrieval_k]]
\ No newline at end of file
+        # Lexical: BM25 over the inverted index, touching only matching postings
+        ranges = [(d["start"], d["end"]) for d in docs]
+        with self._lock:
+            for qi in live:
+                results[qi] = [self.chunks[i] for i in self.lexical.search(queries[qi], k, ranges)]
+        return results
+
+    @staticmethod
+    def _top_up(cand, ranges, k):
+        # Like the exact index, every query gets k chunks (or the whole document):
+        # queries with fewer BM25 matches are padded with chunks in document order
+        if len(cand) >= k:
+            return cand
+        seen = set(cand)
+        extra = (i for start, end in ranges for i in range(start, end) if i not in seen)
+        return cand + [i for _, i in zip(range(k - len(cand)), extra)]
+
+    def _rerank_lazy(self, ranges, queries, vecs, hits, k):
+        """
+        Two-stage search within one document's lazy parts (ranges): BM25
+        picks prefilter_k candidates per query across all of them (topped
+        up to k), only candidates not yet embedded are sent to the encoder
+        (one batch, memoized), then candidates are ranked by Euclidean
+        distance like the exact k-NN index.
+        """
+        with self._lock:
+            cands = [self._top_up(self.lexical.search(q, self.config.prefilter_k, ranges), ranges, k)
+                     for q in queries]
+            needed = sorted({i for c in cands for i in c} - self._lazy_vecs.keys())
+            texts = [self.chunks[i] for i in needed]
+        if needed:
+            fresh = self._encode(texts)
+            with self._lock:
+                self._lazy_vecs.update(zip(needed, fresh))
+        with self._lock:
+            rows = [np.vstack([self._lazy_vecs[i] for i in cand]) if cand else None for cand in cands]
+        for row, (cand, mat) in enumerate(zip(cands, rows)):
+            if not cand: continue
+            dist = np.linalg.norm(mat - vecs[row], axis=1)
+            hits[row].extend((float(dd), i) for dd, i in zip(dist, cand))
+
+    def cache_stats(self) -> dict:
+        return self.cache.stats()
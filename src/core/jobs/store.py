@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from typing import Optional
+from collections import OrderedDict
+from src.core.logger import debug
+from src.core.config import JOB_BACKEND, JOB_DB, JOB_LEASE_S, JOB_RETAIN_S, JOB_MAX_FINISHED
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+def _new_job(payload):
+    return {
+        "job_id": uuid.uuid4().hex,
+        "status": QUEUED,
+        "request": payload,
+        "result": None,
+        "error": None,
+        "created_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+    }
+
+class InMemoryJobStore:
+    """
+    FIFO job queue + status table held in process memory (lost on restart).
+    Finished jobs are dropped after retain_s, oldest first past max_finished.
+    """
+    def __init__(self, retain_s=None, max_finished=None):
+        self._jobs = {}
+        self._queue = []
+        self._finished = OrderedDict()  # job_id -> finished_at, oldest first
+        self.retain_s = JOB_RETAIN_S if retain_s is None else retain_s
+        self.max_finished = JOB_MAX_FINISHED if max_finished is None else max_finished
+        self._lock = threading.Lock()
+
+    def _evict(self, now):
+        while self._finished:
+            job_id, finished_at = next(iter(self._finished.items()))
+            if len(self._finished) <= self.max_finished and now - finished_at <= self.retain_s:
+                break
+            del self._finished[job_id]
+            self._jobs.pop(job_id, None)
+
+    def submit(self, payload) -> str:
+        job = _new_job(payload)
+        with self._lock:
+            self._jobs[job["job_id"]] = job
+            self._queue.append(job["job_id"])
+        return job["job_id"]
+
+    def claim(self) -> Optional[dict]:
+        """Marks the oldest queued job as running and returns it (None if idle)."""
+        with self._lock:
+            if not self._queue:
+                return None
+            job = self._jobs[self._queue.pop(0)]
+            job["status"], job["started_at"] = RUNNING, time.time()
+            return dict(job)
+
+    def heartbeat(self, job_id) -> bool:
+        """Jobs never outlive this process, so there is no lease to renew; True while running."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return bool(job) and job["status"] == RUNNING
+
+    def finish(self, job_id, result=None, error=None):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                job["status"] = FAILED if error else DONE
+                job["result"], job["error"] = result, error
+                job["finished_at"] = time.time()
+                self._finished[job_id] = job["finished_at"]
+                self._evict(job["finished_at"])
+
+    def get(self, job_id) -> Optional[dict]:
+        with self._lock:
+            self._evict(time.time())
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+class SqliteJobStore:
+    """
+    Durable job queue in a local SQLite file, safe to share between
+    processes. A running job holds a lease that its worker renews with
+    heartbeat(); one not renewed for lease_s (its worker died) is re-queued
+    by the next claim() in any process sharing the file.
+    """
+    def __init__(self, db_path=None, lease_s=None):
+        self.db_path = db_path or JOB_DB
+        self.lease_s = JOB_LEASE_S if lease_s is None else lease_s
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "job_id TEXT PRIMARY KEY, status TEXT, request TEXT, result TEXT, error TEXT, "
+                "created_at REAL, started_at REAL, finished_at REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, created_at)")
+            # Databases created before leases were renewed lack the column
+            if "heartbeat_at" not in {r[1] for r in self._db.execute("PRAGMA table_info(jobs)")}:
+                self._db.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at REAL")
+            self._db.commit()
+
+    def _requeue_stale(self):
+        cur = self._db.execute(
+            "UPDATE jobs SET status = ?, started_at = NULL, heartbeat_at = NULL "
+            "WHERE status = ? AND COALESCE(heartbeat_at, started_at) < ?",
+            (QUEUED, RUNNING, time.time() - self.lease_s)
+        )
+        self._db.commit()
+        return cur.rowcount
+
+    def requeue_stale(self) -> int:
+        """Re-queues running jobs whose lease was not renewed within lease_s; returns how many."""
+        with self._lock:
+            return self._requeue_stale()
+
+    def heartbeat(self, job_id) -> bool:
+        """Renews a running job's lease; False if it is no longer running (e.g. it was re-queued)."""
+        with self._lock:
+            cur = self._db.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE job_id = ? AND status = ?", (time.time(), job_id, RUNNING)
+            )
+            self._db.commit()
+            return cur.rowcount == 1
+
+    def _row(self, row):
+        if not row:
+            return None
+        job = dict(zip(("job_id", "status", "request", "result", "error",
+                        "created_at", "started_at", "finished_at"), row))
+        job["request"] = json.loads(job["request"]) if job["request"] else None
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def submit(self, payload) -> str:
+        job = _new_job(payload)
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (job_id, status, request, created_at) VALUES (?, ?, ?, ?)",
+                (job["job_id"], QUEUED, json.dumps(payload), job["created_at"])
+            )
+            self._db.commit()
+        return job["job_id"]
+
+    def claim(self) -> Optional[dict]:
+        """
+        Marks the oldest queued job as running and returns it (None if idle).
+        The UPDATE only matches a job that is still queued, so when another
+        process claims it first rowcount is 0 and the next one is tried.
+        """
+        with self._lock:
+            if self._requeue_stale():
+                debug("Re-queued jobs whose lease expired", tag="jobs")
+            while True:
+                row = self._db.execute(
+                    "SELECT job_id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if not row:
+                    return None
+                now = time.time()
+                cur = self._db.execute(
+                    "UPDATE jobs SET status = ?, started_at = ?, heartbeat_at = ? WHERE job_id = ? AND status = ?",
+                    (RUNNING, now, now, row[0], QUEUED)
+                )
+                self._db.commit()
+                if cur.rowcount == 1:
+                    return self._get(row[0])
+
+    def finish(self, job_id, result=None, error=None):
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE job_id = ?",
+                (FAILED if error else DONE, json.dumps(result) if result is not None else None,
+                 error, time.time(), job_id)
+            )
+            self._db.commit()
+
+    def _get(self, job_id):
+        return self._row(self._db.execute(
+            "SELECT job_id, status, request, result, error, created_at, started_at, finished_at "
+            "FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone())
+
+    def get(self, job_id) -> Optional[dict]:
+        with self._lock:
+            return self._get(job_id)
+
+def create_job_store(backend=None):
+    backend = (backend or JOB_BACKEND)
+    if backend == "sqlite":
+        return SqliteJobStore()
+    return InMemoryJobStore()
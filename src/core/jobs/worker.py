@@ -0,0 +1,89 @@
+import threading
+from src.core.logger import debug
+from src.core.config import JOB_WORKERS, JOB_LEASE_S
+from src.core.observability.error_reporter import capture_and_log_exception
+
+class ReviewWorkerPool:
+    """
+    Fixed-size pool of daemon threads draining a job store. run_fn(request)
+    returns the job result; an exception (or a dict with "error") marks the
+    job failed. The pool size caps how many reviews run at once. While jobs
+    run, a heartbeat thread renews their lease every heartbeat_s, so other
+    processes sharing the store do not take them for abandoned.
+    """
+    def __init__(self, store, run_fn, workers=None, heartbeat_s=None):
+        self.store = store
+        self.run_fn = run_fn
+        self.workers = max(1, workers or JOB_WORKERS)
+        self.heartbeat_s = heartbeat_s or JOB_LEASE_S / 3
+        self._wake = threading.Condition()
+        self._stop = False
+        self._threads = []
+        self._running = set()  # job ids being run by this pool
+        self._running_lock = threading.Lock()
+        self._halt = threading.Event()  # stops the heartbeat thread
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop = False
+        self._halt.clear()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._loop, name=f"review-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        t = threading.Thread(target=self._heartbeat, name="review-heartbeat", daemon=True)
+        t.start()
+        self._threads.append(t)
+        debug(f"Review worker pool started ({self.workers} workers)", tag="jobs")
+
+    def stop(self, timeout=5):
+        with self._wake:
+            self._stop = True
+            self._wake.notify_all()
+        self._halt.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def submit(self, request) -> str:
+        job_id = self.store.submit(request)
+        with self._wake:
+            self._wake.notify()
+        return job_id
+
+    def _heartbeat(self):
+        # Not on self._wake: a submit() notify must reach a worker
+        while not self._halt.wait(self.heartbeat_s):
+            with self._running_lock:
+                running = list(self._running)
+            for job_id in running:
+                try:
+                    if not self.store.heartbeat(job_id):
+                        debug(f"Job {job_id} lost its lease", tag="jobs")
+                except Exception as e:
+                    capture_and_log_exception({"where": "review_heartbeat", "job_id": job_id, "error": str(e)})
+
+    def _loop(self):
+        while not self._stop:
+            job = self.store.claim()
+            if job is None:
+                with self._wake:
+                    if not self._stop:
+                        # Timeout also picks up jobs queued by other processes (SQLite backend)
+                        self._wake.wait(timeout=1.0)
+                continue
+            with self._running_lock:
+                self._running.add(job["job_id"])
+            try:
+                result = self.run_fn(job["request"])
+                if isinstance(result, dict) and result.get("error"):
+                    self.store.finish(job["job_id"], result=result, error=str(result.get("message") or result["error"]))
+                else:
+                    self.store.finish(job["job_id"], result=result)
+            except Exception as e:
+                capture_and_log_exception({"where": "review_worker", "job_id": job["job_id"], "error": str(e)})
+                self.store.finish(job["job_id"], error=str(e))
+            finally:
+                with self._running_lock:
+                    self._running.discard(job["job_id"])
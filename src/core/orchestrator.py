@@ -1,5 +1,10 @@
+import time
+import asyncio
+from src.core.logger import debug
+from src.core.scheduler import StageGraph
 from src.core.observability.error_reporter import capture_and_log_exception
 from src.core.tools.rag_wrapper import rag_retriever_wrapper
+from src.core.tools.review_cache import get_review_cache, review_cache_key
 from src.agents.structure import ScientificStructureExtractorFactory
 from src.agents.claims import ClaimExtractionAgentFactory
 from src.agents.evidence import EvidenceLinkingAgentFactory
@@ -7,27 +12,255 @@ from src.agents.reliability import ReliabilityScoringAgentFactory
 from src.agents.meta_reviewer import MetaReviewerAgentFactory
 
 class Orchestrator:
+    """
+    Runs the review pipeline as a stage graph:
+
+        ingest ─────────────────────┐
+        structure ─> claims ─> evidence ─> reliability ─> meta
+
+    Chunking/embedding (ingest) has no dependency on the LLM-bound structure
+    and claim stages, so it overlaps with them. Timings of the last run are
+    kept in self.last_timings.
+
+    Finished reviews are cached by content and pipeline config; pass
+    force_refresh=True to recompute (and overwrite) a cached review. A
+    review where an agent fell back from the LLM to its heuristic (an LLM
+    error or unusable reply) is not cached, so the next run retries the LLM.
+
+    A document already streamed into the context engine (ingest_streamed)
+    is passed as its head text with indexed_doc_id and content_digest: the
+    ingest stage is skipped and the digest of the full text joins the key.
+    """
     def __init__(self, context_engine):
         self.context_engine = context_engine
+        self.last_timings = None
+
+    def _agents(self, llm_callable):
+        return (
+            ScientificStructureExtractorFactory(self.context_engine, llm_callable),
+            ClaimExtractionAgentFactory(self.context_engine, llm_callable),
+            ReliabilityScoringAgentFactory(self.context_engine, llm_callable),
+            MetaReviewerAgentFactory(self.context_engine, llm_callable),
+        )
+
+    def _evidence_agent(self, doc_id, llm_callable, kwargs):
+        # Retrieval is scoped to this document's namespace
+        retriever = rag_retriever_wrapper(self.context_engine, doc_id=doc_id)
+        return EvidenceLinkingAgentFactory(
+            self.context_engine, retriever, llm_callable,
+            classify_mode=kwargs.get("classify_mode", "pair")
+        )
+
+    def _review_key(self, raw_text, llm_callable, kwargs):
+        """Review cache key, or None when the LLM in use cannot be identified."""
+        model_id = getattr(llm_callable, "model_id", None) if llm_callable else None
+        if llm_callable and not model_id:
+            return None
+        config = dict(
+            vars(self.context_engine.config),
+            classify_mode=kwargs.get("classify_mode", "pair"),
+            dense=bool(self.context_engine.retriever.model),
+        )
+        if kwargs.get("content_digest"):
+            config["content_digest"] = kwargs["content_digest"]
+        return review_cache_key(raw_text, model_id, llm_callable is not None, config)
+
+    def _cached(self, key, raw_text, kwargs):
+        if not key or kwargs.get("force_refresh"):
+            return None
+        t0 = time.perf_counter()
+        final = get_review_cache().get(key, tag="review")
+        if final is not None:
+            struct = final.get("structured_data")
+            if isinstance(struct, dict) and "full_text" not in struct:
+                struct["full_text"] = raw_text
+            self.last_timings = {"cache_hit": True, "wall_s": round(time.perf_counter() - t0, 4)}
+            debug("Review cache hit", tag="orchestrator")
+        return final
+
+    def _lookup(self, raw_text, llm_callable, kwargs):
+        """(review cache key, cached review or None)."""
+        key = self._review_key(raw_text, llm_callable, kwargs)
+        return key, self._cached(key, raw_text, kwargs)
+
+    def _store(self, key, final, raw_text, agents=()):
+        if not key:
+            return
+        degraded = [getattr(a, "agent_name", type(a).__name__) for a in agents if getattr(a, "degraded", False)]
+        if degraded:
+            debug(f"Review not cached: {', '.join(degraded)} fell back to heuristics", tag="orchestrator")
+            return
+        # The key already pins the source text, so the cached copy leaves it
+        # out (it can be most of the entry) and _cached() puts it back
+        struct = final.get("structured_data")
+        if isinstance(struct, dict) and struct.get("full_text") is raw_text:
+            final = dict(final, structured_data={k: v for k, v in struct.items() if k != "full_text"})
+        try:
+            get_review_cache().set(key, final)
+        except Exception as e:  # e.g. a non-JSON value from a custom agent
+            capture_and_log_exception({"where": "orchestrator.review_cache", "error": str(e)})
+
+    def _ingest(self, raw_text, kwargs):
+        if kwargs.get("indexed_doc_id"):
+            return kwargs["indexed_doc_id"]
+        return self.context_engine.ingest_text(raw_text, doc_id=kwargs.get("doc_id"))
+
+    def _record(self, graph):
+        self.last_timings = dict(graph.summary(), cache_hit=False)
+        debug(f"Pipeline {self.last_timings['wall_s']}s, critical path: "
+              f"{' -> '.join(self.last_timings['critical_path'])}", tag="orchestrator")
 
     def run(self, raw_text, use_llm=False, llm_callable=None, **kwargs):
         try:
-            self.context_engine.ingest_text(raw_text)
-            
-            extractor = ScientificStructureExtractorFactory(self.context_engine, llm_callable)
-            claim_agent = ClaimExtractionAgentFactory(self.context_engine, llm_callable)
-            retriever = rag_retriever_wrapper(self.context_engine)
-            evidence_agent = EvidenceLinkingAgentFactory(self.context_engine, retriever, llm_callable)
-            rel_agent = ReliabilityScoringAgentFactory(self.context_engine, llm_callable)
-            meta_agent = MetaReviewerAgentFactory(self.context_engine, llm_callable)
-
-            struct = extractor.extract(raw_text)
-            claims = claim_agent.extract(struct).get("claims", [])
-            evidence = evidence_agent.link_evidence(claims).get("links", [])
-            score = rel_agent.score(struct, claims, evidence)
-            final = meta_agent.review(struct, claims, evidence, score)
-            
+            key = self._review_key(raw_text, llm_callable, kwargs)
+            cached = self._cached(key, raw_text, kwargs)
+            if cached is not None:
+                return cached
+
+            agents = list(self._agents(llm_callable))
+            extractor, claim_agent, rel_agent, meta_agent = agents
+
+            def evidence(r):
+                agent = self._evidence_agent(r["ingest"], llm_callable, kwargs)
+                agents.append(agent)
+                return agent.link_evidence(r["claims"]).get("links", [])
+
+            graph = StageGraph()
+            # Index this document in its own namespace
+            graph.add("ingest", lambda r: self._ingest(raw_text, kwargs))
+            graph.add("structure", lambda r: extractor.extract(raw_text))
+            graph.add("claims", lambda r: claim_agent.extract(r["structure"]).get("claims", []), ["structure"])
+            graph.add("evidence", evidence, ["ingest", "claims"])
+            graph.add("reliability", lambda r: rel_agent.score(r["structure"], r["claims"], r["evidence"]),
+                      ["structure", "claims", "evidence"])
+            graph.add("meta", lambda r: meta_agent.review(r["structure"], r["claims"], r["evidence"], r["reliability"]),
+                      ["structure", "claims", "evidence", "reliability"])
+
+            final = graph.run()["meta"]
+            self._record(graph)
+            self._store(key, final, raw_text, agents)
             return final
         except Exception as e:
             capture_and_log_exception({"where": "orchestrator", "error": str(e)})
-            return {"error": str(e)}
\ No newline at end of file
+            return {"error": str(e)}
+
+    async def run_async(self, raw_text, use_llm=False, llm_callable=None, **kwargs):
+        """
+        Same pipeline as run() for use inside an event loop: LLM calls are
+        awaited and chunking/embedding runs in a worker thread.
+        """
+        try:
+            # Hashing the source and the SQLite read/JSON decode stay off the event loop
+            key, cached = await asyncio.to_thread(self._lookup, raw_text, llm_callable, kwargs)
+            if cached is not None:
+                return cached
+
+            agents = list(self._agents(llm_callable))
+            extractor, claim_agent, rel_agent, meta_agent = agents
+
+            async def claims(r):
+                return (await claim_agent.extract_async(r["structure"])).get("claims", [])
+
+            async def evidence(r):
+                agent = self._evidence_agent(r["ingest"], llm_callable, kwargs)
+                agents.append(agent)
+                return (await agent.link_evidence_async(r["claims"])).get("links", [])
+
+            graph = StageGraph()
+            graph.add("ingest", lambda r: asyncio.to_thread(self._ingest, raw_text, kwargs))
+            graph.add("structure", lambda r: extractor.extract_async(raw_text))
+            graph.add("claims", claims, ["structure"])
+            graph.add("evidence", evidence, ["ingest", "claims"])
+            graph.add("reliability", lambda r: rel_agent.score_async(r["structure"], r["claims"], r["evidence"]),
+                      ["structure", "claims", "evidence"])
+            graph.add("meta", lambda r: meta_agent.review_async(r["structure"], r["claims"], r["evidence"], r["reliability"]),
+                      ["structure", "claims", "evidence", "reliability"])
+
+            final = (await graph.run_async())["meta"]
+            self._record(graph)
+            await asyncio.to_thread(self._store, key, final, raw_text, agents)
+            return final
+        except Exception as e:
+            capture_and_log_exception({"where": "orchestrator_async", "error": str(e)})
+            return {"error": str(e)}
+
+    async def run_stream(self, raw_text, use_llm=False, llm_callable=None, **kwargs):
+        """
+        Async generator of (event, data) tuples emitted as each stage finishes:
+        structure, claims, one evidence event per claim, reliability, review.
+        A failure ends the stream with an error event. A cached review is
+        replayed as the same sequence of events.
+        """
+        ingest = None
+        try:
+            # Hashing the source and the SQLite read/JSON decode stay off the event loop
+            key, cached = await asyncio.to_thread(self._lookup, raw_text, llm_callable, kwargs)
+            if cached is not None:
+                structure = cached.get("structured_data") or {}
+                yield "structure", {k: v for k, v in structure.items() if k != "full_text"}
+                yield "claims", {"claims": cached.get("claims", [])}
+                for i, link in enumerate(cached.get("evidence_links", [])):
+                    yield "evidence", {"index": i, **link}
+                yield "reliability", cached.get("reliability", {})
+                yield "review", cached
+                return
+
+            # Same stages as run(), timed by hand (the times include the consumer's pauses)
+            graph = StageGraph()
+            for name, deps in (("ingest", ()), ("structure", ()), ("claims", ["structure"]),
+                               ("evidence", ["ingest", "claims"]), ("reliability", ["structure", "claims", "evidence"]),
+                               ("meta", ["structure", "claims", "evidence", "reliability"])):
+                graph.add(name, None, deps)
+            t0 = time.perf_counter()
+            clock = lambda: time.perf_counter() - t0
+
+            def ingest_timed():
+                start = clock()
+                try:
+                    return self._ingest(raw_text, kwargs)
+                finally:
+                    graph.timings["ingest"] = (start, clock())
+
+            # Index in the background while the LLM-bound stages run
+            ingest = asyncio.ensure_future(asyncio.to_thread(ingest_timed))
+            agents = list(self._agents(llm_callable))
+            extractor, claim_agent, rel_agent, meta_agent = agents
+
+            start = clock()
+            struct = await extractor.extract_async(raw_text)
+            graph.timings["structure"] = (start, clock())
+            # The caller already has the source text; don't echo it back early
+            yield "structure", {k: v for k, v in struct.items() if k != "full_text"}
+
+            start = clock()
+            claims = (await claim_agent.extract_async(struct)).get("claims", [])
+            graph.timings["claims"] = (start, clock())
+            yield "claims", {"claims": claims}
+
+            evidence_agent = self._evidence_agent(await ingest, llm_callable, kwargs)
+            agents.append(evidence_agent)
+            start = clock()
+            links = [None] * len(claims)
+            async for i, link in evidence_agent.link_evidence_stream(claims):
+                links[i] = link
+                yield "evidence", {"index": i, **link}
+            evidence = [link for link in links if link is not None]
+            graph.timings["evidence"] = (start, clock())
+
+            start = clock()
+            score = await rel_agent.score_async(struct, claims, evidence)
+            graph.timings["reliability"] = (start, clock())
+            yield "reliability", score
+
+            start = clock()
+            final = await meta_agent.review_async(struct, claims, evidence, score)
+            graph.timings["meta"] = (start, clock())
+            self._record(graph)
+            await asyncio.to_thread(self._store, key, final, raw_text, agents)
+            yield "review", final
+        except Exception as e:
+            capture_and_log_exception({"where": "orchestrator_stream", "error": str(e)})
+            yield "error", {"error": str(e)}
+        finally:
+            if ingest and not ingest.done():
+                ingest.cancel()
@@ -0,0 +1,127 @@
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from src.core.config import PIPELINE_STAGE_WORKERS
+
+class StageGraph:
+    """
+    Dependency graph of pipeline stages. A stage is fn(results) -> value,
+    where results maps its finished dependencies to their values; every
+    stage starts as soon as all of its dependencies have finished.
+    Dependencies must be added first, so the graph is acyclic by construction.
+    """
+    def __init__(self):
+        self.stages = {}  # name -> (fn, deps)
+        self.timings = {}  # name -> (start_s, end_s) relative to the run start
+
+    def add(self, name, fn, deps=()):
+        for dep in deps:
+            if dep not in self.stages:
+                raise ValueError(f"Stage {name!r} depends on unknown stage {dep!r}")
+        self.stages[name] = (fn, tuple(deps))
+        return self
+
+    def _ready(self, pending, results):
+        return [n for n, (_, deps) in pending.items() if all(d in results for d in deps)]
+
+    def _inputs(self, name, results):
+        return {d: results[d] for d in self.stages[name][1]}
+
+    def _timed(self, name, fn, inputs, t0, stop):
+        if stop.is_set():  # a sibling failed after this stage was queued
+            return None
+        start = time.perf_counter() - t0
+        try:
+            return fn(inputs)
+        except BaseException:
+            stop.set()
+            raise
+        finally:
+            self.timings[name] = (start, time.perf_counter() - t0)
+
+    async def _timed_async(self, name, fn, inputs, t0):
+        start = time.perf_counter() - t0
+        try:
+            return await fn(inputs)
+        finally:
+            self.timings[name] = (start, time.perf_counter() - t0)
+
+    def run(self, pool=None):
+        """
+        Runs the graph on a thread pool. Returns {stage: value}; re-raises the
+        first failure, after cancelling sibling stages still waiting for a
+        worker (stages already running finish in the background).
+        """
+        pool = pool or get_stage_pool()
+        results, pending, running = {}, dict(self.stages), {}
+        self.timings = {}
+        t0 = time.perf_counter()
+        stop = threading.Event()
+
+        try:
+            while pending or running:
+                for name in self._ready(pending, results):
+                    fn, _ = pending.pop(name)
+                    running[pool.submit(self._timed, name, fn, self._inputs(name, results), t0, stop)] = name
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    results[running.pop(fut)] = fut.result()
+        finally:
+            stop.set()
+            for fut in running:
+                fut.cancel()
+        return results
+
+    async def run_async(self):
+        """run() for coroutine stages, as tasks on the running event loop."""
+        results, pending, running = {}, dict(self.stages), {}
+        self.timings = {}
+        t0 = time.perf_counter()
+
+        try:
+            while pending or running:
+                for name in self._ready(pending, results):
+                    fn, _ = pending.pop(name)
+                    running[asyncio.ensure_future(self._timed_async(name, fn, self._inputs(name, results), t0))] = name
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    results[running.pop(task)] = task.result()
+        finally:
+            for task in running:
+                task.cancel()
+        return results
+
+    def critical_path(self):
+        """Chain of stages that determined the wall time, first to last."""
+        if not self.timings:
+            return []
+        name = max(self.timings, key=lambda n: self.timings[n][1])
+        path = [name]
+        while self.stages[name][1]:
+            name = max(self.stages[name][1], key=lambda d: self.timings[d][1])
+            path.append(name)
+        return path[::-1]
+
+    def summary(self):
+        return {
+            "stages": {
+                n: {"start_s": round(s, 4), "end_s": round(e, 4), "duration_s": round(e - s, 4)}
+                for n, (s, e) in self.timings.items()
+            },
+            "critical_path": self.critical_path(),
+            "wall_s": round(max((e for _, e in self.timings.values()), default=0.0), 4),
+        }
+
+_stage_pool = None
+_stage_lock = threading.Lock()
+def get_stage_pool() -> ThreadPoolExecutor:
+    """
+    Shared pool for synchronous stage graphs. Stages never wait on each
+    other (the caller does), so concurrent runs cannot deadlock it.
+    """
+    global _stage_pool
+    with _stage_lock:
+        if _stage_pool is None:
+            _stage_pool = ThreadPoolExecutor(max_workers=PIPELINE_STAGE_WORKERS, thread_name_prefix="hypothesi-stage")
+        return _stage_pool
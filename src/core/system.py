@@ -1,13 +1,16 @@
 import time
-import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 
 from src.core.context.engine import ContextEngine
 from src.core.orchestrator import Orchestrator
 from src.agents.ingestion.dispatcher import auto_ingest
+from src.agents.ingestion.arxiv import ARXIV_ID_RE, resolve_arxiv
+from src.agents.ingestion.stream import ingest_streamed
 from src.core.observability.error_reporter import capture_and_log_exception
 from src.core.logger import debug
-from src.core.tools.sanitizer import sanitizer
-from src.core.tools.text_prep import text_preprocessor
+from src.core.tools.normalize import normalize_text
+from src.core.tools.http_client import get_http_session
+from src.core.config import BATCH_PARALLELISM, STREAM_INGEST
 
 class Hypothesi:
     """
@@ -22,25 +25,36 @@ class Hypothesi:
         debug(f"Hypothesi initialized for user {user_id}", tag="system")
 
     def analyze(self, source, use_llm=False, **kwargs):
+        """
+        Pass stream=True (default HYPOTHESI_STREAM_INGEST) to index the whole
+        document incrementally rather than cutting it at 200k chars.
+        """
+        return self._analyze(self.orchestrator, source, use_llm, **kwargs)
+
+    def _analyze(self, orchestrator, source, use_llm=False, **kwargs):
         t0 = time.time()
         try:
-            # 1. Ingest
-            raw = auto_ingest(source, **kwargs)
+            # 1. Ingest (streamed documents are indexed here, the head is reviewed)
+            streamed = {}
+            if STREAM_INGEST if kwargs.get("stream") is None else kwargs["stream"]:
+                raw, streamed = ingest_streamed(orchestrator.context_engine, source, **kwargs)
+            else:
+                raw = auto_ingest(source, **kwargs)
             if isinstance(raw, dict) and raw.get("error"):
                 return raw
 
-            # 2. Clean / Normalize
-            cleaned = sanitizer(raw, max_lines=kwargs.get("max_lines", 5000))
-            cleaned = text_preprocessor(cleaned, normalize_whitespace=True)
-            cleaned = unicodedata.normalize("NFKC", cleaned)
+            # 2. Clean / Normalize (a no-op for text auto_ingest already normalized)
+            cleaned = normalize_text(raw, max_lines=kwargs.get("max_lines", 5000))
 
             # 3. Run Pipeline
-            final = self.orchestrator.run(
+            final = orchestrator.run(
                 raw_text=cleaned,
                 use_llm=use_llm,
                 llm_callable=self.llm_callable,
                 embedder=kwargs.get("embedder", None),
-                retrieval_k=kwargs.get("retrieval_k", 5)
+                retrieval_k=kwargs.get("retrieval_k", 5),
+                force_refresh=kwargs.get("force_refresh", False),
+                **streamed
             )
             return final
 
@@ -51,4 +65,60 @@ class Hypothesi:
                 "error_id": eid, 
                 "message": str(e),
                 "duration_s": time.time() - t0
-            }
\ No newline at end of file
+            }
+
+    def _fresh_orchestrator(self):
+        return Orchestrator(ContextEngine(user_id=self.context_engine.session.user_id))
+
+    @staticmethod
+    def _source_key(source):
+        # Strings are de-duplicated by value; file objects are never merged
+        return source.strip() if isinstance(source, str) else ("obj", id(source))
+
+    @staticmethod
+    def _prefetch_arxiv(unique, kwargs):
+        # One id_list call (plus concurrent PDFs) warms the arXiv cache for the whole batch
+        ids = [key for key in unique if isinstance(key, str) and ARXIV_ID_RE.match(key)]
+        if len(ids) > 1:
+            try:
+                resolve_arxiv(ids, kwargs.get("arxiv_full_text"), session=kwargs.get("session"))
+            except Exception as e:
+                capture_and_log_exception({"where": "analyze_many.arxiv", "error": str(e)})
+
+    def analyze_many(self, sources, use_llm=False, parallelism=None, **kwargs):
+        """
+        Runs analyze() over many sources. Each distinct source is analysed once
+        and up to `parallelism` items run at a time. Items share the embedding
+        model and one HTTP session; each gets its own lightweight engine so
+        lexical scores don't depend on the rest of the batch. Returns one entry per input, in input order:
+        {"source", "result"} or {"source", "error"}.
+        """
+        t0 = time.time()
+        sources = list(sources)
+        kwargs.setdefault("session", get_http_session())
+
+        unique = {}
+        for source in sources:
+            unique.setdefault(self._source_key(source), source)
+        workers = max(1, min(parallelism or BATCH_PARALLELISM, len(unique) or 1))
+        self._prefetch_arxiv(unique, kwargs)
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hypothesi-batch") as pool:
+            futures = {
+                key: pool.submit(self._analyze, self._fresh_orchestrator(), source, use_llm, **kwargs)
+                for key, source in unique.items()
+            }
+            results = {key: fut.result() for key, fut in futures.items()}
+
+        items = []
+        for source in sources:
+            label = source if isinstance(source, str) else getattr(source, "name", repr(source))
+            res = results[self._source_key(source)]
+            if isinstance(res, dict) and res.get("error"):
+                items.append({"source": label, "error": res.get("message") or str(res["error"])})
+            else:
+                items.append({"source": label, "result": res})
+
+        debug(f"analyze_many: {len(sources)} sources, {len(unique)} unique, {workers} workers, "
+              f"{time.time() - t0:.2f}s", tag="system")
+        return items
@@ -0,0 +1,106 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict, defaultdict
+from src.core.observability.error_reporter import capture_and_log_exception
+
+class TieredCache:
+    """
+    Two-tier key/value cache for JSON-serializable values.
+    Tier 1 is an in-process LRU (max_items); tier 2 is an optional SQLite
+    file (db_path) capped at max_rows. Both tiers honour ttl_s (None = no
+    expiry). Hits and misses are counted per caller-supplied tag.
+    """
+    def __init__(self, name, max_items=512, ttl_s=None, db_path=None, max_rows=10000):
+        self.name = name
+        self.max_items = max_items
+        self.ttl_s = ttl_s
+        self.db_path = db_path or None
+        self.max_rows = max_rows
+        self._mem = OrderedDict()  # key -> (created_ts, json_str)
+        self._lock = threading.Lock()
+        self._db = None
+        self._counts = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+    # ------------------------------------------------------
+    # SQLite tier
+    # ------------------------------------------------------
+    def _conn(self):
+        if self._db is None and self.db_path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+                db = sqlite3.connect(self.db_path, check_same_thread=False)
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS cache ("
+                    "key TEXT PRIMARY KEY, value TEXT, created REAL, accessed REAL)"
+                )
+                db.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache(accessed)")
+                self._db = db
+            except Exception as e:
+                capture_and_log_exception({"where": f"cache.{self.name}.open", "error": str(e)})
+                self.db_path = None
+        return self._db
+
+    def _expired(self, created):
+        return self.ttl_s is not None and time.time() - created > self.ttl_s
+
+    # ------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------
+    def get(self, key, tag="default"):
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry and self._expired(entry[0]):
+                del self._mem[key]
+                entry = None
+            if entry is None and self._conn():
+                try:
+                    row = self._db.execute("SELECT value, created FROM cache WHERE key = ?", (key,)).fetchone()
+                    if row and not self._expired(row[1]):
+                        self._db.execute("UPDATE cache SET accessed = ? WHERE key = ?", (time.time(), key))
+                        self._db.commit()
+                        entry = (row[1], row[0])
+                        self._remember(key, entry)
+                except Exception as e:
+                    capture_and_log_exception({"where": f"cache.{self.name}.get", "error": str(e)})
+            if entry is None:
+                self._counts[tag]["misses"] += 1
+                return None
+            self._mem.move_to_end(key)
+            self._counts[tag]["hits"] += 1
+            return json.loads(entry[1])
+
+    def set(self, key, value):
+        entry = (time.time(), json.dumps(value))
+        with self._lock:
+            self._remember(key, entry)
+            if self._conn():
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO cache (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                        (key, entry[1], entry[0], entry[0])
+                    )
+                    self._db.execute(
+                        "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                        (self.max_rows,)
+                    )
+                    self._db.commit()
+                except Exception as e:
+                    capture_and_log_exception({"where": f"cache.{self.name}.set", "error": str(e)})
+
+    def _remember(self, key, entry):
+        self._mem[key] = entry
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_items:
+            self._mem.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            by_tag = {}
+            for tag, c in self._counts.items():
+                total = c["hits"] + c["misses"]
+                by_tag[tag] = dict(c, hit_rate=round(c["hits"] / total, 4) if total else 0.0)
+            return {"name": self.name, "memory_items": len(self._mem),
+                    "persistent": bool(self.db_path), "by_tag": by_tag}
@@ -0,0 +1,155 @@
+import os
+import re
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from src.core.tools.normalize import NormalizedText
+from src.core.config import EMBEDDING_CACHE_DIR, EMBEDDING_CACHE_MAX_MB
+from src.core.observability.error_reporter import capture_and_log_exception
+
+try:
+    import numpy as np
+    _HAS_NP = True
+except ImportError:
+    _HAS_NP = False
+
+def normalize_for_key(text: str) -> str:
+    """Whitespace/unicode-insensitive form used for hashing."""
+    if isinstance(text, NormalizedText):
+        return text
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text or "")).strip()
+
+def embedding_key(model_name: str, text: str) -> str:
+    h = hashlib.sha256()
+    h.update(model_name.encode("utf-8"))
+    h.update(b"\0")
+    h.update(normalize_for_key(text).encode("utf-8"))
+    return h.hexdigest()
+
+class EmbeddingCache:
+    """
+    Content-addressed on-disk embedding cache.
+    One float32 .npy file per (model, normalized text) hash, read back
+    memory-mapped. Least-recently-used files are evicted once the total
+    size exceeds max_bytes.
+    """
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = cache_dir or EMBEDDING_CACHE_DIR
+        self.max_bytes = EMBEDDING_CACHE_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+        self.enabled = _HAS_NP and self.max_bytes > 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._index = None  # OrderedDict[key -> size], oldest first
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".npy")
+
+    def _load_index(self):
+        if self._index is not None:
+            return
+        entries = []
+        if os.path.isdir(self.cache_dir):
+            for root, _, files in os.walk(self.cache_dir):
+                for name in files:
+                    if not name.endswith(".npy"): continue
+                    try:
+                        st = os.stat(os.path.join(root, name))
+                        entries.append((st.st_mtime, name[:-4], st.st_size))
+                    except OSError:
+                        continue
+        entries.sort()
+        self._index = OrderedDict((k, size) for _, k, size in entries)
+        self._bytes = sum(self._index.values())
+
+    def _evict(self):
+        while self._index and self._bytes > self.max_bytes:
+            key, size = self._index.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            try: os.remove(self._path(key))
+            except OSError: pass
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._load_index()
+            if key not in self._index:
+                return None
+            path = self._path(key)
+            try:
+                vec = np.load(path, mmap_mode="r")
+                os.utime(path)
+            except Exception:
+                self._bytes -= self._index.pop(key, 0)
+                return None
+            self._index.move_to_end(key)
+            return vec
+
+    def put(self, key, vec):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._load_index()
+            path = self._path(key)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp, "wb") as f:
+                    np.save(f, np.asarray(vec, dtype=np.float32))
+                os.replace(tmp, path)
+                size = os.path.getsize(path)
+            except Exception as e:
+                capture_and_log_exception({"where": "embedding_cache.put", "error": str(e)})
+                return
+            self._bytes += size - self._index.pop(key, 0)
+            self._index[key] = size
+            self._evict()
+
+    def encode(self, model, model_name, texts, batch_size=None):
+        """
+        Embeds texts with model, encoding only cache misses (batch_size per
+        model.encode call; all at once if None).
+        Returns a float32 array of shape (len(texts), dim).
+        """
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        keys = [embedding_key(model_name, t) for t in texts]
+        rows = [self.get(k) for k in keys]
+        miss_idx = [i for i, r in enumerate(rows) if r is None]
+
+        with self._lock:
+            self.hits += len(texts) - len(miss_idx)
+            self.misses += len(miss_idx)
+
+        step = batch_size or len(miss_idx) or 1
+        for b in range(0, len(miss_idx), step):
+            part = miss_idx[b:b + step]
+            fresh = np.asarray(model.encode([texts[i] for i in part], show_progress_bar=False), dtype=np.float32)
+            for j, i in enumerate(part):
+                rows[i] = fresh[j]
+                self.put(keys[i], fresh[j])
+
+        return np.vstack([np.asarray(r, dtype=np.float32) for r in rows])
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+_cache_instance = EmbeddingCache()
+def get_embedding_cache() -> EmbeddingCache:
+    return _cache_instance
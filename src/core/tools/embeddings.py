@@ -1,5 +1,6 @@
 from src.core.logger import debug
 from src.core.config import is_local_mode # <--- FIXED IMPORT
+from src.core.tools.model_registry import get_model_registry
 
 class SafeEmbeddingTool:
     def __init__(self, model_name="all-MiniLM-L6-v2"):
@@ -19,12 +20,10 @@ class SafeEmbeddingTool:
         if not self.available:
             raise RuntimeError("Embedding model unavailable.")
         
-        try:
-            from sentence_transformers import SentenceTransformer
-            if is_local_mode(): debug(f"Loading model: {self.model_name}", tag="embedding")
-            self.model = SentenceTransformer(self.model_name)
-        except Exception as e:
-            debug(f"Failed to load model: {e}", tag="embedding")
+        if is_local_mode(): debug(f"Loading model: {self.model_name}", tag="embedding")
+        self.model = get_model_registry().get(self.model_name)
+        if self.model is None:
+            debug(f"Failed to load model: {self.model_name}", tag="embedding")
             raise RuntimeError("Model load failed.")
 
     def embed(self, texts):
@@ -0,0 +1,38 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src.core.config import AGENT_MAX_WORKERS, LLM_CONCURRENCY
+
+class BoundedExecutor:
+    """
+    Process-wide thread pool for agent I/O (mostly LLM round-trips).
+    map() keeps at most `limit` calls of one fan-out in flight and
+    returns results in input order.
+    Do not call map() from inside a task running on the same pool.
+    """
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or AGENT_MAX_WORKERS
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="hypothesi-agent")
+
+    def map(self, fn, items, limit=None):
+        items = list(items)
+        limit = max(1, min(limit or LLM_CONCURRENCY, self.max_workers))
+        if limit == 1 or len(items) <= 1:
+            return [fn(item) for item in items]
+
+        slots = threading.BoundedSemaphore(limit)
+        futures = []
+        for item in items:
+            slots.acquire()
+            fut = self._pool.submit(fn, item)
+            fut.add_done_callback(lambda _: slots.release())
+            futures.append(fut)
+        return [f.result() for f in futures]
+
+_executor_instance = None
+_executor_lock = threading.Lock()
+def get_agent_executor() -> BoundedExecutor:
+    global _executor_instance
+    with _executor_lock:
+        if _executor_instance is None:
+            _executor_instance = BoundedExecutor()
+        return _executor_instance
@@ -0,0 +1,251 @@
+import os
+import re
+import glob
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from src.core.config import HTTP_CACHE_DIR, HTTP_CACHE_FRESH_S, HTTP_CACHE_MAX_MB
+from src.core.tools.http_client import DEFAULT_HEADERS, http_get, http_stream_async
+from src.core.logger import debug
+from src.core.observability.error_reporter import capture_and_log_exception
+
+_MAX_AGE_RE = re.compile(r"(?:^|,)\s*max-age\s*=\s*\"?(\d+)")
+
+def _cache_control(headers):
+    """(no_store, max_age) from a Cache-Control header; max_age is None when unset."""
+    value = (headers.get("Cache-Control") or "").lower()
+    if "no-store" in value:
+        return True, None
+    if "no-cache" in value:
+        return False, 0
+    m = _MAX_AGE_RE.search(value)
+    return False, int(m.group(1)) if m else None
+
+class FetchCache:
+    """
+    On-disk cache of HTTP GET bodies, and of text extracted from them, keyed by URL.
+    Within fresh_s of the last fetch an entry is served without touching the
+    network; after that it is revalidated with If-None-Match/If-Modified-Since,
+    so an unchanged resource costs one 304 round-trip. A response's
+    Cache-Control is honored: no-store is never written, no-cache is
+    revalidated on every get, and max-age replaces fresh_s for that entry.
+    Entries are evicted least-recently-checked first once their total size
+    exceeds max_bytes; sizes are kept in memory after one directory scan.
+
+    get()/get_async() return {"url", "status", "content_type", "body", "cache",
+    "path"} where cache is "fresh", "revalidated", "fetched" or None (not stored).
+    """
+    def __init__(self, cache_dir=None, fresh_s=None, max_bytes=None):
+        self.cache_dir = HTTP_CACHE_DIR if cache_dir is None else cache_dir
+        self.fresh_s = HTTP_CACHE_FRESH_S if fresh_s is None else fresh_s
+        self.max_bytes = HTTP_CACHE_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+        self.enabled = bool(self.cache_dir) and self.max_bytes > 0
+        self.counts = {"fresh": 0, "revalidated": 0, "fetched": 0, "uncached": 0}
+        self._index = None  # OrderedDict[base path -> bytes on disk], least recently checked first
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------
+    # Disk layout: <dir>/<h[:2]>/<h>.json (meta), <h>.body, <h>.<kind>.txt
+    # ------------------------------------------------------
+    def _base(self, url):
+        h = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, h[:2], h)
+
+    def _write(self, path, data):
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _lookup(self, url):
+        """(meta, body) of a stored entry, or (None, None)."""
+        if not self.enabled:
+            return None, None
+        base = self._base(url)
+        try:
+            with open(base + ".json", "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(base + ".body", "rb") as f:
+                return meta, f.read()
+        except (OSError, ValueError):
+            return None, None
+
+    def _conditional(self, meta):
+        headers = dict(DEFAULT_HEADERS)
+        if meta and meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta and meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def _result(self, url, status, content_type, body, cache=None):
+        path = self._base(url) if cache else None
+        with self._lock:
+            self.counts[cache or "uncached"] += 1
+        return {"url": url, "status": status, "content_type": content_type, "body": body, "cache": cache, "path": path}
+
+    def _fresh(self, url, meta, body):
+        fresh_s = meta.get("max_age") if meta else None
+        fresh_s = self.fresh_s if fresh_s is None else fresh_s
+        if meta and time.time() - meta.get("checked_at", 0) < fresh_s:
+            return self._result(url, meta["status"], meta["content_type"], body, "fresh")
+        return None
+
+    def _store(self, url, status, headers, body, meta, cached_body):
+        """Handles a network response: 304 refreshes the entry, 200 replaces it."""
+        no_store, max_age = _cache_control(headers)
+        if status == 304 and meta is not None:
+            meta["checked_at"] = time.time()
+            if "Cache-Control" in headers:
+                meta["max_age"] = max_age
+            self._save_meta(url, meta)
+            return self._result(url, meta["status"], meta["content_type"], cached_body, "revalidated")
+
+        content_type = headers.get("Content-Type", "").lower()
+        if status != 200 or not self.enabled:
+            return self._result(url, status, content_type, body)
+        if no_store:
+            if meta is not None:
+                with self._lock:
+                    self._remove(self._base(url))
+            return self._result(url, status, content_type, body)
+
+        meta = {
+            "url": url, "status": status, "content_type": content_type,
+            "etag": headers.get("ETag"), "last_modified": headers.get("Last-Modified"),
+            "max_age": max_age, "checked_at": time.time(),
+        }
+        base = self._base(url)
+        try:
+            with self._lock:
+                os.makedirs(os.path.dirname(base), exist_ok=True)
+                for stale in glob.glob(base + ".*.txt"):  # text of the previous body
+                    os.remove(stale)
+                data = json.dumps(meta).encode("utf-8")
+                self._write(base + ".body", body)
+                self._write(base + ".json", data)
+                self._account(base, len(body) + len(data), replace=True)
+                self._evict()
+        except OSError as e:
+            capture_and_log_exception({"where": "fetch_cache.store", "url": url, "error": str(e)})
+            return self._result(url, status, content_type, body)
+        return self._result(url, status, content_type, body, "fetched")
+
+    def _save_meta(self, url, meta):
+        try:
+            with self._lock:
+                self._write(self._base(url) + ".json", json.dumps(meta).encode("utf-8"))
+                self._account(self._base(url), 0)
+        except OSError as e:
+            capture_and_log_exception({"where": "fetch_cache.touch", "url": url, "error": str(e)})
+
+    # ------------------------------------------------------
+    # Size index (callers hold self._lock)
+    # ------------------------------------------------------
+    def _load_index(self):
+        if self._index is not None:
+            return
+        entries = {}
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                try:
+                    st = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                base = os.path.join(root, name.split(".", 1)[0])
+                size, mtime = entries.get(base, (0, 0))
+                entries[base] = (size + st.st_size, max(mtime, st.st_mtime))
+        self._index = OrderedDict((base, size) for base, (size, _) in sorted(entries.items(), key=lambda kv: kv[1][1]))
+        self._bytes = sum(self._index.values())
+
+    def _account(self, base, size, replace=False):
+        """Adds size bytes to base's entry (or sets it, if replace) and marks it most recently checked."""
+        self._load_index()
+        old = self._index.pop(base, 0)
+        size = size if replace else old + size
+        self._index[base] = size
+        self._bytes += size - old
+
+    def _remove(self, base):
+        self._load_index()
+        self._bytes -= self._index.pop(base, 0)
+        for path in glob.glob(base + ".*"):
+            try: os.remove(path)
+            except OSError: pass
+
+    def _evict(self):
+        while self._index and self._bytes > self.max_bytes:
+            self._remove(next(iter(self._index)))
+
+    # ------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------
+    def get(self, url, session=None, timeout=None, max_bytes=None):
+        meta, body = self._lookup(url)
+        hit = self._fresh(url, meta, body)
+        if hit:
+            return hit
+
+        resp = http_get(url, session=session, headers=self._conditional(meta), timeout=timeout, stream=True)
+        try:
+            fresh_body = bytearray()
+            if resp.status_code != 304:
+                for chunk in resp.iter_content(8192):
+                    fresh_body.extend(chunk)
+                    if max_bytes and len(fresh_body) > max_bytes:
+                        raise RuntimeError("Response too large")
+        finally:
+            resp.close()
+        debug(f"GET {url} -> {resp.status_code}", tag="fetch_cache")
+        return self._store(url, resp.status_code, resp.headers, bytes(fresh_body), meta, body)
+
+    async def get_async(self, url, timeout=None, max_bytes=None):
+        meta, body = self._lookup(url)
+        hit = self._fresh(url, meta, body)
+        if hit:
+            return hit
+
+        async with http_stream_async(url, headers=self._conditional(meta), timeout=timeout) as resp:
+            fresh_body = bytearray()
+            if resp.status_code != 304:
+                async for chunk in resp.aiter_bytes(8192):
+                    fresh_body.extend(chunk)
+                    if max_bytes and len(fresh_body) > max_bytes:
+                        raise RuntimeError("Response too large")
+        debug(f"GET {url} -> {resp.status_code} (async)", tag="fetch_cache")
+        return self._store(url, resp.status_code, resp.headers, bytes(fresh_body), meta, body)
+
+    def text(self, resp, kind, extract, wrap=None):
+        """
+        extract(body), memoized on disk next to the cached body it came from.
+        wrap (e.g. NormalizedText) restores the str type of a memo read back.
+        """
+        path = f"{resp['path']}.{kind}.txt" if resp.get("path") else None
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    return wrap(f.read()) if wrap else f.read()
+            except OSError:
+                pass
+        text = extract(resp["body"])
+        if path and isinstance(text, str) and text:
+            try:
+                data = text.encode("utf-8")
+                with self._lock:
+                    self._write(path, data)
+                    self._account(resp["path"], len(data))
+                    self._evict()
+            except OSError as e:
+                capture_and_log_exception({"where": "fetch_cache.text", "error": str(e)})
+        return text
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counts, enabled=self.enabled, fresh_s=self.fresh_s)
+
+_fetch_cache = FetchCache()
+def get_fetch_cache() -> FetchCache:
+    return _fetch_cache
@@ -0,0 +1,96 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
+
+from src.core.config import FEATURE_CACHE_ITEMS
+
+# Cue patterns (Block 7.3), compiled once
+SUPPORT_RE = re.compile(
+    r"\b(significant|support|consistent|increase|decrease|improve|improves|benefit|better|show|reduction|reduced|associate|associated|suggest)\b",
+    re.I
+)
+CONTRADICT_RE = re.compile(
+    r"\b(no evidence|not significant|contradict|did not|failed to|no effect|inconsistent|reversed|null effect|no difference)\b",
+    re.I
+)
+WORD_RE = re.compile(r"\b\w{4,}\b")
+
+def chunk_features(chunk: str):
+    """(cue label or None, set of 4+-letter lowercase tokens) — everything the heuristic needs from a chunk."""
+    c = (chunk or "").lower()
+    if CONTRADICT_RE.search(c):
+        return "contradicts", frozenset()
+    if SUPPORT_RE.search(c):
+        return "supports", frozenset()
+    # Tokens are only consulted when no cue matched
+    return None, frozenset(WORD_RE.findall(c))
+
+def claim_tokens(claim: str):
+    return frozenset(WORD_RE.findall((claim or "").lower()))
+
+def heuristic_label(cue, claim_toks, chunk_toks) -> str:
+    if cue:
+        return cue
+    # Token overlap fallback (3+ matching big words)
+    if claim_toks and len(claim_toks & chunk_toks) >= 3:
+        return "supports"
+    return "insufficient"
+
+class ChunkFeatureIndex:
+    """
+    Heuristic features per distinct chunk text, computed once (at ingest for
+    indexed chunks, on first use otherwise) and shared by every claim that
+    retrieves the chunk. Indexed chunks are kept as (text, start, end) spans
+    over their document, looked up by hash, so no chunk strings are retained.
+    Features of un-indexed chunks live in an LRU of at most max_items entries.
+    """
+    def __init__(self, max_items=None):
+        self.max_items = FEATURE_CACHE_ITEMS if max_items is None else max_items
+        self._features = OrderedDict()  # un-indexed chunk text -> features, least recently used first
+        self._spans = {}  # hash(chunk) -> [(text, start, end, features)]
+        self._lock = threading.Lock()
+
+    def get(self, chunk):
+        for text, start, end, f in self._spans.get(hash(chunk), ()):
+            if end - start == len(chunk) and text[start:end] == chunk:
+                return f
+        with self._lock:
+            f = self._features.get(chunk)
+            if f is not None:
+                self._features.move_to_end(chunk)
+                return f
+        f = chunk_features(chunk)
+        if self.max_items > 0:
+            with self._lock:
+                self._features[chunk] = f
+                while len(self._features) > self.max_items:
+                    self._features.popitem(last=False)
+        return f
+
+    def add(self, chunks):
+        for chunk in chunks:
+            self.get(chunk)
+
+    def add_spans(self, text, spans):
+        """Precomputes features for chunks given as (start, end) offsets into text."""
+        for start, end in spans:
+            chunk = text[start:end]
+            self._spans.setdefault(hash(chunk), []).append((text, start, end, chunk_features(chunk)))
+
+    def classify(self, pairs: List[Tuple[str, str]]) -> List[str]:
+        """Heuristic labels for (claim, chunk) pairs in one pass; each claim is tokenized once."""
+        claims = {}
+        labels = []
+        for claim, chunk in pairs:
+            try:
+                cue, chunk_toks = self.get(chunk)
+                if cue is None and claim not in claims:
+                    claims[claim] = claim_tokens(claim)
+                labels.append(heuristic_label(cue, claims.get(claim), chunk_toks))
+            except Exception:
+                labels.append("insufficient")
+        return labels
+
+    def __len__(self):
+        return len(self._features) + sum(map(len, self._spans.values()))
@@ -0,0 +1,214 @@
+import time
+import random
+import asyncio
+import threading
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from src.core.config import (
+    HTTP_CONNECT_TIMEOUT_S, HTTP_READ_TIMEOUT_S, HTTP_RETRIES, HTTP_BACKOFF_S,
+    HTTP_BACKOFF_MAX_S, HTTP_POOL_PER_HOST, HTTP_MAX_CONNECTIONS
+)
+from src.core.logger import debug
+
+# Browser-like UA: some publishers reject default client user agents
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+# Transient responses worth retrying
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# ------------------------------------------------------
+# Per-host metrics
+# ------------------------------------------------------
+class HostMetrics:
+    """Request counts and time-to-response latency per host (last 256 samples)."""
+    def __init__(self, window=256):
+        self._hosts = defaultdict(lambda: {"requests": 0, "errors": 0, "retries": 0, "lat": deque(maxlen=window)})
+        self._lock = threading.Lock()
+
+    def record(self, host, latency_s=None, error=False, retry=False):
+        with self._lock:
+            h = self._hosts[host]
+            h["requests"] += 1
+            h["errors"] += int(error)
+            h["retries"] += int(retry)
+            if latency_s is not None:
+                h["lat"].append(latency_s)
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = {}
+            for host, h in self._hosts.items():
+                lat = sorted(h["lat"])
+                pct = lambda p: round(lat[min(len(lat) - 1, int(p * len(lat)))] * 1000, 1) if lat else None
+                out[host] = {
+                    "requests": h["requests"], "errors": h["errors"], "retries": h["retries"],
+                    "avg_ms": round(sum(lat) / len(lat) * 1000, 1) if lat else None,
+                    "p50_ms": pct(0.5), "p95_ms": pct(0.95),
+                }
+            return out
+
+_metrics = HostMetrics()
+def http_stats() -> dict:
+    return _metrics.stats()
+
+def _host(url):
+    return urlparse(url).netloc or url
+
+def _backoff(attempt, retry_after=None):
+    """Exponential backoff with full jitter; a server's Retry-After wins when present."""
+    if retry_after:
+        try:
+            return min(float(retry_after), HTTP_BACKOFF_MAX_S)
+        except ValueError:
+            try:
+                return min(max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time()), HTTP_BACKOFF_MAX_S)
+            except (TypeError, ValueError):
+                pass
+    return random.uniform(0, min(HTTP_BACKOFF_MAX_S, HTTP_BACKOFF_S * (2 ** attempt)))
+
+# ------------------------------------------------------
+# Sync client (requests)
+# ------------------------------------------------------
+_session = None
+_session_lock = threading.Lock()
+
+def get_http_session():
+    """
+    Shared requests.Session: keep-alive pools of up to HTTP_POOL_PER_HOST
+    connections per host (callers block rather than open extra ones).
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            session.headers.update(DEFAULT_HEADERS)
+            adapter = HTTPAdapter(pool_connections=HTTP_MAX_CONNECTIONS, pool_maxsize=HTTP_POOL_PER_HOST, pool_block=True)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+def http_get(url, session=None, headers=None, timeout=None, stream=False, retries=None):
+    """
+    GET with the shared pool, default timeouts and retries (backoff + jitter)
+    on connection errors, timeouts and 429/5xx. Returns the final response.
+    """
+    import requests
+    session = session or get_http_session()
+    timeout = timeout if timeout is not None else (HTTP_CONNECT_TIMEOUT_S, HTTP_READ_TIMEOUT_S)
+    retries = HTTP_RETRIES if retries is None else retries
+    host = _host(url)
+
+    for attempt in range(retries + 1):
+        last = attempt == retries
+        t0 = time.perf_counter()
+        try:
+            resp = session.get(url, headers=headers, timeout=timeout, stream=stream)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            _metrics.record(host, error=True, retry=not last)
+            if last:
+                raise
+            delay = _backoff(attempt)
+            debug(f"GET {url} failed ({e.__class__.__name__}), retry in {delay:.2f}s", tag="http")
+            time.sleep(delay)
+            continue
+
+        retry = resp.status_code in RETRY_STATUSES and not last
+        _metrics.record(host, time.perf_counter() - t0, error=resp.status_code >= 500, retry=retry)
+        if not retry:
+            return resp
+        delay = _backoff(attempt, resp.headers.get("Retry-After"))
+        debug(f"GET {url} -> {resp.status_code}, retry in {delay:.2f}s", tag="http")
+        resp.close()
+        time.sleep(delay)
+
+# ------------------------------------------------------
+# Async client (httpx)
+# ------------------------------------------------------
+_async_client = None
+_async_lock = threading.Lock()
+_host_slots = {}  # host -> (event loop, semaphore)
+
+def get_async_http_client():
+    """Shared httpx.AsyncClient (non-blocking HTTP for the async ingestion path)."""
+    global _async_client
+    with _async_lock:
+        if _async_client is None or _async_client.is_closed:
+            import httpx
+            _async_client = httpx.AsyncClient(
+                headers=DEFAULT_HEADERS, follow_redirects=True,
+                timeout=httpx.Timeout(HTTP_READ_TIMEOUT_S, connect=HTTP_CONNECT_TIMEOUT_S),
+                limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_CONNECTIONS)
+            )
+        return _async_client
+
+def _host_slot(host):
+    # httpx only limits connections globally; cap in-flight requests per host here
+    loop = asyncio.get_running_loop()
+    with _async_lock:
+        entry = _host_slots.get(host)
+        if entry is None or entry[0] is not loop:
+            entry = _host_slots[host] = (loop, asyncio.Semaphore(HTTP_POOL_PER_HOST))
+        return entry[1]
+
+async def close_async_http_client():
+    global _async_client
+    if _async_client is not None and not _async_client.is_closed:
+        await _async_client.aclose()
+    _async_client = None
+
+@asynccontextmanager
+async def http_stream_async(url, headers=None, timeout=None, retries=None):
+    """
+    Async equivalent of http_get(stream=True): yields a streaming httpx
+    response once it is final (retrying transient failures first).
+    """
+    import httpx
+    client = get_async_http_client()
+    retries = HTTP_RETRIES if retries is None else retries
+    host = _host(url)
+
+    async with _host_slot(host):
+        for attempt in range(retries + 1):
+            last = attempt == retries
+            t0 = time.perf_counter()
+            try:
+                resp = await client.send(client.build_request("GET", url, headers=headers, timeout=timeout or client.timeout), stream=True)
+            except httpx.TransportError as e:
+                _metrics.record(host, error=True, retry=not last)
+                if last:
+                    raise
+                delay = _backoff(attempt)
+                debug(f"GET {url} failed ({e.__class__.__name__}), retry in {delay:.2f}s", tag="http")
+                await asyncio.sleep(delay)
+                continue
+
+            retry = resp.status_code in RETRY_STATUSES and not last
+            _metrics.record(host, time.perf_counter() - t0, error=resp.status_code >= 500, retry=retry)
+            if not retry:
+                break
+            delay = _backoff(attempt, resp.headers.get("Retry-After"))
+            debug(f"GET {url} -> {resp.status_code}, retry in {delay:.2f}s", tag="http")
+            await resp.aclose()
+            await asyncio.sleep(delay)
+
+        try:
+            yield resp
+        finally:
+            await resp.aclose()
+
+async def fetch_bytes_async(url, timeout=15, max_bytes=None):
+    """GETs url without blocking the event loop. Returns (status, content_type, body)."""
+    async with http_stream_async(url, timeout=timeout) as resp:
+        body = bytearray()
+        async for chunk in resp.aiter_bytes(8192):
+            body.extend(chunk)
+            if max_bytes and len(body) > max_bytes:
+                raise RuntimeError("Response too large")
+        return resp.status_code, resp.headers.get("Content-Type", "").lower(), bytes(body)
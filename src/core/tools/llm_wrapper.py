@@ -1,20 +1,95 @@
+import json
+import asyncio
+import hashlib
 from src.core.secrets.manager import get_runtime_secrets
 from src.core.tools.text_prep import text_preprocessor
+from src.core.tools.cache import TieredCache
+from src.core.context.compactor import calibrate_tokens
+from src.core.config import LLM_CACHE_ITEMS, LLM_CACHE_DB, LLM_CACHE_TTL_S, LLM_CACHE_MAX_ROWS
 from src.core.observability.error_reporter import capture_and_log_exception
 
-def llm_wrapper(model_id: str = "gemini-2.0-flash"):
-    cache = {"model": None}
-    def call(prompt, **kwargs):
+# Keyword arguments forwarded to Gemini as generation_config (and part of the cache key)
+_GENERATION_PARAMS = ("temperature", "max_output_tokens", "top_p", "top_k")
+
+_llm_cache = TieredCache(
+    "llm", max_items=LLM_CACHE_ITEMS, ttl_s=LLM_CACHE_TTL_S,
+    db_path=LLM_CACHE_DB, max_rows=LLM_CACHE_MAX_ROWS
+)
+def get_llm_cache() -> TieredCache:
+    return _llm_cache
+
+def llm_cache_key(model_id, params, prompt):
+    h = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    return f"{model_id}|{json.dumps(params, sort_keys=True)}|{h}"
+
+def _calibrate(prompt, resp):
+    # Gemini reports the prompt's token count; prompt budgets follow its tokenizer
+    usage = getattr(resp, "usage_metadata", None)
+    calibrate_tokens(prompt, getattr(usage, "prompt_token_count", None))
+
+def llm_wrapper(model_id: str = "gemini-2.0-flash", use_cache=True, cache=None):
+    """
+    Returns call(prompt, **kwargs). Responses are cached by (model id,
+    generation params, prompt hash); pass use_cache=False here or on a
+    single call to bypass the cache. call.acall is the non-blocking
+    (asyncio) equivalent.
+    """
+    response_cache = cache or get_llm_cache()
+    state = {"model": None}
+
+    def _prepare(prompt, kwargs):
         api_key = get_runtime_secrets().require("GEMINI_API_KEY")
-        if not cache["model"]:
+        if not state["model"]:
             import google.generativeai as genai
             genai.configure(api_key=api_key)
-            cache["model"] = genai.GenerativeModel(model_id)
-        
+            state["model"] = genai.GenerativeModel(model_id)
+
         safe = text_preprocessor(prompt, max_length=90000)
+        params = {k: kwargs[k] for k in _GENERATION_PARAMS if kwargs.get(k) is not None}
+        cached = use_cache and kwargs.get("use_cache", True)
+        key = llm_cache_key(model_id, params, safe)
+        hit = response_cache.get(key, tag=kwargs.get("agent_name", "unknown")) if cached else None
+        return safe, params, (key if cached else None), hit
+
+    def call(prompt, **kwargs):
+        safe, params, key, hit = _prepare(prompt, kwargs)
+        if hit is not None:
+            return hit
         try:
-            return cache["model"].generate_content(safe).text
+            resp = state["model"].generate_content(safe, generation_config=params or None)
+            text = resp.text
         except Exception as e:
             capture_and_log_exception({"where": "llm_call", "error": str(e)})
             raise
-    return call
\ No newline at end of file
+        _calibrate(safe, resp)
+        if key:
+            response_cache.set(key, text)
+        return text
+
+    async def acall(prompt, **kwargs):
+        # Prompt cleanup and the cache's SQLite read stay off the event loop
+        safe, params, key, hit = await asyncio.to_thread(_prepare, prompt, kwargs)
+        if hit is not None:
+            return hit
+        try:
+            resp = await state["model"].generate_content_async(safe, generation_config=params or None)
+            text = resp.text
+        except Exception as e:
+            capture_and_log_exception({"where": "llm_call_async", "error": str(e)})
+            raise
+        _calibrate(safe, resp)
+        if key:
+            await asyncio.to_thread(response_cache.set, key, text)
+        return text
+
+    call.acall = acall
+    call.model_id = model_id
+    call.cache = response_cache
+    return call
+
+async def acall_llm(llm_callable, prompt, **kwargs):
+    """Awaits llm_callable natively if it has .acall, else runs it in a worker thread."""
+    acall = getattr(llm_callable, "acall", None)
+    if acall:
+        return await acall(prompt, **kwargs)
+    return await asyncio.to_thread(llm_callable, prompt, **kwargs)
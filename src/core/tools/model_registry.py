@@ -0,0 +1,108 @@
+import os
+import time
+import threading
+from typing import Dict, Optional
+from src.core.logger import debug
+from src.core.observability.error_reporter import capture_and_log_exception
+from src.core.config import MODEL_RETRY_S
+
+try:
+    from sentence_transformers import SentenceTransformer
+    _HAS_ST = True
+except ImportError:
+    _HAS_ST = False
+
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+def _rss_bytes() -> int:
+    """Current resident set size of this process (0 if unavailable)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return 0
+
+def _param_bytes(model) -> int:
+    try:
+        return int(sum(p.numel() * p.element_size() for p in model.parameters()))
+    except Exception:
+        return 0
+
+class ModelRegistry:
+    """
+    Process-wide registry of embedding models, shared by name.
+    Each model is loaded at most once; concurrent callers block on a
+    per-model lock instead of loading duplicate copies. A failed load is
+    not retried for retry_s seconds, then the next caller tries again.
+    """
+    def __init__(self, loader=None, retry_s=None):
+        self._loader = loader or (SentenceTransformer if _HAS_ST else None)
+        self._models: Dict[str, object] = {}
+        self._stats: Dict[str, dict] = {}
+        self._failed: Dict[str, str] = {}
+        self._failed_at: Dict[str, float] = {}
+        self.retry_s = MODEL_RETRY_S if retry_s is None else retry_s
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return self._loader is not None
+
+    def _lock_for(self, model_name):
+        with self._guard:
+            return self._locks.setdefault(model_name, threading.Lock())
+
+    def get(self, model_name: str = DEFAULT_EMBEDDING_MODEL) -> Optional[object]:
+        """Returns the shared model, loading it on first use. None if unavailable."""
+        model = self._models.get(model_name)
+        if model is not None or not self._loader:
+            return model
+
+        with self._lock_for(model_name):
+            if model_name in self._models:
+                return self._models[model_name]
+            if model_name in self._failed:
+                if time.time() - self._failed_at[model_name] < self.retry_s:
+                    return None
+                debug(f"Retrying model {model_name} after failed load", tag="models")
+            try:
+                rss0, t0 = _rss_bytes(), time.time()
+                model = self._loader(model_name)
+                stats = {
+                    "load_s": round(time.time() - t0, 3),
+                    "param_bytes": _param_bytes(model),
+                    "rss_delta_bytes": max(0, _rss_bytes() - rss0),
+                    "loaded_at": time.time(),
+                }
+                self._stats[model_name] = stats
+                self._models[model_name] = model
+                self._failed.pop(model_name, None)
+                self._failed_at.pop(model_name, None)
+                debug(f"Loaded model {model_name} in {stats['load_s']}s "
+                      f"({stats['param_bytes'] // (1024*1024)} MB params)", tag="models")
+                return model
+            except Exception as e:
+                self._failed[model_name] = str(e)
+                self._failed_at[model_name] = time.time()
+                capture_and_log_exception({"where": "model_registry.load", "model": model_name, "error": str(e)})
+                return None
+
+    def preload(self, model_names=None):
+        """Eagerly loads the given models (defaults to the embedding model)."""
+        for name in (model_names or [DEFAULT_EMBEDDING_MODEL]):
+            self.get(name)
+
+    def is_loaded(self, model_name: str) -> bool:
+        return model_name in self._models
+
+    def stats(self) -> dict:
+        return {
+            "available": self.available,
+            "loaded": {k: dict(v) for k, v in self._stats.items()},
+            "failed": dict(self._failed),
+        }
+
+_registry_instance = ModelRegistry()
+def get_model_registry() -> ModelRegistry:
+    return _registry_instance
@@ -0,0 +1,79 @@
+import re
+import unicodedata
+from itertools import islice
+
+_ROLE_PREFIX_RE = re.compile(r"(?i)(system:|assistant:|user:)")
+# Everything str.splitlines() treats as a line boundary
+_LINE_BREAK_RE = re.compile(r"\r\n|[\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]")
+
+class NormalizedText(str):
+    """
+    Text already in the form text_preprocessor(sanitizer(text)) produces:
+    NFKC, a single line with whitespace collapsed and stripped, no leading
+    role prefix. sanitizer() and text_preprocessor() return it as-is (only
+    truncating), so normalized text is never re-normalized downstream.
+    """
+    __slots__ = ()
+
+def _collapse(text):
+    # Same whitespace set as re's \s; equals re.sub(r"\s+", " ", text).strip()
+    return " ".join(text.split())
+
+def truncate(text, max_length):
+    """text[:max_length], still marked as normalized unless the cut leaves a trailing space."""
+    cut = str.__getitem__(text, slice(None, max_length))
+    return cut if cut.endswith(" ") else NormalizedText(cut)
+
+def normalize_text(text, max_lines=5000, max_length=None):
+    """
+    Fused equivalent of text_preprocessor(sanitizer(text, max_lines), max_length=max_length)
+    (one NFKC pass, one whitespace pass). Already normalized text is only truncated.
+    """
+    if isinstance(text, NormalizedText) and (max_lines is None or max_lines >= 1):
+        return truncate(text, max_length) if max_length and len(text) > max_length else text
+    if not isinstance(text, str):
+        return NormalizedText("")
+
+    s = unicodedata.normalize("NFKC", text)
+    if max_lines is not None and max_lines < 1:
+        s = "\n".join(s.splitlines()[:max_lines])
+    elif max_lines is not None:
+        # Lines past max_lines are dropped; the remaining breaks collapse to spaces
+        m = next(islice(_LINE_BREAK_RE.finditer(s), max_lines - 1, None), None)
+        if m:
+            s = s[:m.start()]
+
+    s = _collapse(s)
+    if _ROLE_PREFIX_RE.match(s):
+        s = ""
+    if max_length and len(s) > max_length:
+        return truncate(s, max_length)
+    return NormalizedText(s)
+
+def normalized_part(text):
+    """
+    Marks a stripped slice of NormalizedText (a chunk or a sentence) as
+    normalized; it only needs the role-prefix check. Anything else is returned unchanged.
+    """
+    if not isinstance(text, str) or isinstance(text, NormalizedText) or text != text.strip():
+        return text
+    return text if _ROLE_PREFIX_RE.match(text) else NormalizedText(text)
+
+def iter_normalized(segments):
+    """
+    Streaming normalize_text(): NFKC and whitespace collapsing applied to one
+    segment at a time. Yields NormalizedText pieces; " ".join(pieces) equals
+    normalize_text("\\n".join(segments), max_lines=None), but no more than one
+    segment is ever held.
+    """
+    first = True
+    for segment in segments:
+        # NFKC never composes across the joining newline, so per-segment is exact
+        piece = _collapse(unicodedata.normalize("NFKC", segment or ""))
+        if not piece:
+            continue
+        # Role prefixes contain no whitespace, so the first piece decides
+        if first and _ROLE_PREFIX_RE.match(piece):
+            return
+        first = False
+        yield NormalizedText(piece)
@@ -1,6 +1,19 @@
-def rag_retriever_wrapper(context_engine):
+def rag_retriever_wrapper(context_engine, doc_id=None):
+    def _prov(res):
+        return [{"source": "context", "doc_id": doc_id}] * len(res)
+
     def retrieve(query, k=None):
-        res = context_engine.retrieve(query)
+        res = context_engine.retrieve(query, doc_id=doc_id)
         if k: res = res[:k]
-        return res, [{"source": "context"}] * len(res)
-    return retrieve
\ No newline at end of file
+        return res, _prov(res)
+
+    def retrieve_batch(queries, k=None):
+        """Batch entry point: returns [(chunks, provenance), ...] aligned with queries."""
+        out = []
+        for res in context_engine.retrieve_batch(list(queries), k=k, doc_id=doc_id):
+            if k: res = res[:k]
+            out.append((res, _prov(res)))
+        return out
+
+    retrieve.batch = retrieve_batch
+    return retrieve
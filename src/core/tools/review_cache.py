@@ -0,0 +1,26 @@
+import json
+import hashlib
+from src.core.tools.cache import TieredCache
+from src.core.config import (
+    PIPELINE_VERSION, REVIEW_CACHE_ITEMS, REVIEW_CACHE_DB, REVIEW_CACHE_TTL_S, REVIEW_CACHE_MAX_ROWS
+)
+
+_review_cache = TieredCache(
+    "review", max_items=REVIEW_CACHE_ITEMS, ttl_s=REVIEW_CACHE_TTL_S,
+    db_path=REVIEW_CACHE_DB, max_rows=REVIEW_CACHE_MAX_ROWS
+)
+def get_review_cache() -> TieredCache:
+    return _review_cache
+
+def _normalize(text):
+    # Conservative: inner whitespace feeds chunking and section splitting
+    return (text or "").replace("\r\n", "\n").strip()
+
+def review_cache_key(text, model_id, use_llm, config):
+    """
+    Key for a finished review: normalized content hash, LLM model id, whether
+    an LLM was used and the pipeline config (plus PIPELINE_VERSION).
+    """
+    h = hashlib.sha256(_normalize(text).encode("utf-8")).hexdigest()
+    cfg = json.dumps(dict(config, version=PIPELINE_VERSION), sort_keys=True, default=str)
+    return f"{h}|{model_id or '-'}|{int(bool(use_llm))}|{hashlib.sha256(cfg.encode('utf-8')).hexdigest()[:16]}"
@@ -1,5 +1,8 @@
 import unicodedata
+from src.core.tools.normalize import NormalizedText
 def sanitizer(text, max_lines=300):
     if not isinstance(text, str): return ""
+    # Already NFKC and a single line
+    if isinstance(text, NormalizedText) and (max_lines is None or max_lines >= 1): return text
     text = unicodedata.normalize("NFKC", text)
     return "\n".join(text.splitlines()[:max_lines])
\ No newline at end of file
@@ -0,0 +1,54 @@
+import re
+import unicodedata
+
+_TOKEN_RE = re.compile(r"\S+")
+_ROLE_PREFIX_RE = re.compile(r"(?i)(system:|assistant:|user:)")
+
+class TextBudget:
+    """
+    Collects text segments in order (joined with newlines) and reports when
+    the ingestion output budget is met, i.e. when more segments can no longer
+    change text_preprocessor(sanitizer(NFKC(text), max_lines), max_length):
+    either max_lines lines are complete, or the whitespace-collapsed text has
+    reached max_length chars. Tracked incrementally, so the cost is linear in
+    the text added. prepare (e.g. html.unescape) is applied to each segment.
+    """
+    def __init__(self, max_length, max_lines=5000, prepare=None):
+        self.max_length = max_length
+        self.max_lines = max_lines
+        self.prepare = prepare
+        self.parts = []
+        self.lines = 0
+        self.tokens = 0
+        self.token_chars = 0
+        self.head = ""  # start of the collapsed text (role-prefix rule)
+
+    def add(self, text):
+        text = text or ""
+        self.parts.append(text)
+        # NFKC never composes across the joining newline, so per-segment is exact
+        norm = unicodedata.normalize("NFKC", self.prepare(text) if self.prepare else text)
+
+        # A segment's lines stay distinct lines of the joined text
+        self.lines += len(norm.splitlines())
+        if self.lines >= self.max_lines:
+            return True
+        if not self.max_length:
+            return False
+
+        # Tokens never merge across the newline separator, so the collapsed
+        # length is the token chars plus one space between consecutive tokens
+        tokens = _TOKEN_RE.findall(norm)
+        if tokens:
+            self.tokens += len(tokens)
+            self.token_chars += sum(map(len, tokens))
+            if len(self.head) < 16:
+                self.head = " ".join([self.head] + tokens[:4]).lstrip()
+        # text_preprocessor drops everything after a leading role prefix
+        if _ROLE_PREFIX_RE.match(self.head):
+            return False
+        return self.token_chars + max(0, self.tokens - 1) >= self.max_length
+
+    @property
+    def text(self):
+        return "\n".join(self.parts)
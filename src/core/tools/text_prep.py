@@ -1,6 +1,9 @@
 import re
+from src.core.tools.normalize import NormalizedText, truncate
 def text_preprocessor(text, normalize_whitespace=True, max_length=None):
     s = text or ""
+    # Whitespace already collapsed and role prefixes already stripped
+    if isinstance(s, NormalizedText): return truncate(s, max_length) if max_length and len(s) > max_length else s
     if normalize_whitespace: s = re.sub(r"\s+", " ", s).strip()
     s = re.sub(r"(?mi)^(system:|assistant:|user:).*", "", s)
     if max_length and len(s) > max_length: s = s[:max_length]
@@ -0,0 +1,377 @@
+import re
+import json
+import time
+import random
+import tracemalloc
+import unicodedata
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+import src.core.system as system_mod
+import src.core.scheduler as scheduler_mod
+import src.core.tools.normalize as normalize_mod
+import src.core.tools.sanitizer as sanitizer_mod
+import src.core.tools.text_prep as text_prep_mod
+import src.core.tools.embedding_cache as embedding_cache_mod
+import src.agents.ingestion.dispatcher as dispatcher_mod
+import src.agents.ingestion.pdf as pdf_mod
+from src.core.system import Hypothesi
+from src.core.tools.sanitizer import sanitizer
+from src.core.tools.text_prep import text_preprocessor
+from src.agents.ingestion.url import _html_to_text, _bs4_text
+from src.agents.ingestion.html_stream import HAVE_LXML
+from src.core.tools.heuristics import ChunkFeatureIndex
+from src.core.context.engine import ContextEngine
+from src.core.orchestrator import Orchestrator
+from src.agents.ingestion.stream import DocumentStream
+import src.agents.structure as structure_mod
+import src.agents.claims as claims_mod
+import src.agents.reliability as reliability_mod
+from src.agents.structure import ScientificStructureExtractorFactory
+from src.core.config import STRUCTURE_PROMPT_TOKENS, CLAIMS_PROMPT_TOKENS, RELIABILITY_PROMPT_TOKENS
+from src.core.context.compactor import ContextCompactor, estimate_tokens
+
+# ============================================================
+# Helpers
+# ============================================================
+def _best_of(fn, repeat=3):
+    best, out = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return round(best * 1000, 2), out
+
+def _synthetic_html(paragraphs=5000, seed=7):
+    """Article-like page: chrome (nav/script/footer) around long paragraphs."""
+    rnd = random.Random(seed)
+    words = ["hypothesis", "effect", "sample", "&amp;", "significant", "<b>trial</b>", "<a href='#'>ref</a>", "été", "p&lt;0.05", "cohort"]
+    head = "<html><head><title>Paper</title><style>p{margin:0}</style><script>var x='<p>';</script></head><body><nav><a>Home</a><a>About</a></nav>"
+    body = "".join(f"<p>{' '.join(rnd.choice(words) for _ in range(40))}</p>" for _ in range(paragraphs))
+    return (head + "<article>" + body + "</article><footer>(c) Publisher</footer></body></html>").encode("utf-8")
+
+# ============================================================
+# BENCH A — HTML Text Extraction
+# ============================================================
+def run_html_extraction_benchmark(paragraphs=5000, max_length=200000, repeat=3):
+    """
+    Legacy path (chunks appended to a growing bytes object, full BeautifulSoup
+    parse + decompose) vs the incremental extractors, which skip noise while
+    parsing and stop once max_length is met. Reports best-of-N ms per backend
+    and whether each output is identical to the bs4 one.
+    """
+    page = _synthetic_html(paragraphs)
+    out = {"page_bytes": len(page), "max_length": max_length, "backends": {}}
+
+    def legacy():
+        content = b""
+        for i in range(0, len(page), 8192):
+            content += page[i:i + 8192]
+        return _html_to_text(content, parser="bs4", max_length=max_length)
+
+    ms, ref = _best_of(legacy, repeat)
+    out["backends"]["legacy_bs4"] = {"ms": ms, "chars": len(ref)}
+
+    for name in ("stream", "lxml") if HAVE_LXML else ("stream",):
+        ms, text = _best_of(lambda: _html_to_text(page, parser=name, max_length=max_length), repeat)
+        out["backends"][name] = {"ms": ms, "chars": len(text), "identical": text == ref}
+
+    # Parse-only cost of the full document (no early stop) for reference
+    out["bs4_parse_only_ms"], _ = _best_of(lambda: _bs4_text(page), 1)
+    return out
+
+# ============================================================
+# BENCH B — Text Normalization Passes
+# ============================================================
+class _PassCounter:
+    """Counts whole-text normalization passes (NFKC, regex substitutions, whitespace collapses) and their chars."""
+    def __init__(self):
+        self.passes = 0
+        self.chars = 0
+
+    def count(self, text):
+        self.passes += 1
+        self.chars += len(text or "")
+
+    def unicodedata(self):
+        counter = self
+        class _Proxy:
+            def __getattr__(self, name): return getattr(unicodedata, name)
+            def normalize(self, form, text):
+                counter.count(text)
+                return unicodedata.normalize(form, text)
+        return _Proxy()
+
+    def re(self):
+        counter = self
+        class _Proxy:
+            def __getattr__(self, name): return getattr(re, name)
+            def sub(self, pattern, repl, text, *args, **kwargs):
+                counter.count(text)
+                return re.sub(pattern, repl, text, *args, **kwargs)
+        return _Proxy()
+
+@contextmanager
+def _patched(targets):
+    saved = [(obj, name, getattr(obj, name)) for obj, name, _ in targets]
+    for obj, name, value in targets:
+        setattr(obj, name, value)
+    try:
+        yield
+    finally:
+        for obj, name, value in saved:
+            setattr(obj, name, value)
+
+def _synthetic_paper(target_chars=200000, seed=11):
+    rnd = random.Random(seed)
+    findings = [
+        "We found that treatment {i} significantly increased yield in the test plots.",
+        "The data did not show an effect of fertilizer {i} on root growth.",
+        "Observations suggest that schedule {i} improves growth rates considerably.",
+        "Measurements were repeated   three times\tper plot and averaged.",
+    ]
+    parts = ["Title: Effects of X on Y", "Abstract", "We investigated whether X improves Y.", "Methods", "Randomized trial, N=120.", "Results"]
+    while sum(len(p) + 1 for p in parts) < target_chars:
+        parts.append(" ".join(rnd.choice(findings).format(i=rnd.randint(1, 500)) for _ in range(4)))
+    parts += ["Conclusion", "The findings support the hypothesis."]
+    return "\n".join(parts)
+
+def _comparable(result):
+    out = dict(result)
+    out.pop("duration_s", None)
+    out.get("structured_data", {}).pop("full_text", None)
+    return re.sub(r"doc-[0-9a-f]{12}", "doc-X", json.dumps(out, sort_keys=True, default=str))
+
+def run_normalization_benchmark(target_chars=200000):
+    """
+    Full heuristic analyze() of a raw-text paper, counting whole-text
+    normalization passes: "legacy" re-runs sanitizer/text_preprocessor (and
+    an extra NFKC) at every stage, "fused" normalizes once into NormalizedText
+    which later stages recognize. Also checks both give the same review.
+    """
+    doc = _synthetic_paper(target_chars)
+    out = {"doc_chars": len(doc), "modes": {}}
+
+    def legacy_ingest(text, max_lines=5000, max_length=None):
+        return text_preprocessor(sanitizer(str(text), max_lines=max_lines), max_length=max_length)
+
+    def legacy_analyze(text, max_lines=5000, max_length=None):
+        return sanitizer_mod.unicodedata.normalize("NFKC", legacy_ingest(text, max_lines, max_length))
+
+    results = {}
+    for mode in ("legacy", "fused"):
+        counter = _PassCounter()
+        collapse = normalize_mod._collapse
+        targets = [
+            (sanitizer_mod, "unicodedata", counter.unicodedata()),
+            (normalize_mod, "unicodedata", counter.unicodedata()),
+            (embedding_cache_mod, "unicodedata", counter.unicodedata()),
+            (text_prep_mod, "re", counter.re()),
+            (embedding_cache_mod, "re", counter.re()),
+            (normalize_mod, "_collapse", lambda t: (counter.count(t), collapse(t))[1]),
+        ]
+        if mode == "legacy":
+            targets += [(dispatcher_mod, "normalize_text", legacy_ingest), (system_mod, "normalize_text", legacy_analyze)]
+
+        with _patched(targets):
+            t0 = time.perf_counter()
+            results[mode] = Hypothesi(user_id=f"bench-{mode}").analyze(doc, use_llm=False, force_refresh=True)
+            ms = round((time.perf_counter() - t0) * 1000, 1)
+        out["modes"][mode] = {"passes": counter.passes, "chars_processed": counter.chars, "analyze_ms": ms}
+
+    out["passes_eliminated"] = out["modes"]["legacy"]["passes"] - out["modes"]["fused"]["passes"]
+    out["identical"] = _comparable(results["legacy"]) == _comparable(results["fused"])
+    return out
+
+# ============================================================
+# BENCH C — Heuristic Evidence Classification
+# ============================================================
+def _legacy_heuristic(claim, chunk):
+    # Per-pair version: patterns compiled and both texts tokenized on every call
+    c = (chunk or "").lower()
+    support = re.compile(r"\b(significant|support|consistent|increase|decrease|improve|improves|benefit|better|show|reduction|reduced|associate|associated|suggest)\b", re.I)
+    contradict = re.compile(r"\b(no evidence|not significant|contradict|did not|failed to|no effect|inconsistent|reversed|null effect|no difference)\b", re.I)
+    if contradict.search(c):
+        return "contradicts"
+    if support.search(c):
+        return "supports"
+    claim_tokens = set(re.findall(r"\b\w{4,}\b", (claim or "").lower()))
+    chunk_tokens = set(re.findall(r"\b\w{4,}\b", c))
+    return "supports" if claim_tokens and len(claim_tokens & chunk_tokens) >= 3 else "insufficient"
+
+def run_heuristic_benchmark(n_claims=10, n_chunks=400, k=5, repeat=3):
+    """
+    Labels every claim x retrieved-chunk pair: per-pair legacy function vs
+    ChunkFeatureIndex (features computed once per chunk, one batched pass).
+    """
+    rnd = random.Random(5)
+    vocab = ["growth", "yield", "plants", "water", "roots", "trial", "dose", "effect", "cohort", "signal", "shows", "did not"]
+    chunks = [" ".join(rnd.choice(vocab) for _ in range(120)) for _ in range(n_chunks)]
+    claims = [" ".join(rnd.choice(vocab) for _ in range(12)) for _ in range(n_claims)]
+    pairs = [(claim, rnd.choice(chunks)) for claim in claims for _ in range(k)]
+
+    legacy_ms, legacy = _best_of(lambda: [_legacy_heuristic(c, ch) for c, ch in pairs], repeat)
+
+    index = ChunkFeatureIndex()
+    ingest_ms, _ = _best_of(lambda: index.add(chunks), 1)
+    batched_ms, batched = _best_of(lambda: index.classify(pairs), repeat)
+    return {"pairs": len(pairs), "legacy_ms": legacy_ms, "ingest_features_ms": ingest_ms,
+            "batched_ms": batched_ms, "identical": legacy == batched}
+
+def run_memory_benchmark(target_chars=200000):
+    """
+    Python heap (tracemalloc) of one uncached review of a synthetic paper:
+    peak during the run and what stays retained afterwards (index, features,
+    review cache entry). The embedding model itself is not counted.
+    """
+    doc = normalize_mod.normalize_text(_synthetic_paper(target_chars), max_length=target_chars)
+    orch = Orchestrator(ContextEngine("benchmark_memory"))
+    tracemalloc.start()
+    try:
+        orch.run(doc, force_refresh=True)
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"doc_chars": len(doc), "chunks": len(orch.context_engine.chunks),
+            "retained_kb": retained // 1024, "peak_kb": peak // 1024}
+
+def _traced(fn):
+    tracemalloc.start()
+    try:
+        t0 = time.perf_counter()
+        fn()
+        ms = round((time.perf_counter() - t0) * 1000, 1)
+        return ms, tracemalloc.get_traced_memory()[1] // 1024
+    finally:
+        tracemalloc.stop()
+
+def run_stream_ingest_benchmark(target_chars=2000000, page_chars=5000):
+    """
+    Indexes a book-length synthetic text (as page_chars "pages") without the
+    200k cap: whole text normalized then ingest_text(), vs ingest_stream()
+    over the pages. Reports time and peak Python heap of each, and whether
+    both produce the same chunks.
+    """
+    raw = _synthetic_paper(target_chars)
+    pages = [raw[i:i + page_chars] for i in range(0, len(raw), page_chars)]
+    whole, streamed = ContextEngine("benchmark_whole"), ContextEngine("benchmark_stream")
+
+    whole_ms, whole_kb = _traced(lambda: whole.ingest_text(normalize_mod.normalize_text("\n".join(pages), max_lines=None)))
+    stream_ms, stream_kb = _traced(lambda: streamed.ingest_stream(DocumentStream(iter(pages), max_chars=len(raw) * 2)))
+    return {"chars": len(raw), "chunks": len(streamed.chunks), "whole_ms": whole_ms, "whole_peak_kb": whole_kb,
+            "stream_ms": stream_ms, "stream_peak_kb": stream_kb, "identical": list(whole.chunks) == list(streamed.chunks)}
+
+def _legacy_compact(chunks, max_tokens):
+    # Previous ContextCompactor.compact: re-sums the estimate on every pop
+    est = lambda c: max(1, int(len(c) / 4))
+    out = list(chunks)
+    while out and sum(est(c) for c in out) > max_tokens:
+        out.pop(0)
+    return out
+
+def run_prompt_compaction_benchmark(target_chars=200000, n_chunks=4000, repeat=3):
+    """
+    Compaction time (legacy quadratic loop vs ContextCompactor on n_chunks
+    chunks) and estimated prompt tokens of the structure, claims and
+    reliability prompts for a synthetic paper, before (fixed char slices,
+    whole sections) and after (relevance-ranked token budgets).
+    """
+    rnd = random.Random(3)
+    chunks = [" ".join(rnd.choice(["yield", "dose", "trial", "root", "growth"]) for _ in range(rnd.randint(20, 150)))
+              for _ in range(n_chunks)]
+    compactor = ContextCompactor(6000)
+    legacy_ms, _ = _best_of(lambda: _legacy_compact(chunks, 6000), 1)
+    compact_ms, _ = _best_of(lambda: compactor.compact(chunks, query="dose yield"), repeat)
+
+    raw = _synthetic_paper(target_chars)
+    text = normalize_mod.normalize_text(raw, max_length=target_chars)
+    # Sections as the heuristic splits them from multi-line text (results is most of the paper)
+    extractor = ScientificStructureExtractorFactory(None)
+    struct = extractor._heuristic(extractor._default(raw), raw)
+    sections = {k: v for k, v in struct.items() if k != "full_text"}
+    reliability_fields = {k: struct.get(k) or "" for k in ("abstract", "methods", "results")}
+    # Only the document data of each prompt is compared (instructions are unchanged)
+    legacy = {
+        "structure": text[:15000],
+        "claims": json.dumps(sections),
+        "reliability": json.dumps({k: v[:800] for k, v in reliability_fields.items()}),
+    }
+    current = {
+        "structure": ContextCompactor(STRUCTURE_PROMPT_TOKENS).compact_text(text, structure_mod._SECTION_QUERY),
+        "claims": json.dumps(dict(sections, **ContextCompactor(CLAIMS_PROMPT_TOKENS).compact_fields(sections, claims_mod._FINDING_QUERY))),
+        "reliability": json.dumps(ContextCompactor(RELIABILITY_PROMPT_TOKENS).compact_fields(reliability_fields, reliability_mod._RELIABILITY_QUERY)),
+    }
+    return {"chunks": n_chunks, "legacy_compact_ms": legacy_ms, "compact_ms": compact_ms,
+            "prompt_tokens": {k: {"legacy": estimate_tokens(legacy[k]), "compacted": estimate_tokens(current[k])}
+                              for k in legacy}}
+
+def run_stage_graph_benchmark(ingest_s=0.3, llm_s=0.1, repeat=3):
+    """
+    Orchestrator.run() with a fake LLM taking llm_s per call (one call per
+    structure, claims, evidence, reliability and meta stage) and ingest
+    slowed by ingest_s: the stage graph on a one-worker pool (stages back
+    to back, as before) vs the shared stage pool (ingest overlaps the
+    structure and claims calls). Reports best-of-N wall ms of each.
+    """
+    def llm(prompt, **kwargs):
+        time.sleep(llm_s)
+        return "{}"
+
+    orchestrator = Orchestrator(ContextEngine("benchmark_stages"))
+    ingest = orchestrator._ingest
+    def slow_ingest(raw_text, kwargs):
+        time.sleep(ingest_s)
+        return ingest(raw_text, kwargs)
+    orchestrator._ingest = slow_ingest
+
+    raw = _synthetic_paper(20000)
+    review = lambda: orchestrator.run(raw, use_llm=True, llm_callable=llm, classify_mode="document")
+    serial_pool = ThreadPoolExecutor(max_workers=1)
+    try:
+        with _patched([(scheduler_mod, "get_stage_pool", lambda: serial_pool)]):
+            serial_ms, serial = _best_of(review, repeat)
+    finally:
+        serial_pool.shutdown()
+    graph_ms, graph = _best_of(review, repeat)
+    return {"ingest_s": ingest_s, "llm_s": llm_s, "serial_ms": serial_ms, "graph_ms": graph_ms,
+            "critical_path": orchestrator.last_timings["critical_path"],
+            "identical": _comparable(serial) == _comparable(graph)}
+
+def _synthetic_pdf(pages=120, seed=5):
+    """PDF bytes of pages pages of paper-like text (about 3k chars each)."""
+    rnd = random.Random(seed)
+    doc = pdf_mod.fitz.open()
+    for p in range(pages):
+        words = " ".join(rnd.choice(["trial", "dose", "yield", "cohort", "significant", "effect"]) for _ in range(450))
+        doc.new_page().insert_textbox(pdf_mod.fitz.Rect(36, 36, 576, 806), f"Page {p + 1}. {words}", fontsize=8)
+    try:
+        return doc.tobytes()
+    finally:
+        doc.close()
+
+def run_pdf_extraction_benchmark(pages=120, budgets=(50000, 200000, None), repeat=3):
+    """
+    load_pdf() of an in-memory synthetic PDF per output budget (None: whole
+    document): serial, forced parallel and automatic mode. The shared pool
+    is started before timing; its one-off start-up is reported separately.
+    Reports best-of-N ms of each and whether the outputs match serial.
+    """
+    if not pdf_mod.HAVE_PYMUPDF:
+        return {"error": "PyMuPDF not installed"}
+    data = _synthetic_pdf(pages)
+    tool = pdf_mod.PdfIngestionTool()
+    out = {"pages": pages, "pdf_bytes": len(data), "workers": pdf_mod.PDF_WORKERS, "budgets": {}}
+
+    t0 = time.perf_counter()
+    tool.load_pdf(data, max_length=None, parallel=True)
+    out["pool_start_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+
+    for max_length in budgets:
+        serial_ms, ref = _best_of(lambda: tool.load_pdf(data, max_length=max_length, parallel=False), repeat)
+        row = {"serial_ms": serial_ms}
+        for mode, parallel in (("parallel", True), ("auto", None)):
+            ms, text = _best_of(lambda: tool.load_pdf(data, max_length=max_length, parallel=parallel), repeat)
+            row[f"{mode}_ms"], row[f"{mode}_identical"] = ms, text == ref
+        out["budgets"][str(max_length or "all")] = row
+    return out
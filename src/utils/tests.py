@@ -1,14 +1,25 @@
 import os
 import time
+import asyncio
+import tempfile
+import threading
 import unicodedata
 import textwrap
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
 
 from src.core.context.engine import ContextEngine
 from src.core.orchestrator import Orchestrator
 from src.agents.ingestion.dispatcher import auto_ingest
 from src.agents.ingestion.pdf import PdfIngestionTool
-from src.agents.ingestion.url import UrlIngestionTool
+import src.agents.ingestion.url as url_mod
+from src.agents.ingestion.url import UrlIngestionTool, UrlIngestionToolAsync
 from src.agents.ingestion.arxiv import ArxivIngestionTool
+from src.core.tools.fetch_cache import FetchCache
+from src.core.context.config import ContextConfig
+from src.core.context.chunker import chunk_text, iter_chunks
+from src.core.tools.normalize import NormalizedText, normalize_text, iter_normalized
+from src.core.jobs.worker import ReviewWorkerPool
+from src.core.jobs.store import InMemoryJobStore, SqliteJobStore, QUEUED, RUNNING, DONE, FAILED
 from src.core.observability.error_reporter import capture_and_log_exception
 from src.core.logger import debug
 
@@ -129,4 +140,237 @@ def run_batch_test(items, llm_callable=None):
         except Exception as e:
             results.append({"name": name, "ok": False, "error": str(e)})
     
-    return results
\ No newline at end of file
+    return results
+
+# ============================================================
+# TEST F — HTTP Fetch Cache (local stand-in server)
+# ============================================================
+def run_fetch_cache_test():
+    """
+    Serves a page from a local http.server (which answers If-Modified-Since
+    with 304) and checks: first GET is fetched, a repeat within the freshness
+    window never reaches the server, an expired entry is revalidated (304),
+    and a modified page is downloaded again. A no-store page is never
+    cached, and a small max_bytes keeps only the newest entry. Extracted
+    text read back from its memo stays NormalizedText (sync and async tools).
+    """
+    t0 = time.time()
+    out = {"ok": False, "error": None}
+    statuses = []
+
+    with tempfile.TemporaryDirectory() as site, tempfile.TemporaryDirectory() as cache_dir:
+        page = os.path.join(site, "paper.html")
+        with open(page, "w") as f:
+            f.write("<html><body><p>Results: X improves Y.</p></body></html>")
+        os.utime(page, (time.time() - 60, time.time() - 60))
+
+        class Handler(SimpleHTTPRequestHandler):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, directory=site, **kwargs)
+            def log_request(self, code="-", size="-"):
+                statuses.append(int(code))
+            def end_headers(self):
+                if "private" in self.path:
+                    self.send_header("Cache-Control", "no-store")
+                super().end_headers()
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}/paper.html"
+
+        try:
+            cache = FetchCache(cache_dir=cache_dir, fresh_s=60)
+            steps = [cache.get(url)["cache"], cache.get(url)["cache"]]
+
+            cache.fresh_s = 0
+            steps.append(cache.get(url)["cache"])
+
+            with open(page, "w") as f:
+                f.write("<html><body><p>Results: X has no effect on Y.</p></body></html>")
+            last = cache.get(url)
+            steps.append(last["cache"])
+
+            with open(os.path.join(site, "private.html"), "w") as f:
+                f.write("<html><body>per-user page</body></html>")
+            cache.fresh_s = 60
+            private = [cache.get(url.replace("paper", "private"))["cache"] for _ in range(2)]
+
+            # Room for one entry: storing a second evicts the least recently checked
+            small = FetchCache(cache_dir=cache_dir, fresh_s=60, max_bytes=len(last["body"]) + 400)
+            small.get(url.replace("paper", "private"))
+            small._store(url + "?v=2", 200, {"Content-Type": "text/html"}, last["body"], None, None)
+            kept = sorted(small._index) == [small._base(url + "?v=2")]
+
+            # First call extracts and writes the memo, the second reads it back
+            saved = url_mod.get_fetch_cache
+            url_mod.get_fetch_cache = lambda: cache
+            try:
+                memo = [UrlIngestionTool(url), UrlIngestionTool(url),
+                        asyncio.run(UrlIngestionToolAsync(url)), asyncio.run(UrlIngestionToolAsync(url))]
+            finally:
+                url_mod.get_fetch_cache = saved
+            out["memo_types"] = [type(t).__name__ for t in memo]
+
+            out["steps"] = steps
+            out["server_statuses"] = statuses
+            out["ok"] = (
+                steps == ["fetched", "fresh", "revalidated", "fetched"]
+                and statuses[:3] == [200, 304, 200]
+                and b"no effect" in last["body"]
+                and private == [None, None]
+                and all(isinstance(t, NormalizedText) and "no effect" in t for t in memo)
+                and kept and small._bytes <= small.max_bytes
+            )
+        except Exception as e:
+            out["error"] = str(e)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    out["duration_s"] = time.time() - t0
+    return out
+
+# ============================================================
+# TEST G — Job Store (queue / claim / finish)
+# ============================================================
+def run_job_store_test():
+    """
+    For both backends: jobs are claimed once each in FIFO order and finish
+    as done/failed. SQLite: two stores on one file never claim the same job,
+    a claim re-queues only runs whose lease lapsed, and a job a worker pool
+    keeps heartbeating past the lease is never taken by a second process.
+    In-memory: finished jobs past max_finished are evicted.
+    """
+    t0 = time.time()
+    out = {"ok": False, "error": None}
+
+    def fifo(store):
+        ids = [store.submit({"n": n}) for n in range(3)]
+        claimed = [store.claim() for _ in range(4)]
+        store.finish(ids[0], result={"score": 1})
+        store.finish(ids[1], error="boom")
+        return (
+            [j and j["job_id"] for j in claimed] == ids + [None]
+            and claimed[0]["status"] == RUNNING and claimed[0]["request"] == {"n": 0}
+            and store.get(ids[0])["status"] == DONE and store.get(ids[0])["result"] == {"score": 1}
+            and store.get(ids[1])["status"] == FAILED and store.get(ids[2])["status"] == RUNNING
+        )
+
+    try:
+        checks = {"memory_fifo": fifo(InMemoryJobStore())}
+
+        mem = InMemoryJobStore(max_finished=2)
+        ids = [mem.submit({}) for _ in range(3)]
+        for job_id in ids:
+            mem.claim()
+            mem.finish(job_id, result={})
+        checks["memory_evicts"] = mem.get(ids[0]) is None and mem.get(ids[2]) is not None
+
+        with tempfile.TemporaryDirectory() as d:
+            db = os.path.join(d, "jobs.sqlite")
+            checks["sqlite_fifo"] = fifo(SqliteJobStore(db))
+
+            a, b = SqliteJobStore(db), SqliteJobStore(db)
+            ids = [a.submit({"n": n}) for n in range(40)]
+            got, lock = [], threading.Lock()
+            def drain(store):
+                while True:
+                    job = store.claim()
+                    if job is None:
+                        return
+                    with lock:
+                        got.append(job["job_id"])
+            threads = [threading.Thread(target=drain, args=(s,)) for s in (a, b, a, b)]
+            for t in threads: t.start()
+            for t in threads: t.join()
+            checks["sqlite_claims_once"] = sorted(got) == sorted(ids)
+
+            # ids[-1] was just claimed (fresh lease); backdate ids[-2] past it
+            a._db.execute("UPDATE jobs SET started_at = ?, heartbeat_at = ? WHERE job_id = ?",
+                          (time.time() - 3600, time.time() - 3600, ids[-2]))
+            a._db.commit()
+            reopened = SqliteJobStore(db, lease_s=600)
+            checks["sqlite_lease"] = (
+                reopened.requeue_stale() == 1
+                and reopened.get(ids[-2])["status"] == QUEUED and reopened.get(ids[-1])["status"] == RUNNING
+            )
+
+        with tempfile.TemporaryDirectory() as d:
+            # A 1.2s job on a 0.3s lease: the pool's heartbeat keeps it from another process
+            db = os.path.join(d, "jobs.sqlite")
+            owner, other = SqliteJobStore(db, lease_s=0.3), SqliteJobStore(db, lease_s=0.3)
+            runs = []
+            pool = ReviewWorkerPool(owner, lambda req: runs.append(req) or time.sleep(1.2) or {"ok": True},
+                                    workers=1, heartbeat_s=0.1)
+            pool.start()
+            try:
+                job_id = pool.submit({"n": 1})
+                while owner.get(job_id)["status"] != RUNNING:  # claimed by the pool, not by other
+                    time.sleep(0.01)
+                stolen = []
+                deadline = time.time() + 1.0
+                while time.time() < deadline:
+                    stolen.append(other.claim())
+                    time.sleep(0.05)
+                while owner.get(job_id)["status"] == RUNNING and time.time() < deadline + 2:
+                    time.sleep(0.05)
+            finally:
+                pool.stop()
+            checks["sqlite_heartbeat"] = (
+                not any(stolen) and len(runs) == 1 and owner.get(job_id)["status"] == DONE
+            )
+
+            # Without heartbeats the same job is reclaimed once the lease lapses
+            job_id = owner.submit({"n": 2})
+            owner.claim()
+            time.sleep(0.4)
+            reclaimed = other.claim()
+            checks["sqlite_abandoned"] = bool(reclaimed) and reclaimed["job_id"] == job_id
+
+        out["checks"] = checks
+        out["ok"] = all(checks.values())
+    except Exception as e:
+        out["error"] = str(e)
+
+    out["duration_s"] = time.time() - t0
+    return out
+
+# ============================================================
+# TEST H — Streamed vs Whole-Text Chunking
+# ============================================================
+def run_stream_chunking_test():
+    """
+    iter_chunks(iter_normalized(segments)) must give exactly the chunks of
+    chunk_text(normalize_text("\n".join(segments))), for segments cut at
+    arbitrary points (mid-word, inside whitespace runs, empty and
+    whitespace-only segments, NFKC-sensitive characters) and chunk sizes
+    smaller and larger than a segment.
+    """
+    t0 = time.time()
+    out = {"ok": False, "error": None}
+    words = ["trial", "dose", "ﬁnding", "Ｘ", "café", "p<0.05", "\t", "  ", "\n\n", "results."]
+    cases = {
+        "pages": [textwrap.dedent(f"""
+            Page {p}. {' '.join(words[(p + i) % len(words)] for i in range(300))}
+            """) for p in range(12)],
+        "ragged": ["", "   ", "We found", " that X", "  \n improves", "", "Y.", "\t", "End"],
+        "single": ["One short segment without breaks."],
+    }
+    configs = [ContextConfig(chunk_size=size, chunk_overlap=overlap)
+               for size, overlap in ((800, 100), (64, 16), (5000, 0), (7, 3))]
+    try:
+        mismatches = []
+        for name, segments in cases.items():
+            for config in configs:
+                whole = list(chunk_text(normalize_text("\n".join(segments), max_lines=None), config))
+                streamed = list(iter_chunks(iter_normalized(iter(segments)), config))
+                if streamed != whole:
+                    mismatches.append(f"{name}@{config.chunk_size}/{config.chunk_overlap}")
+        out["cases"] = len(cases) * len(configs)
+        out["mismatches"] = mismatches
+        out["ok"] = not mismatches
+    except Exception as e:
+        out["error"] = str(e)
+
+    out["duration_s"] = time.time() - t0
+    return out